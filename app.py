@@ -8,6 +8,7 @@ see https://github.com/johan-cho/mbtamapper?tab=readme-ov-file#running
 johan cho | 2023-2024
 
 """
+
 import argparse
 import difflib
 import json
@@ -15,20 +16,24 @@ import logging
 import os
 import sys
 import threading
+import typing as t
 
 import flask
 from werkzeug.middleware.dispatcher import DispatcherMiddleware
 from werkzeug.middleware.proxy_fix import ProxyFix
 
-from gtfs_loader import FeedLoader, Query
+from gtfs_loader import FeedLoader, VehicleSnapshots, next_cursor, parse_bbox
+from helper_functions import FastJSONProvider
 
 LAYER_FOLDER: str = "geojsons"
+API_TIMEOUT: int = 15  # seconds, see `Feed.deadline`
 with open(os.path.join("static", "config", "route_keys.json"), "r", -1, "utf-8") as f:
     KEY_DICT: dict[str, dict[str, str | list[str]]] = json.load(f)
 FEED_LOADER: FeedLoader = FeedLoader(
     url="https://cdn.mbta.com/MBTA_GTFS.zip",
     geojson_path=os.path.join(os.getcwd(), "static", LAYER_FOLDER),
     keys_dict={k: v["route_types"] for k, v in KEY_DICT.items()},
+    artifact=os.environ.get("MBTA_ARTIFACT"),  # see `FeedLoader.pull_artifact`
 )
 
 logging.basicConfig(
@@ -65,6 +70,76 @@ def _error404(_app: flask.Flask, error: Exception | None = None) -> tuple[str, i
     return flask.render_template("404.html", **url_dict), 404
 
 
+def _json_stream(
+    rows: t.Iterable[dict[str, t.Any]], geojson: bool = False
+) -> t.Generator[str, None, None]:
+    """encodes rows incrementally as a json list, or a `FeatureCollection`.
+
+    Args:
+        - `rows (Iterable[dict[str, Any]])`: rows to encode
+        - `geojson (bool, optional)`: wrap in a `FeatureCollection`. Defaults to False.\n
+    Yields:
+        - `str`: chunks of the json document
+    """
+    yield '{"type":"FeatureCollection","features":[' if geojson else "["
+    for i, row in enumerate(rows):
+        yield f"{',' if i else ''}{flask.json.dumps(row)}"
+    yield "]}" if geojson else "]"
+
+
+def _orm_stream(
+    orm_name: str,
+    orm: type,
+    include: list[str],
+    geojson: bool,
+    params: dict[str, str],
+) -> tuple[flask.Response, int] | flask.Response:
+    """streams `/api/<orm_name>?stream=1`, see `Feed.stream_orm_json`.
+
+    Args:
+        - `orm_name (str)`: name requested
+        - `orm (type)`: ORM to stream
+        - `include (list[str])`: other orms to include
+        - `geojson (bool)`: stream a `FeatureCollection`
+        - `params (dict[str, str])`: filters, ordering and paging\n
+    Returns:
+        - `Response`: streamed json, or an error and 400 if a param is malformed.
+    """
+    try:
+        rows = FEED_LOADER.stream_orm_json(
+            orm, *include, timeout=API_TIMEOUT, geojson=geojson, **params
+        )
+    except ValueError as error:
+        return flask.jsonify({"error": str(error), f"{orm_name} args": orm.cols}), 400
+    return flask.Response(
+        flask.stream_with_context(_json_stream(rows, geojson)),
+        mimetype="application/json",
+    )
+
+
+def _set_next_cursor(
+    response: flask.Response,
+    orm: type,
+    data: list[dict[str, t.Any]],
+    params: dict[str, str],
+) -> None:
+    """sets `X-Next-Cursor` (see `next_cursor`) if `data` is a full page; \
+        only in the default, primary key order, as that's what `after` pages by.
+
+    Args:
+        - `response (Response)`: response to set the header on
+        - `orm (type)`: ORM of the rows
+        - `data (list[dict[str, Any]])`: rows of the page
+        - `params (dict[str, str])`: filters, ordering and paging
+    """
+    if (
+        data
+        and not params.get("order_by")
+        and len(data) == int(params.get("limit") or -1)
+    ):
+        response.headers["X-Next-Cursor"] = next_cursor(orm, data[-1])
+
+
 def create_key_app(key: str, proxies: int = 5) -> flask.Flask:
     """Create app for a given key
 
@@ -74,6 +149,7 @@ def create_key_app(key: str, proxies: int = 5) -> flask.Flask:
     Returns:
         `Flask`: app for the key."""
     _app = flask.Flask(__name__)
+    _app.json = FastJSONProvider(_app)
 
     @_app.route("/")
     def render_map() -> str:
@@ -94,19 +170,62 @@ def create_key_app(key: str, proxies: int = 5) -> flask.Flask:
 
     @_app.route("/vehicles")
     @_app.route("/api/vehicle")
-    def get_vehicles() -> flask.Response:
+    def get_vehicles() -> flask.Response | tuple[flask.Response, int]:
         """Returns vehicles as geojson in the context of the route type AND \
             flask, exported to /vehicles as an api.
+
+        served from the latest vehicle snapshot; `bbox=min_lon,min_lat,max_lon,max_lat`\
+            limits the response to vehicles within the bbox, and `since=<generation>`\
+            returns only vehicles changed since then plus `removed` vehicle ids.
             
         Returns:
             - `Response`: geojson of vehicles.
         """
-        return flask.jsonify(
-            FEED_LOADER.get_vehicles_feature(
-                key,
-                Query(*KEY_DICT[key]["route_types"]),
-                *[s.strip() for s in flask.request.args.get("include", "").split(",")],
+        try:
+            bbox = parse_bbox(flask.request.args.get("bbox"))
+            include = VehicleSnapshots.vehicle_include(
+                *flask.request.args.get("include", "").split(",")
             )
+        except ValueError as error:
+            return flask.jsonify({"error": str(error)}), 400
+        since = flask.request.args.get("since", type=int)
+        if since is None:
+            snapshot = FEED_LOADER.snapshots.get(key, *include)
+            return flask.Response(snapshot.dumps(bbox), mimetype="application/json")
+        snapshot, previous = FEED_LOADER.snapshots.get_since(key, since, *include)
+        return flask.Response(
+            snapshot.dumps_delta(previous, bbox) if previous else snapshot.dumps(bbox),
+            mimetype="application/json",
+        )
+
+    @_app.route("/vehicles/stream")
+    def stream_vehicles() -> flask.Response | tuple[flask.Response, int]:
+        """Streams vehicles as server-sent events in the context of the route type: \
+            a `snapshot` FeatureCollection on connect, then a `delta` \
+            FeatureCollection (changed features + `removed` ids) after each update.
+
+        each open stream holds a server thread, so past \
+            `VehicleSnapshots.STREAM_MAX_SUBSCRIBERS` streams this is a 503 \
+            and clients poll `/vehicles?since=` instead.
+
+        returns:
+            - `Response`: `text/event-stream` of vehicles.
+        """
+        try:
+            include = VehicleSnapshots.vehicle_include(
+                *flask.request.args.get("include", "").split(",")
+            )
+        except ValueError as error:
+            return flask.jsonify({"error": str(error)}), 400
+        if (stream := FEED_LOADER.snapshots.stream(key, *include)) is None:
+            return (
+                flask.jsonify({"error": "Too many streams, poll /vehicles instead."}),
+                503,
+            )
+        return flask.Response(
+            stream,
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
         )
 
     @_app.route("/stops")
@@ -200,10 +319,11 @@ def create_main_app(import_data: bool = False, proxies: int = 5) -> flask.Flask:
     """
 
     _app = flask.Flask(__name__)
+    _app.json = FastJSONProvider(_app)
 
     with _app.app_context():  # background thread to run update
         thread = threading.Thread(
-            target=FEED_LOADER.import_and_run, kwargs={"import_data": import_data}
+            target=FEED_LOADER.elect_and_run, kwargs={"import_data": import_data}
         )
         thread.start()
 
@@ -237,6 +357,24 @@ def create_main_app(import_data: bool = False, proxies: int = 5) -> flask.Flask:
         """
         return _app.send_static_file("img/all_routes.ico")
 
+    @_app.route("/api/departures")
+    def departures_api() -> tuple[flask.Response, int] | flask.Response:
+        """Returns the next departures per route/direction from a stop.
+
+        returns:
+            - `Response`: departures, soonest first.
+        """
+
+        stop_id = flask.request.args.get("stop_id", "").strip()
+        limit = flask.request.args.get("limit", "3")
+        if not stop_id or not limit.isdigit():
+            error = {"error": "stop_id required, limit must be an integer"}
+            return flask.jsonify(error), 400
+        data = FEED_LOADER.get_departures(stop_id, int(limit))
+        if data is None:
+            return flask.jsonify({"error": "null"}), 400
+        return flask.jsonify(data)
+
     @_app.route("/api/<orm_name>")
     def orm_api(orm_name: str) -> tuple[str | flask.Response, int] | flask.Response:
         """Returns the ORM for a given key.
@@ -255,18 +393,22 @@ def create_main_app(import_data: bool = False, proxies: int = 5) -> flask.Flask:
             bool(params.pop("geojson", False))  # this will be removed in the future
             or params.pop("file_type", "").lower() == "geojson"
         )
-        timeout = 15  # seconds
+        if params.pop("stream", "").lower() in {"1", "true"}:
+            return _orm_stream(orm_name, orm, include, geojson, params)
         try:
             data = FEED_LOADER.timeout_get_orm_json(
-                orm, *include, timeout=timeout, geojson=geojson, **params
+                orm, *include, timeout=API_TIMEOUT, geojson=geojson, **params
             )
         except TimeoutError:
-            return flask.jsonify({"error": f"response > {timeout}s"}), 408
+            return flask.jsonify({"error": f"response > {API_TIMEOUT}s"}), 408
         except Exception:  # pylint: disable=broad-except
             return flask.jsonify({"error": "?", f"{orm_name} args": orm.cols}), 400
         if data is None:
             return flask.jsonify({"error": "null", f"{orm_name} args": orm.cols}), 400
-        return flask.jsonify(data)
+        response = flask.jsonify(data)
+        if not geojson:
+            _set_next_cursor(response, orm, data, params)
+        return response
 
     @_app.errorhandler(404)
     def page_not_found(error: Exception | None = None) -> tuple[str, int]:
@@ -326,6 +468,24 @@ def get_args(**kwargs) -> argparse.ArgumentParser:
         help="number of proxies to allow on connection.",
     )
 
+    _argparse.add_argument(
+        "--shape_points",
+        action="store_true",
+        help="also import shapes.txt as shape_points rows, for /api/shape_point",
+    )
+
+    _argparse.add_argument(
+        "--artifact",
+        help="directory or url of prebuilt artifacts to start from instead of importing "
+        "(or set MBTA_ARTIFACT)",
+    )
+
+    _argparse.add_argument(
+        "--build_artifact",
+        metavar="STORE",
+        help="import, export geojsons and publish an artifact to this directory, then exit",
+    )
+
     _argparse.add_argument(
         "--log_level",
         "-l",
@@ -345,6 +505,13 @@ if __name__ == "__main__":
     logger = logging.getLogger()
     logger.addHandler(logging.StreamHandler(sys.stdout))
     logger.setLevel(getattr(logging, args.log_level.upper()))
+    FEED_LOADER.shape_points = args.shape_points
+    FEED_LOADER.artifacts.store = args.artifact or FEED_LOADER.artifacts.store
+    if args.build_artifact:
+        FEED_LOADER.nightly_import()
+        FEED_LOADER.geojson_exports()
+        FEED_LOADER.publish_artifact(args.build_artifact)
+        sys.exit(0)
     if args.debug and (
         args.import_data or not FEED_LOADER.db_exists or not FEED_LOADER.geojsons_exist
     ):
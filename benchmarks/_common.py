@@ -0,0 +1,57 @@
+"""Setup shared by the benchmarks.
+
+there's no test runner in this repo: the benchmarks that check something \
+    (that two paths agree, `lazy_loads`' one statement per load, ...) \
+    exit with 1 when the check fails, so they double as the tests.
+"""
+
+import argparse
+import json
+import os
+import sys
+import typing as t
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# pylint: disable=wrong-import-position
+from gtfs_loader import Feed
+
+
+def load_keys_dict() -> dict[str, list[str]]:
+    """route types by key, from `static/config/route_keys.json`"""
+    with open(
+        os.path.join(ROOT, "static", "config", "route_keys.json"), "r", -1, "utf-8"
+    ) as file:
+        return {k: v["route_types"] for k, v in json.load(file).items()}
+
+
+def open_feed(db_path: str) -> Feed:
+    """a `Feed` on an existing database; changes into its directory, \
+        since `Feed` opens <cwd>/<name>.db"""
+    os.chdir(os.path.dirname(os.path.abspath(db_path)))
+    return Feed(
+        "https://cdn.mbta.com/MBTA_GTFS.zip",
+        gtfs_name=os.path.splitext(os.path.basename(db_path))[0],
+    )
+
+
+def run(
+    main: t.Callable[..., int | None], doc: str, db: bool = True, **options: t.Any
+) -> None:
+    """parses the command line and exits with what `main` returns.
+
+    args:
+        - `main (Callable[..., int | None])`: benchmark, called with the options
+        - `doc (str)`: module docstring, its first line describes the benchmark
+        - `db (bool, optional)`: add `--db`, passed as `db_path`. Defaults to True.
+        - `**options`: other options and their defaults, passed by name
+    """
+    parser = argparse.ArgumentParser(description=doc.split("\n", 1)[0])
+    if db:
+        parser.add_argument("--db", dest="db_path", default="MBTA_GTFS.db")
+    for name, default in options.items():
+        parser.add_argument(
+            f"--{name}", type=str if default is None else type(default), default=default
+        )
+    sys.exit(main(**vars(parser.parse_args())))
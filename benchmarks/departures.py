@@ -0,0 +1,216 @@
+"""Times the upcoming-departures board for a stop: the timetable, one sql query, the orm.
+
+the orm path is what a stop popup did: load the stop, walk \
+    `Stop.get_stop_times()` (every scheduled stop time of every child stop) \
+    and filter/rank them in python. the sql path is `Feed.get_departures` \
+    without a timetable, the timetable path is `Feed.get_departures` with one \
+    (`DepartureBoard`). defaults to the busiest parent station in `stop_routes`.
+
+usage: `python -m benchmarks.departures --db MBTA_GTFS.db --stop place-sstat`
+"""
+
+import functools
+import os
+import sys
+import tempfile
+import time
+import typing as t
+from collections import defaultdict
+
+import pandas as pd
+import sqlalchemy as sa
+from sqlalchemy import event
+from sqlalchemy import orm as saorm
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from benchmarks._common import run
+from gtfs_loader import DepartureBoard, Query, Timetable
+from gtfs_orms import ServiceCalendar, Stop, StopRoute, StopTime
+from helper_functions import get_date
+
+
+def busiest_station(session: saorm.Session) -> str:
+    """the parent station with the most routes in `stop_routes`"""
+    return session.execute(
+        sa.select(StopRoute.parent_station)
+        .where(StopRoute.parent_station.is_not(None))
+        .group_by(StopRoute.parent_station)
+        .order_by(sa.func.count(sa.distinct(StopRoute.route_id)).desc())
+        .limit(1)
+    ).scalar_one()
+
+
+def added_departures(
+    stop: Stop, stop_times: list[StopTime], now: float
+) -> dict[tuple[str, int], list[tuple[float, str]]]:
+    """upcoming predictions at a stop that aren't in its `stop_times` (added trips)
+
+    args:
+        - `stop (Stop)`: stop or parent station
+        - `stop_times (list[StopTime])`: its scheduled stop times
+        - `now (float)`: unix timestamp\n
+    returns:
+        - `dict[tuple[str, int], list[tuple[float, str]]]`: (route_id, direction_id) \
+            -> departure_timestamp, trip_id
+    """
+    board: dict[tuple[str, int], list[tuple[float, str]]] = defaultdict(list)
+    scheduled = {(st.trip_id, st.stop_id) for st in stop_times}
+    for prediction in stop.get_predictions():
+        if (prediction.trip_id, prediction.stop_id) not in scheduled and (
+            prediction.departure_time or 0
+        ) >= now:
+            key = (
+                prediction.route_id or prediction.trip.route_id,
+                prediction.direction_id,
+            )
+            board[key].append((prediction.departure_time, prediction.trip_id))
+    return board
+
+
+def orm_departures(
+    session: saorm.Session, stop_id: str, now: float, limit: int
+) -> list[tuple[str, float]]:
+    """the departures board built from orm objects, filtered and ranked in python.
+
+    args:
+        - `session (Session)`: session to load with
+        - `stop_id (str)`: stop or parent station
+        - `now (float)`: unix timestamp
+        - `limit (int)`: departures per route/direction\n
+    returns:
+        - `list[tuple[str, float]]`: trip_id, departure_timestamp
+    """
+    service_calendar = ServiceCalendar.from_session(session)
+    service_days = [
+        (service_calendar.service_ids(date), date.timestamp())
+        for date in (get_date(), get_date(-1))  # yesterday's trips past midnight
+    ]
+    stop = session.get(Stop, stop_id)
+    stop_times: list[StopTime] = list(stop.get_stop_times())
+    board = added_departures(stop, stop_times, now)
+    for stop_time in stop_times:
+        prediction = stop_time.prediction
+        for service_ids, _unix_time in service_days:
+            if stop_time.trip.service_id not in service_ids:
+                continue
+            departure = (
+                prediction.departure_time
+                if prediction and prediction.departure_time
+                else stop_time.departure_seconds + _unix_time
+            )
+            if departure >= now and (stop_time.pickup_type or "0") != "1":
+                key = (stop_time.trip.route_id, stop_time.trip.direction_id)
+                board[key].append((departure, stop_time.trip_id))
+    return sorted(
+        (trip_id, departure)
+        for departures in board.values()
+        for departure, trip_id in sorted(departures)[:limit]
+    )
+
+
+def sql_departures(
+    session: saorm.Session, stop_id: str, now: float, limit: int
+) -> list[tuple[str, float]]:
+    """the departures board from `Query.get_departures_query`, see `orm_departures`"""
+    service_calendar = ServiceCalendar.from_session(session)
+    stmt = Query.get_departures_query(
+        stop_id,
+        now,
+        [(d, service_calendar.service_ids(d)) for d in (get_date(), get_date(-1))],
+        limit,
+    )
+    return sorted(
+        (row.trip_id, row.departure_timestamp) for row in session.execute(stmt)
+    )
+
+
+def build_timetable(engine: sa.Engine) -> Timetable:
+    """a `Timetable` of the database, in a temp file"""
+    path = os.path.join(tempfile.mkdtemp(), "benchmark.timetable")
+    Timetable.write(path, pd.read_sql(Query.get_timetable_query(), engine))
+    return Timetable(path)
+
+
+def timetable_departures(
+    timetable: Timetable, session: saorm.Session, stop_id: str, now: float, limit: int
+) -> list[tuple[str, float]]:
+    """the departures board from `DepartureBoard`, see `orm_departures`"""
+    service_calendar = ServiceCalendar.from_session(session)
+    board = DepartureBoard(session, timetable, stop_id, now)
+    return sorted(
+        (row["trip_id"], row["departure_timestamp"])
+        for row in board.departures(
+            [(d, service_calendar.service_ids(d)) for d in (get_date(), get_date(-1))],
+            limit,
+        )
+    )
+
+
+def timed(
+    engine: sa.Engine, func: t.Callable[[saorm.Session], t.Any], repeat: int
+) -> tuple[float, int, t.Any]:
+    """runs a function `repeat` times in fresh sessions.
+
+    args:
+        - `engine (Engine)`: engine to run on
+        - `func (Callable[[Session], Any])`: function to run
+        - `repeat (int)`: runs\n
+    returns:
+        - `tuple[float, int, Any]`: best seconds, statements per run, result
+    """
+    statements = []
+
+    def _count(*args: t.Any) -> None:  # pylint: disable=unused-argument
+        statements.append(None)
+
+    best, result = float("inf"), None
+    event.listen(engine, "before_cursor_execute", _count)
+    try:
+        for _ in range(repeat):
+            statements.clear()
+            with saorm.Session(engine) as session:
+                start = time.perf_counter()
+                result = func(session)
+                best = min(best, time.perf_counter() - start)
+    finally:
+        event.remove(engine, "before_cursor_execute", _count)
+    return best, len(statements), result
+
+
+def main(db_path: str, stop: str | None, limit: int, repeat: int) -> int:
+    """times the departure boards and checks they agree.
+
+    args:
+        - `db_path (str)`: sqlite database to read
+        - `stop (str | None)`: stop or parent station, defaults to the busiest
+        - `limit (int)`: departures per route/direction
+        - `repeat (int)`: runs per path, the best is reported\n
+    returns:
+        - `int`: exit code, 1 if the boards differ
+    """
+    engine = sa.create_engine(f"sqlite:///{db_path}")
+    with saorm.Session(engine) as session:
+        stop_id = stop or busiest_station(session)
+    now = time.time()
+    print(f"stop: {stop_id}, limit: {limit}")
+    results = []
+    for name, func in (
+        ("orm", orm_departures),
+        ("sql", sql_departures),
+        ("timetable", functools.partial(timetable_departures, build_timetable(engine))),
+    ):
+        seconds, statements, result = timed(
+            engine, lambda s, f=func: f(s, stop_id, now, limit), repeat
+        )
+        results.append(result)
+        print(
+            f"{name:<9} {seconds * 1000:>9.2f}ms {statements:>6} statements "
+            f"{len(result):>4} departures"
+        )
+    return int(results[0] != results[1] or results[1] != results[2])
+
+
+if __name__ == "__main__":
+    run(main, __doc__, stop=None, limit=3, repeat=5)
@@ -0,0 +1,82 @@
+"""Times reading `stop_times` from the parquet `FeedCache` vs parsing its CSV.
+
+exports `stop_times` from the db to a temp CSV, parses it the way the \
+    import does (`dtype=object`, chunked, seconds derived) while writing the cache, \
+    then reads it back from the cache. exits with 1 if the two differ.
+
+usage: `python -m benchmarks.feed_cache --db MBTA_GTFS.db`
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pandas as pd
+import sqlalchemy as sa
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from benchmarks._common import run
+from gtfs_loader import FeedCache
+from gtfs_orms import StopTime
+from helper_functions import to_seconds_series
+
+CHUNKSIZE = 100_000  # see `FeedLoader.nightly_import`
+
+
+def main(db_path: str) -> int:
+    """parses stop_times.txt into the cache, then reads the cache.
+
+    args:
+        - `db_path (str)`: sqlite database to export stop_times from\n
+    returns:
+        - `int`: exit code, 1 if the frames differ
+    """
+    path = tempfile.mkdtemp()
+    columns = [
+        c.name
+        for c in StopTime.__table__.columns
+        if c.name not in ("arrival_seconds", "departure_seconds")
+    ]
+    pd.read_sql(
+        sa.select(*(StopTime.__table__.c[c] for c in columns)),
+        sa.create_engine(f"sqlite:///{db_path}"),
+    ).to_csv(os.path.join(path, StopTime.__filename__), index=False)
+    cache = FeedCache(os.path.join(path, "cache"))
+    frames: dict[str, pd.DataFrame] = {}
+
+    start = time.perf_counter()
+    chunks = []
+    with cache.write("benchmark") as writer:
+        with pd.read_csv(
+            os.path.join(path, StopTime.__filename__), chunksize=CHUNKSIZE, dtype=object
+        ) as read:
+            for chunk in read:
+                chunk["arrival_seconds"] = to_seconds_series(chunk["arrival_time"])
+                chunk["departure_seconds"] = to_seconds_series(chunk["departure_time"])
+                writer.append(StopTime.__filename__, chunk)
+                chunks.append(chunk)
+    frames["csv"] = pd.concat(chunks)
+    print(f"csv + cache {time.perf_counter() - start:>8.3f}s {len(frames['csv'])} rows")
+
+    start = time.perf_counter()
+    frames["cache"] = pd.concat(
+        cache.read("benchmark", StopTime.__filename__, CHUNKSIZE)
+    )
+    csv_size = os.path.getsize(os.path.join(path, StopTime.__filename__))
+    parquet_size = sum(
+        e.stat().st_size for e in os.scandir(os.path.join(cache.path, "benchmark"))
+    )
+    print(
+        f"cache       {time.perf_counter() - start:>8.3f}s "
+        f"{csv_size / 1e6:.2f}MB csv, {parquet_size / 1e6:.2f}MB parquet"
+    )
+    shutil.rmtree(path)
+    return int(not frames["csv"].fillna(pd.NA).equals(frames["cache"].fillna(pd.NA)))
+
+
+if __name__ == "__main__":
+    run(main, __doc__)
@@ -0,0 +1,81 @@
+"""Checks that a follower serves the new database after the ingestor pulls an artifact.
+
+publishes the database as an artifact, then deletes stops from the live database \
+    so it differs, lets a follower read it (holding a pooled connection to that file), \
+    and has the ingestor pull the artifact, which replaces the file. \
+    exits with 1 if the follower still sees the deleted stops after `follow_ingestor`.
+
+usage: `python -m benchmarks.follow_artifact --db MBTA_GTFS.db`
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+import sqlalchemy as sa
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from benchmarks._common import load_keys_dict, run
+from gtfs_loader import FeedLoader
+from gtfs_orms import Stop
+
+
+def count_stops(feed_loader: FeedLoader) -> int:
+    """stops in the database, as `feed_loader` sees it"""
+    session = feed_loader.scoped_session()
+    count = session.execute(sa.select(sa.func.count()).select_from(Stop)).scalar()
+    feed_loader.scoped_session.remove()
+    return count
+
+
+def main(db_path: str) -> int:
+    """publishes, diverges, pulls and follows.
+
+    args:
+        - `db_path (str)`: sqlite database to copy\n
+    returns:
+        - `int`: exit code, 1 if the follower serves the old database
+    """
+    keys_dict = load_keys_dict()
+    db_path = os.path.abspath(db_path)
+    os.chdir(tempfile.mkdtemp())  # `Feed` opens <cwd>/<name>.db
+    shutil.copy(db_path, "follow.db")
+    os.makedirs("geojsons", exist_ok=True)
+    ingestor, follower = (
+        FeedLoader(
+            "https://cdn.mbta.com/MBTA_GTFS.zip",
+            "geojsons",
+            keys_dict,
+            gtfs_name="follow",
+        )
+        for _ in range(2)
+    )
+    ingestor.acquire_ingest_lock()
+    ingestor.load_timetable()
+    ingestor.publish_artifact("store")
+    with sqlite3.connect("follow.db") as connection:
+        connection.execute("DELETE FROM stops WHERE rowid % 2 = 0")
+    follower.follow_ingestor()
+    diverged = count_stops(follower)
+
+    ingestor.pull_artifact("store")
+    start = time.perf_counter()
+    follower.follow_ingestor()
+    elapsed = time.perf_counter() - start
+    published, followed = count_stops(ingestor), count_stops(follower)
+    print(
+        f"stops: {diverged} before pull, {published} published, {followed} followed "
+        f"({elapsed * 1e3:.2f}ms to follow)"
+    )
+    ingestor.stop(full=True)
+    follower.stop(full=True)
+    return int(followed != published or diverged == published)
+
+
+if __name__ == "__main__":
+    run(main, __doc__)
@@ -0,0 +1,85 @@
+"""Counts the sql statements it takes to load, then serialize, rows.
+
+loading a table should be a single select: derived attributes that need \
+    a relationship (`StopTime.destination_label`, `Prediction.delay`, ...) \
+    are cached properties, not set in a `reconstructor`. \
+    exits with 1 if loading any table takes more than one statement.
+
+usage: `python -m benchmarks.lazy_loads --db MBTA_GTFS.db --rows 5000`
+"""
+
+import os
+import sys
+import time
+import typing as t
+
+import sqlalchemy as sa
+from sqlalchemy import event
+from sqlalchemy import orm as saorm
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from benchmarks._common import run
+from gtfs_orms import Prediction, Stop, StopTime, Vehicle
+
+ORMS = (Prediction, StopTime, Stop, Vehicle)
+
+
+def counted(engine: sa.Engine, func: t.Callable[[], t.Any]) -> tuple[int, float, t.Any]:
+    """runs a function, counting the statements it executes.
+
+    args:
+        - `engine (Engine)`: engine to count statements on
+        - `func (Callable)`: function to run\n
+    returns:
+        - `tuple[int, float, Any]`: statements, seconds, result
+    """
+    statements = []
+
+    def _count(*args: t.Any) -> None:  # pylint: disable=unused-argument
+        statements.append(None)
+
+    event.listen(engine, "before_cursor_execute", _count)
+    start = time.perf_counter()
+    try:
+        result = func()
+    finally:
+        event.remove(engine, "before_cursor_execute", _count)
+    return len(statements), time.perf_counter() - start, result
+
+
+def main(db_path: str, rows: int) -> int:
+    """loads and serializes up to `rows` rows of every orm in `ORMS`.
+
+    args:
+        - `db_path (str)`: sqlite database to read
+        - `rows (int)`: max rows per table\n
+    returns:
+        - `int`: exit code, 1 if a load took more than one statement
+    """
+    engine = sa.create_engine(f"sqlite:///{db_path}")
+    code = 0
+    print(f"{'orm':<12} {'rows':>6} {'load':>6} {'time':>9} {'as_json':>8} {'time':>9}")
+    for orm in ORMS:
+        with saorm.Session(engine) as session:
+            loads, load_time, objs = counted(
+                engine,
+                lambda o=orm, s=session: s.execute(sa.select(o).limit(rows))
+                .scalars()
+                .all(),
+            )
+            dumps, dump_time, _ = counted(
+                engine, lambda o=objs: [obj.as_json() for obj in o]
+            )
+        print(
+            f"{orm.__name__:<12} {len(objs):>6} {loads:>6} {load_time:>8.3f}s "
+            f"{dumps:>8} {dump_time:>8.3f}s"
+        )
+        if loads > 1:
+            code = 1
+    return code
+
+
+if __name__ == "__main__":
+    run(main, __doc__, rows=5000)
@@ -0,0 +1,139 @@
+"""Benchmarks `/api/<orm>` filtering on a synthetic predictions table.
+
+compares the compiled filters in `gtfs_loader.orm_filter` run in sql \
+    against the same filters as a python predicate over loaded rows.
+
+usage: `python -m benchmarks.orm_filter --rows 100000`
+"""
+
+import os
+import sys
+import tempfile
+import time
+import typing as t
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from benchmarks._common import run
+from gtfs_loader import Feed
+from gtfs_loader.orm_filter import Filter
+from gtfs_loader.query import Query
+from gtfs_orms import Base, Prediction
+from helper_functions import get_date
+
+STOPS = 20
+TRIPS = 100
+
+
+def build(feed: Feed, rows: int) -> None:
+    """fills a feed's database with `rows` predictions \
+        and the stops/trips/stop_times they reference.
+
+    args:
+        - `feed (Feed)`: feed to fill
+        - `rows (int)`: number of predictions
+    """
+    Base.metadata.create_all(feed.engine)
+    noon = int(get_date().timestamp()) + 12 * 3600  # matches stop_times below
+    tables = {
+        "stops": pd.DataFrame(
+            {
+                "stop_id": [f"s{i}" for i in range(STOPS)],
+                "stop_name": [f"Stop {i}" for i in range(STOPS)],
+                "location_type": "0",
+                "wheelchair_boarding": "0",
+                "municipality": "Boston",
+            }
+        ),
+        "trips": pd.DataFrame(
+            {
+                "trip_id": [f"t{i}" for i in range(TRIPS)],
+                "route_id": "r",
+                "service_id": "s",
+                "trip_headsign": [f"Stop {i % STOPS}" for i in range(TRIPS)],
+                "direction_id": 0,
+                "shape_id": "sh",
+                "wheelchair_accessible": 0,
+                "route_pattern_id": "rp",
+                "bikes_allowed": 0,
+            }
+        ),
+        "stop_times": pd.DataFrame(
+            {
+                "trip_id": f"t{trip}",
+                "stop_id": f"s{stop}",
+                "stop_sequence": stop,
+                "arrival_time": "12:00:00",
+                "departure_time": "12:00:00",
+                "pickup_type": "0",
+                "drop_off_type": "0",
+            }
+            for trip in range(TRIPS)
+            for stop in range(STOPS)
+        ),
+        "predictions": pd.DataFrame(
+            {
+                "index": range(rows),
+                "prediction_id": [f"p{i}" for i in range(rows)],
+                "trip_id": [f"t{i % TRIPS}" for i in range(rows)],
+                "stop_id": [f"s{i % STOPS}" for i in range(rows)],
+                "stop_sequence": [i % STOPS for i in range(rows)],
+                "departure_time": [noon + (i % 1200) - 600 for i in range(rows)],
+            }
+        ),
+    }
+    with feed.engine.connect() as conn:  # routes/calendars/shapes aren't needed
+        conn.exec_driver_sql("PRAGMA foreign_keys=OFF")
+        for table, frame in tables.items():
+            frame.to_sql(table, conn, if_exists="append", index=False)
+        conn.commit()
+
+
+def timed(name: str, func: t.Callable[[], t.Any]) -> t.Any:
+    """runs and prints the time of a function.
+
+    args:
+        - `name (str)`: label
+        - `func (Callable)`: function to run\n
+    returns:
+        - `Any`: result of the function
+    """
+    start = time.perf_counter()
+    result = func()
+    print(f"{name:<64} {time.perf_counter() - start:8.3f}s  {len(result):>8} rows")
+    return result
+
+
+def main(rows: int) -> None:
+    """builds the database and runs the benchmarks.
+
+    args:
+        - `rows (int)`: number of predictions
+    """
+    os.chdir(tempfile.mkdtemp())
+    feed = Feed("https://localhost/bench.zip")
+    build(feed, rows)
+    session = feed.scoped_session()
+    objs = timed(
+        "load all predictions",
+        lambda: session.execute(Query.select(Prediction)).scalars().all(),
+    )
+    predicate = Filter.parse("delay>=", "60").predicate()
+    timed("python predicate: delay>=60", lambda: [o for o in objs if predicate(o)])
+    for params in (
+        {"stop_sequence>=": "5"},
+        {"stop_name": "Stop 3"},
+        {"trip.trip_headsign": "Stop 3", "delay>=": "60"},
+    ):
+        session.expunge_all()
+        timed(
+            f"get_orm_json: {params}",
+            lambda p=params: feed.get_orm_json(Prediction, **p),
+        )
+
+
+if __name__ == "__main__":
+    run(main, __doc__, db=False, rows=100_000)
@@ -0,0 +1,114 @@
+"""Benchmarks `/api/<orm>` without includes: orm objects vs plain rows.
+
+runs `compile_query` for a few tables of an existing database, \
+    loading orm objects (reconstructors, lazy loads) and then with `json_rows`, \
+    which selects `Base.json_select()` rows when it can. \
+    reports time, peak memory (`tracemalloc`) and orm objects loaded \
+    (lazy loads included) per request.
+
+usage: `python -m benchmarks.row_json --db MBTA_GTFS.db --repeat 5`
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+import typing as t
+
+import sqlalchemy as sa
+from sqlalchemy import event
+from sqlalchemy import orm as saorm
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from benchmarks._common import run
+from gtfs_loader import compile_query
+from gtfs_orms import Alert, Base, Route, Stop, StopTime
+
+ORMS = (Stop, Route, Alert, StopTime)
+
+
+def orm_json(session: saorm.Session, orm: t.Type[Base]) -> list[dict[str, t.Any]]:
+    """the object path: load every object, then `as_json()`.
+
+    args:
+        - `session (Session)`: session to query with
+        - `orm (type[Base])`: orm to query\n
+    returns:
+        - `list[dict[str, Any]]`: json rows
+    """
+    stmt, page = compile_query(orm)
+    return [row[0].as_json() for row in page(session.execute(stmt))]
+
+
+def row_json(session: saorm.Session, orm: t.Type[Base]) -> list[dict[str, t.Any]]:
+    """the row path: `compile_query(..., json_rows=True)`.
+
+    args:
+        - `session (Session)`: session to query with
+        - `orm (type[Base])`: orm to query\n
+    returns:
+        - `list[dict[str, Any]]`: json rows
+    """
+    stmt, page = compile_query(orm, json_rows=True)
+    return list(page(session.execute(stmt)))
+
+
+def measure(
+    engine: sa.Engine, func: t.Callable, orm: t.Type[Base], repeat: int
+) -> tuple[float, float, int, int]:
+    """runs a request `repeat` times, each in a new session.
+
+    args:
+        - `engine (Engine)`: engine to query
+        - `func (Callable)`: `orm_json` or `row_json`
+        - `orm (type[Base])`: orm to query
+        - `repeat (int)`: requests to time\n
+    returns:
+        - `tuple[float, float, int, int]`: best seconds, \
+            peak KiB, orm objects loaded, rows
+    """
+    timings = []
+    for _ in range(repeat):
+        with saorm.Session(engine) as session:
+            start = time.perf_counter()
+            func(session, orm)
+            timings.append(time.perf_counter() - start)
+    loaded = []
+
+    def _on_load(obj: Base, context: t.Any) -> None:  # pylint: disable=unused-argument
+        loaded.append(obj.__class__)
+
+    event.listen(Base, "load", _on_load, propagate=True)
+    with saorm.Session(engine) as session:
+        tracemalloc.start()
+        result = func(session, orm)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    event.remove(Base, "load", _on_load)
+    return min(timings), peak / 1024, len(loaded), len(result)
+
+
+def main(db_path: str, repeat: int) -> None:
+    """runs both paths for every orm in `ORMS`.
+
+    args:
+        - `db_path (str)`: sqlite database to read
+        - `repeat (int)`: requests per measurement
+    """
+    engine = sa.create_engine(f"sqlite:///{db_path}")
+    print(
+        f"{'orm':<10} {'path':<5} {'rows':>8} {'time':>9} {'peak':>11} {'objects':>9}"
+    )
+    for orm in ORMS:
+        for name, func in (("orm", orm_json), ("row", row_json)):
+            best, peak, objects, rows = measure(engine, func, orm, repeat)
+            print(
+                f"{orm.__name__:<10} {name:<5} {rows:>8} {best:>8.3f}s "
+                f"{peak:>7.0f} KiB {objects:>9}"
+            )
+
+
+if __name__ == "__main__":
+    run(main, __doc__, repeat=5)
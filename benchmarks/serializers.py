@@ -0,0 +1,111 @@
+"""Benchmarks `as_json` for every orm class against an existing database.
+
+compares the generated per class serializers with the old path \
+    (copy `__dict__`, `json.dumps` every value to check it), \
+    and checks that both produce the same json. \
+    subclass `as_json` overrides run in both.
+
+usage: `python -m benchmarks.serializers --db MBTA_GTFS.db --rows 10000`
+"""
+
+import json
+import os
+import sys
+import time
+import typing as t
+
+import sqlalchemy as sa
+from sqlalchemy import orm as saorm
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+import gtfs_orms.base
+from benchmarks._common import run
+from gtfs_orms import Base
+
+# pylint: disable=protected-access
+fast_serializer = gtfs_orms.base._serializer
+
+
+def legacy_serializer(
+    cls: t.Type[Base],  # pylint: disable=unused-argument
+) -> t.Callable[[Base, t.Iterable[str]], dict[str, t.Any]]:
+    """the old json path: copy `__dict__` and `json.dumps` every value to check it.
+
+    args:
+        - `cls (Type[Base])`: orm class (unused)\n
+    returns:
+        - `Callable[[Base, Iterable[str]], dict[str, Any]]`: serializer
+    """
+
+    def _serializable(value: t.Any) -> bool:
+        try:
+            json.dumps(value)
+            return True
+        except TypeError:
+            return False
+
+    def _serialize(obj: Base, include: t.Iterable[str] = ()) -> dict[str, t.Any]:
+        return gtfs_orms.base._add_included(  # pylint: disable=protected-access
+            obj,
+            include,
+            {
+                k: v
+                for k, v in obj.__dict__.items()
+                if not k.startswith("_") and _serializable(v)
+            },
+        )
+
+    return _serialize
+
+
+def timed(func: t.Callable[[], t.Any]) -> tuple[float, t.Any]:
+    """runs a function.
+
+    args:
+        - `func (Callable)`: function to run\n
+    returns:
+        - `tuple[float, Any]`: seconds, result
+    """
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main(db_path: str, rows: int) -> None:
+    """serializes up to `rows` rows of every table, both ways.
+
+    args:
+        - `db_path (str)`: sqlite database to read
+        - `rows (int)`: max rows per table
+    """
+    engine = sa.create_engine(f"sqlite:///{db_path}")
+    print(f"{'orm':<20} {'rows':>8} {'old':>9} {'new':>9} {'speedup':>8}")
+    with saorm.Session(engine) as session:
+        for orm in sorted(Base.__subclasses__(), key=lambda o: o.__name__):
+            try:
+                objs = session.execute(sa.select(orm).limit(rows)).scalars().all()
+            except (sa.exc.DatabaseError, TypeError, ValueError) as error:
+                print(f"{orm.__name__:<20} skipped: {error.__class__.__name__}")
+                continue
+            if not objs:
+                continue
+            for obj in objs:  # load lazy relationships before timing
+                obj.as_json()
+            gtfs_orms.base._serializer = legacy_serializer
+            old, old_json = timed(lambda o=objs: [obj.as_json() for obj in o])
+            gtfs_orms.base._serializer = fast_serializer
+            new, new_json = timed(lambda o=objs: [obj.as_json() for obj in o])
+            same = all(  # `as_json` always sets `timestamp`
+                n | {"timestamp": None} == l | {"timestamp": None}
+                for n, l in zip(new_json, old_json)
+            )
+            print(
+                f"{orm.__name__:<20} {len(objs):>8} {old:>8.3f}s {new:>8.3f}s "
+                f"{old / new if new else 0:>7.1f}x{'' if same else '  MISMATCH'}"
+            )
+
+
+if __name__ == "__main__":
+    run(main, __doc__, rows=10_000)
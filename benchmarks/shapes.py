@@ -0,0 +1,84 @@
+"""Times building every shape's `LineString` from `Shape.polyline` vs `shape_points`.
+
+needs a db imported with `shape_points` (`python app.py -i --shape_points`) \
+    for the `shape_points` side; also reports what each takes on disk \
+    (sqlite's `dbstat`, when it's compiled in). exits with 1 if they disagree.
+
+usage: `python -m benchmarks.shapes --db MBTA_GTFS.db`
+"""
+
+import os
+import sys
+import time
+
+import sqlalchemy as sa
+from shapely.geometry import LineString
+from sqlalchemy import orm as saorm
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from benchmarks._common import run
+from gtfs_orms import Shape
+
+
+def table_bytes(engine: sa.Engine, *tables: str) -> int | None:
+    """bytes the tables (and their indexes) take, or `None` without `dbstat`"""
+    with engine.connect() as connection:
+        try:
+            return connection.execute(
+                sa.text(
+                    "SELECT sum(pgsize) FROM dbstat WHERE name IN "
+                    "(SELECT name FROM sqlite_master WHERE tbl_name IN :tables)"
+                ).bindparams(sa.bindparam("tables", expanding=True)),
+                {"tables": list(tables)},
+            ).scalar()
+        except sa.exc.OperationalError:
+            return None
+
+
+def main(db_path: str) -> int:
+    """builds every shape from its polyline, then from its points.
+
+    args:
+        - `db_path (str)`: sqlite database to read\n
+    returns:
+        - `int`: exit code, 1 if the linestrings differ
+    """
+    engine = sa.create_engine(f"sqlite:///{db_path}")
+    saorm.configure_mappers()  # not part of either timing
+    lines = {}
+    for name in ("polyline", "shape_points"):
+        with saorm.Session(engine) as session:
+            start = time.perf_counter()
+            if name == "polyline":
+                shapes = session.execute(sa.select(Shape)).scalars()
+                lines[name] = {s.shape_id: s.as_linestring() for s in shapes}
+            else:  # what `Shape.as_linestring` did before polylines
+                shapes = session.execute(
+                    sa.select(Shape).options(saorm.selectinload(Shape.shape_points))
+                ).scalars()
+                lines[name] = {
+                    s.shape_id: LineString([p.as_point() for p in s.shape_points])
+                    for s in shapes
+                    if s.shape_points
+                }
+            seconds = time.perf_counter() - start
+        size = table_bytes(engine, "shapes" if name == "polyline" else "shape_points")
+        print(
+            f"{name:<13} {seconds:>8.3f}s {len(lines[name]):>6} shapes "
+            f"{'?' if size is None else f'{size / 1e6:.2f}'}MB"
+        )
+    if not lines["shape_points"]:
+        print("no shape_points: import with --shape_points to compare")
+        return 0
+    return int(
+        any(
+            not line.equals_exact(lines["shape_points"][shape_id], 1e-6)
+            for shape_id, line in lines["polyline"].items()
+        )
+    )
+
+
+if __name__ == "__main__":
+    run(main, __doc__)
@@ -0,0 +1,67 @@
+"""Times building every key's vehicle snapshot from sqlite vs from `SharedVehicles`.
+
+the sqlite side is what a process without the shared file does on each generation \
+    (`Feed.get_vehicle_features` + encoding); the shared side is what a follower does \
+    (`SharedVehicles.read` + `unpack_vehicles` + `VehicleSnapshot.from_encoded`). \
+    exits with 1 if the snapshots differ.
+
+usage: `python -m benchmarks.shared_vehicles --db MBTA_GTFS.db --rounds 20`
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from benchmarks._common import load_keys_dict, open_feed, run
+from gtfs_loader import SharedVehicles, VehicleSnapshot, VehicleSnapshots
+from gtfs_loader.shared_vehicles import pack_vehicles, unpack_vehicles
+
+
+def main(db_path: str, rounds: int) -> int:
+    """builds the snapshots `rounds` times each way.
+
+    args:
+        - `db_path (str)`: sqlite database to read
+        - `rounds (int)`: times to build each way\n
+    returns:
+        - `int`: exit code, 1 if the snapshots differ
+    """
+    keys_dict, feed = load_keys_dict(), open_feed(db_path)
+    include = VehicleSnapshots.SHARED_VEHICLE_INCLUDE
+    path = os.path.join(tempfile.mkdtemp(), "benchmark.vehicles")
+    writer, reader = SharedVehicles(path, writable=True), SharedVehicles(path)
+    snapshots: dict[str, dict[str, str]] = {}
+
+    start = time.perf_counter()
+    for generation in range(rounds):
+        features = feed.get_vehicle_features(keys_dict, *include)
+        snapshots["sqlite"] = {
+            key: VehicleSnapshot(generation, key_features).dumps()
+            for key, key_features in features.items()
+        }
+    print(f"sqlite {(time.perf_counter() - start) / rounds * 1e3:>9.2f}ms")
+    writer.write(rounds - 1, payload := pack_vehicles(features))
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        _, generation, shared = reader.read()
+        snapshots["shared"] = {
+            key: VehicleSnapshot.from_encoded(generation, vehicles).dumps()
+            for key, vehicles in unpack_vehicles(shared).items()
+        }
+    print(
+        f"shared {(time.perf_counter() - start) / rounds * 1e3:>9.2f}ms "
+        f"{len(payload) / 1e3:.1f}kB"
+    )
+    reader.close()
+    writer.close()
+    os.remove(path)
+    return int(snapshots["sqlite"] != snapshots["shared"])
+
+
+if __name__ == "__main__":
+    run(main, __doc__, rounds=20)
@@ -0,0 +1,89 @@
+"""Checks that stream subscribers get a vehicle delta after each realtime import.
+
+subscribes to every key's vehicles with `VehicleSnapshots.SHARED_VEHICLE_INCLUDE` \
+    (what static/js/map.js streams) on an ingestor and a follower, moves every \
+    vehicle in the database, and publishes the new generation the way \
+    `FeedLoader.import_realtime` does, which stores it as a shared snapshot \
+    before pushing. exits with 1 if a subscriber misses the delta.
+
+usage: `python -m benchmarks.stream_deltas --db MBTA_GTFS.db`
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from benchmarks._common import load_keys_dict, run
+from gtfs_loader import FeedLoader, VehicleSnapshots, VehicleStream
+
+
+def next_event(stream: VehicleStream, keepalives: int = 3) -> tuple[str, int]:
+    """the next event a stream sends and its feature count, \
+        or `("keepalive", 0)` after `keepalives` keepalives in a row"""
+    for message in stream:
+        if not message.startswith(":"):
+            fields = dict(line.split(": ", 1) for line in message.splitlines() if line)
+            return fields["event"], len(json.loads(fields["data"])["features"])
+        if (keepalives := keepalives - 1) <= 0:
+            break
+    return "keepalive", 0
+
+
+def main(db_path: str) -> int:
+    """subscribes, imports, publishes and follows.
+
+    args:
+        - `db_path (str)`: sqlite database to copy\n
+    returns:
+        - `int`: exit code, 1 if a subscriber misses a delta
+    """
+    keys_dict = load_keys_dict()
+    db_path = os.path.abspath(db_path)
+    os.chdir(tempfile.mkdtemp())  # `Feed` opens <cwd>/<name>.db
+    shutil.copy(db_path, "stream.db")
+    ingestor, follower = (
+        FeedLoader(
+            "https://cdn.mbta.com/MBTA_GTFS.zip", "", keys_dict, gtfs_name="stream"
+        )
+        for _ in range(2)
+    )
+    ingestor.acquire_ingest_lock()
+    ingestor.publish_generation()
+    follower.follow_ingestor()
+    streams = {
+        (name, key): feed_loader.snapshots.stream(
+            key, *VehicleSnapshots.SHARED_VEHICLE_INCLUDE, keepalive=1
+        )
+        for name, feed_loader in (("ingestor", ingestor), ("follower", follower))
+        for key in keys_dict
+    }
+    vehicles = {k: next_event(s)[1] for k, s in streams.items()}
+
+    with sqlite3.connect("stream.db") as connection:  # the realtime import
+        connection.execute("UPDATE vehicles SET latitude = latitude + 0.001")
+    ingestor.generation += 1
+    start = time.perf_counter()
+    ingestor.publish_generation()
+    follower.follow_ingestor()
+    elapsed = time.perf_counter() - start
+    missed = 0
+    for (name, key), stream in streams.items():
+        event, changed = next_event(stream)
+        print(f"{name:<8} {key:<16} {event} {changed}/{vehicles[name, key]}")
+        missed += event != "delta" or changed != vehicles[name, key]
+        stream.close()
+    print(f"published and followed in {elapsed * 1e3:.2f}ms")
+    ingestor.stop(full=True)
+    follower.stop(full=True)
+    return int(missed > 0 or not any(vehicles.values()))
+
+
+if __name__ == "__main__":
+    run(main, __doc__)
@@ -0,0 +1,129 @@
+"""Times `Timetable` lookups against the sql they replace.
+
+builds the timetable from the db into a temp file, then runs \
+    "departures at a stop between two times" and "stops of a trip" \
+    for random stops/trips on the mapped arrays and in sqlite. \
+    exits with 1 if any result differs.
+
+usage: `python -m benchmarks.timetable --db MBTA_GTFS.db --lookups 500`
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+import pandas as pd
+import sqlalchemy as sa
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+from benchmarks._common import run
+from gtfs_loader import Query, Timetable
+from gtfs_orms import StopTime, Trip
+
+WINDOW = 3600  # seconds of departures per lookup
+DEPARTURES_QUERY = (
+    sa.select(
+        StopTime.trip_id,
+        Trip.route_id,
+        Trip.direction_id,
+        StopTime.stop_sequence,
+        StopTime.departure_seconds,
+        sa.func.coalesce(
+            sa.func.nullif(StopTime.stop_headsign, ""), Trip.trip_headsign, ""
+        ),
+    )
+    .join(Trip, StopTime.trip_id == Trip.trip_id)
+    .where(
+        StopTime.stop_id == sa.bindparam("stop_id"),
+        StopTime.departure_seconds.between(sa.bindparam("start"), sa.bindparam("end")),
+        sa.func.coalesce(StopTime.pickup_type, "0") != "1",
+    )
+    .order_by(StopTime.departure_seconds, StopTime.trip_id)
+)
+STOPS_QUERY = (
+    sa.select(
+        StopTime.stop_id,
+        StopTime.stop_sequence,
+        StopTime.arrival_seconds,
+        StopTime.departure_seconds,
+    )
+    .where(StopTime.trip_id == sa.bindparam("trip_id"))
+    .order_by(StopTime.stop_sequence)
+)
+
+
+def main(db_path: str, lookups: int, seed: int) -> int:
+    """builds a timetable, then compares `lookups` of each kind with sqlite.
+
+    args:
+        - `db_path (str)`: sqlite database to read
+        - `lookups (int)`: lookups of each kind
+        - `seed (int)`: random seed for the stops/trips/times looked up\n
+    returns:
+        - `int`: exit code, 1 if a result differs
+    """
+    engine = sa.create_engine(f"sqlite:///{db_path}")
+    path = os.path.join(tempfile.mkdtemp(), "benchmark.timetable")
+    start = time.perf_counter()
+    Timetable.write(path, pd.read_sql(Query.get_timetable_query(), engine))
+    print(
+        f"build {time.perf_counter() - start:>8.3f}s {os.path.getsize(path) / 1e6:.2f}MB"
+    )
+    start = time.perf_counter()
+    timetable = Timetable(path)
+    print(f"map   {time.perf_counter() - start:>8.3f}s {timetable}")
+
+    rand = random.Random(seed)
+    stops = rand.choices(timetable.stops.ids, k=lookups)
+    trips = rand.choices(timetable.trips.ids, k=lookups)
+    times = [rand.randrange(4 * 3600, 24 * 3600) for _ in range(lookups)]
+    results: dict[str, list] = {}
+    with engine.connect() as connection:
+        for name, func in (
+            (
+                "departures sql",
+                lambda s, t0: [
+                    tuple(r)
+                    for r in connection.execute(
+                        DEPARTURES_QUERY,
+                        {"stop_id": s, "start": t0, "end": t0 + WINDOW},
+                    )
+                ],
+            ),
+            (
+                "departures np",
+                lambda s, t0: sorted(
+                    timetable.departures(s, t0, t0 + WINDOW), key=lambda r: (r[4], r[0])
+                ),
+            ),
+        ):
+            start = time.perf_counter()
+            results[name] = [func(s, t0) for s, t0 in zip(stops, times)]
+            print(f"{name:<15} {(time.perf_counter() - start) / lookups * 1e6:>9.1f}us")
+        for name, func in (
+            (
+                "stops sql",
+                lambda trip: [
+                    tuple(-1 if v is None else v for v in r)
+                    for r in connection.execute(STOPS_QUERY, {"trip_id": trip})
+                ],
+            ),
+            ("stops np", timetable.stops_of_trip),
+        ):
+            start = time.perf_counter()
+            results[name] = [func(trip) for trip in trips]
+            print(f"{name:<15} {(time.perf_counter() - start) / lookups * 1e6:>9.1f}us")
+    del timetable
+    os.remove(path)
+    return int(
+        results["departures sql"] != results["departures np"]
+        or results["stops sql"] != results["stops np"]
+    )
+
+
+if __name__ == "__main__":
+    run(main, __doc__, lookups=500, seed=0)
@@ -0,0 +1,98 @@
+"""Times and measures building every key's vehicle features from `Vehicle` orms \
+    vs from `VehicleRecord`s.
+
+the orm side loads each key's vehicles and lazy loads their relationships per vehicle \
+    (what `Feed.get_vehicle_features` did before records); the record side is \
+    `Feed.get_vehicle_features`. memory is the `tracemalloc` peak of one build. \
+    exits with 1 if the features differ.
+
+usage: `python -m benchmarks.vehicle_records --db MBTA_GTFS.db --rounds 20`
+"""
+
+import json
+import os
+import sys
+import time
+import tracemalloc
+import typing as t
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# pylint: disable=wrong-import-position
+import geojson as gj
+
+from benchmarks._common import load_keys_dict, open_feed, run
+from gtfs_loader import Feed, Query, VehicleSnapshots
+from gtfs_orms import Vehicle
+from helper_functions import json_dumps
+
+
+def orm_features(
+    feed: Feed, keys_dict: dict[str, list[str]], *include: str
+) -> dict[str, list[gj.Feature]]:
+    """every key's vehicle features from `Vehicle` orms, in a new session"""
+    session = feed.scoped_session()
+    features: dict[str, gj.Feature] = {}
+    keys: dict[str, list[gj.Feature]] = {}
+    for key, route_types in keys_dict.items():
+        if key == "ferry":
+            keys[key] = []
+            continue
+        vehicles: list[Vehicle] = (
+            session.execute(
+                Query(*route_types).get_vehicles_query(
+                    *(feed.SL_ROUTES if key == "rapid_transit" else ())
+                )
+            )
+            .scalars()
+            .all()
+        )
+        for vehicle in vehicles:
+            if vehicle.vehicle_id not in features:
+                features[vehicle.vehicle_id] = vehicle.as_feature(*include)
+        keys[key] = [features[vehicle.vehicle_id] for vehicle in vehicles]
+    feed.scoped_session.remove()
+    return keys
+
+
+def _comparable(features: dict[str, list[gj.Feature]]) -> dict[str, t.Any]:
+    """features without the serialization time of `trip_properties`"""
+    decoded = json.loads(json_dumps(features))
+    for key_features in decoded.values():
+        for feature in key_features:
+            for trip_property in feature["properties"].get("trip_properties", []):
+                trip_property.pop("timestamp", None)
+    return decoded
+
+
+def main(db_path: str, rounds: int) -> int:
+    """builds the features `rounds` times each way.
+
+    args:
+        - `db_path (str)`: sqlite database to read
+        - `rounds (int)`: times to build each way\n
+    returns:
+        - `int`: exit code, 1 if the features differ
+    """
+    keys_dict, feed = load_keys_dict(), open_feed(db_path)
+    include = VehicleSnapshots.SHARED_VEHICLE_INCLUDE
+    builds: dict[str, t.Callable[[], dict[str, list[gj.Feature]]]] = {
+        "orm": lambda: orm_features(feed, keys_dict, *include),
+        "records": lambda: feed.get_vehicle_features(keys_dict, *include),
+    }
+    features: dict[str, dict[str, t.Any]] = {}
+    for name, build in builds.items():
+        start = time.perf_counter()
+        for _ in range(rounds):
+            build()
+        elapsed = (time.perf_counter() - start) / rounds
+        tracemalloc.start()
+        features[name] = _comparable(build())
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{name:<8} {elapsed * 1e3:>9.2f}ms {peak / 1e6:>8.2f}MB peak")
+    return int(features["orm"] != features["records"])
+
+
+if __name__ == "__main__":
+    run(main, __doc__, rounds=20)
@@ -0,0 +1,213 @@
+"""Benchmarks `/bus/vehicles` and `/api/vehicle` on a synthetic bus feed.
+
+runs each request with the fast json path (`FastJSONProvider`, type based \
+    `as_json` checks) and with the old one (stdlib provider, `json.dumps` \
+    of every value to check it's serializable) for comparison. \
+    every `/vehicles` request rebuilds the vehicle snapshot.
+
+usage: `python -m benchmarks.vehicles --vehicles 1000 --repeat 5`
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+from flask.json.provider import DefaultJSONProvider
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# app.py reads static/config from, and writes the db to, cwd
+os.chdir(tempfile.mkdtemp())
+os.symlink(os.path.join(ROOT, "static"), "static")
+
+# pylint: disable=wrong-import-position
+import app
+import gtfs_loader.vehicle_snapshot
+import gtfs_orms.base
+from benchmarks._common import run
+from gtfs_orms import Base
+
+INCLUDE = "route,next_stop,stop_time,trip_properties"
+ROUTES = 150
+STOPS = 20
+
+
+def build(vehicles: int) -> None:
+    """fills the app's database with a bus feed of `vehicles` vehicles.
+
+    args:
+        - `vehicles (int)`: number of vehicles
+    """
+    engine = app.FEED_LOADER.engine
+    Base.metadata.create_all(engine)
+    now = int(time.time())
+    tables = {
+        "routes": pd.DataFrame(
+            {
+                "route_id": str(r),
+                "agency_id": "1",
+                "route_short_name": str(r),
+                "route_desc": "Local Bus",
+                "route_type": "3",
+                "route_color": "FFC72C",
+                "route_text_color": "000000",
+                "route_sort_order": r,
+                "route_fare_class": "Local Bus",
+                "network_id": "local_bus",
+            }
+            for r in range(ROUTES)
+        ),
+        "stops": pd.DataFrame(
+            {
+                "stop_id": f"s{s}",
+                "stop_name": f"Stop {s}",
+                "location_type": "0",
+                "wheelchair_boarding": "1",
+                "municipality": "Boston",
+                "stop_lat": 42.3 + s * 0.01,
+                "stop_lon": -71.1 + s * 0.01,
+            }
+            for s in range(STOPS)
+        ),
+        "trips": pd.DataFrame(
+            {
+                "trip_id": f"t{v}",
+                "route_id": str(v % ROUTES),
+                "service_id": "s",
+                "trip_headsign": f"Stop {STOPS - 1}",
+                "direction_id": v % 2,
+                "shape_id": "sh",
+                "wheelchair_accessible": 1,
+                "route_pattern_id": "rp",
+                "bikes_allowed": 1,
+            }
+            for v in range(vehicles)
+        ),
+        "stop_times": pd.DataFrame(
+            {
+                "trip_id": f"t{v}",
+                "stop_id": f"s{s}",
+                "stop_sequence": s,
+                "arrival_time": f"{12 + s // 6:02}:{s % 6 * 10:02}:00",
+                "departure_time": f"{12 + s // 6:02}:{s % 6 * 10:02}:00",
+                "pickup_type": "0",
+                "drop_off_type": "0",
+            }
+            for v in range(vehicles)
+            for s in range(STOPS)
+        ),
+        "vehicles": pd.DataFrame(
+            {
+                "vehicle_id": f"y{v}",
+                "trip_id": f"t{v}",
+                "route_id": str(v % ROUTES),
+                "direction_id": v % 2,
+                "latitude": 42.2 + (v % 100) * 0.003,
+                "longitude": -71.2 + (v // 100) * 0.01,
+                "bearing": v % 360,
+                "current_stop_sequence": v % STOPS,
+                "current_status": "IN_TRANSIT_TO",
+                "timestamp": now,
+                "stop_id": f"s{v % STOPS}",
+                "label": str(v),
+                "speed": 8.5,
+            }
+            for v in range(vehicles)
+        ),
+        "predictions": pd.DataFrame(
+            {
+                "index": v * STOPS + s,
+                "prediction_id": f"p{v}-{s}",
+                "trip_id": f"t{v}",
+                "stop_id": f"s{s}",
+                "stop_sequence": s,
+                "route_id": str(v % ROUTES),
+                "vehicle_id": f"y{v}",
+                "departure_time": now + s * 60,
+            }
+            for v in range(vehicles)
+            for s in range(v % STOPS, STOPS)
+        ),
+    }
+    with engine.connect() as conn:  # agencies/calendars/shapes aren't needed
+        conn.exec_driver_sql("PRAGMA foreign_keys=OFF")
+        for table, frame in tables.items():
+            frame.to_sql(table, conn, if_exists="append", index=False)
+        conn.commit()
+
+
+def _trial_encode(obj) -> bool:
+    """the old `_is_json_searializable`: encode it and see"""
+    try:
+        json.dumps(obj)
+        return True
+    except TypeError:
+        return False
+
+
+def use_fast_path(fast: bool, *apps) -> None:
+    """switches between the fast json path and the old one.
+
+    args:
+        - `fast (bool)`: use the fast path
+        - `*apps (Flask)`: apps to set the json provider on
+    """
+    provider = app.FastJSONProvider if fast else DefaultJSONProvider
+    for _app in apps:
+        _app.json = provider(_app)
+    gtfs_orms.base._is_json_searializable = (  # pylint: disable=protected-access
+        fast_checks if fast else _trial_encode
+    )
+    gtfs_orms.base._json_cols = (  # pylint: disable=protected-access
+        fast_cols if fast else lambda cls: frozenset()
+    )
+    gtfs_loader.vehicle_snapshot.json_dumps = (
+        fast_dumps
+        if fast
+        else lambda obj: json.dumps(obj, separators=(",", ":")).encode()
+    )
+
+
+# pylint: disable=protected-access
+fast_checks = gtfs_orms.base._is_json_searializable
+fast_cols = gtfs_orms.base._json_cols
+fast_dumps = gtfs_loader.vehicle_snapshot.json_dumps
+
+
+def main(vehicles: int, repeat: int) -> None:
+    """builds the database and runs the benchmarks.
+
+    args:
+        - `vehicles (int)`: number of vehicles
+        - `repeat (int)`: requests per measurement
+    """
+    build(vehicles)
+    app.FEED_LOADER.import_and_run = lambda **kwargs: None  # no network
+    key_app = app.create_key_app("bus")
+    main_app = app.create_main_app()
+    urls = {
+        key_app: f"/vehicles?include={INCLUDE}",
+        main_app: "/api/vehicle?include=route,trip",
+    }
+    for fast in (False, True):
+        use_fast_path(fast, key_app, main_app)
+        for _app, url in urls.items():
+            client = _app.test_client()
+            timings = []
+            for _ in range(repeat):
+                app.FEED_LOADER.generation += 1  # force a snapshot rebuild
+                start = time.perf_counter()
+                response = client.get(url)
+                timings.append(time.perf_counter() - start)
+            print(
+                f"{'fast' if fast else 'old':<5} {url:<64} "
+                f"min {min(timings):7.3f}s  mean {sum(timings) / repeat:7.3f}s  "
+                f"{len(response.data) / 1024:8.0f} KiB"
+            )
+
+
+if __name__ == "__main__":
+    run(main, __doc__, db=False, vehicles=1000, repeat=5)
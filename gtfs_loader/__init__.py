@@ -1,8 +1,16 @@
-"""Init file for gtfs_loader package.
-
-This package loads GTFS data into a database and provides a Flask app to
-display the data."""
-
-from .feed import Feed
-from .feed_loader import FeedLoader
-from .query import Query
+"""Init file for gtfs_loader package.
+
+This package loads GTFS data into a database and provides a Flask app to
+display the data."""
+
+from .departures import DepartureBoard
+from .feed import Feed
+from .feed_cache import FeedCache
+from .feed_loader import FeedLoader
+from .ingest_election import IngestElection
+from .orm_filter import compile_filters, compile_query, next_cursor
+from .query import Query
+from .shared_vehicles import SharedVehicles
+from .timetable import Timetable
+from .vehicle_snapshot import SpatialGrid, VehicleSnapshot, parse_bbox
+from .vehicle_snapshots import VehicleSnapshots, VehicleStream
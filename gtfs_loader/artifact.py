@@ -0,0 +1,237 @@
+"""Publishes and fetches prebuilt, checksummed artifacts (database, timetable, geojsons), \
+    so web nodes can start without importing the feed themselves.
+
+a store is a local directory or a url serving one: \
+    `<version>.tar.gz`, its manifest `<version>.json` \
+    and `latest.json`, a copy of the newest manifest.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tarfile
+import tempfile
+import typing as t
+from datetime import datetime
+
+import requests as req
+
+LATEST = "latest.json"
+CHUNK = 1 << 20
+
+
+def _is_url(store: str) -> bool:
+    """if `store` is a url rather than a directory"""
+    return store.startswith(("http://", "https://"))
+
+
+def _write_json(path: str, data: dict[str, t.Any]) -> None:
+    """writes json to `path` atomically"""
+    with open(f"{path}.tmp", "w", -1, "utf-8") as file:
+        json.dump(data, file, indent=2)
+    os.replace(f"{path}.tmp", path)
+
+
+def read_manifest(store: str, version: str | None = None) -> dict[str, t.Any]:
+    """Reads the manifest of an artifact.
+
+    args:
+        - `store (str)`: directory or url
+        - `version (str, optional)`: version. Defaults to None (latest).\n
+    returns:
+        - `dict[str, Any]`: manifest, see `publish_artifact`
+    """
+    name = f"{version}.json" if version else LATEST
+    if _is_url(store):
+        response = req.get(f"{store.rstrip('/')}/{name}", timeout=10)
+        response.raise_for_status()
+        return response.json()
+    with open(os.path.join(store, name), "r", -1, "utf-8") as file:
+        return json.load(file)
+
+
+def publish_artifact(
+    store: str, version: str, files: dict[str, str]
+) -> dict[str, t.Any]:
+    """Tars files into `<store>/<version>.tar.gz` and writes its manifest, \
+        then points `latest.json` at it.
+
+    args:
+        - `store (str)`: directory to publish to
+        - `version (str)`: version of the artifact
+        - `files (dict[str, str])`: name in the artifact -> file or directory to add\n
+    returns:
+        - `dict[str, Any]`: manifest: `version`, `file`, `sha256`, `size`, `files`, `created`
+    """
+    os.makedirs(store, exist_ok=True)
+    name = f"{version}.tar.gz"
+    path = os.path.join(store, name)
+    with tarfile.open(f"{path}.tmp", "w:gz") as tar:
+        for arcname, file_path in files.items():
+            tar.add(file_path, arcname)
+    digest = hashlib.sha256()
+    with open(f"{path}.tmp", "rb") as file:
+        while chunk := file.read(CHUNK):
+            digest.update(chunk)
+    os.replace(f"{path}.tmp", path)
+    manifest = {
+        "version": version,
+        "file": name,
+        "sha256": digest.hexdigest(),
+        "size": os.path.getsize(path),
+        "files": list(files),
+        "created": datetime.now().isoformat(timespec="seconds"),
+    }
+    _write_json(os.path.join(store, f"{version}.json"), manifest)
+    _write_json(os.path.join(store, LATEST), manifest)
+    logging.info("Published %s (%s bytes) to %s", name, manifest["size"], store)
+    return manifest
+
+
+def _download(store: str, manifest: dict[str, t.Any], archive: str) -> None:
+    """copies the artifact of `manifest` to `archive`, verifying its checksum and size"""
+    digest = hashlib.sha256()
+    with open(archive, "wb") as file:
+        if _is_url(store):
+            with req.get(
+                f"{store.rstrip('/')}/{manifest['file']}", timeout=10, stream=True
+            ) as response:
+                response.raise_for_status()
+                for chunk in response.iter_content(CHUNK):
+                    digest.update(chunk)
+                    file.write(chunk)
+        else:
+            with open(os.path.join(store, manifest["file"]), "rb") as source:
+                while chunk := source.read(CHUNK):
+                    digest.update(chunk)
+                    file.write(chunk)
+    if digest.hexdigest() != manifest["sha256"]:
+        raise ValueError(f"{manifest['file']}: checksum mismatch")
+    if os.path.getsize(archive) != manifest["size"]:
+        raise ValueError(f"{manifest['file']}: size mismatch")
+
+
+def _extract(archive: str, extracted: str) -> None:
+    """extracts `archive` into `extracted`, refusing members \
+        with absolute paths, `..` or links out of it"""
+    with tarfile.open(archive, "r:gz") as tar:
+        for member in tar.getmembers():
+            names = [member.name]
+            if member.issym():  # relative to the link's directory
+                names.append(
+                    os.path.join(os.path.dirname(member.name), member.linkname)
+                )
+            elif member.islnk():
+                names.append(member.linkname)
+            for name in names:
+                if os.path.isabs(name) or ".." in name.replace("\\", "/").split("/"):
+                    raise ValueError(
+                        f"{os.path.basename(archive)}: unsafe member {member.name!r}"
+                    )
+        tar.extractall(extracted, filter="data")
+
+
+def _move(source: str, dest: str) -> None:
+    """moves a file or directory of files over `dest`, replacing each file atomically"""
+    if not os.path.isdir(source):
+        os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+        shutil.move(source, f"{dest}.tmp")
+        os.replace(f"{dest}.tmp", dest)
+        return
+    for root, _, names in os.walk(source):
+        directory = os.path.join(dest, os.path.relpath(root, source))
+        os.makedirs(directory, exist_ok=True)
+        for name in names:
+            shutil.move(
+                os.path.join(root, name), os.path.join(directory, f"{name}.tmp")
+            )
+            os.replace(
+                os.path.join(directory, f"{name}.tmp"), os.path.join(directory, name)
+            )
+
+
+def fetch_artifact(
+    store: str, files: dict[str, str], manifest: dict[str, t.Any] | None = None
+) -> dict[str, t.Any]:
+    """Downloads an artifact, verifies its checksum and moves its files into place; \
+        each file is replaced atomically, nothing is replaced if the checksum doesn't match.
+
+    args:
+        - `store (str)`: directory or url
+        - `files (dict[str, str])`: name in the artifact -> file or directory to replace
+        - `manifest (dict[str, Any], optional)`: see `read_manifest`. Defaults to None (latest).\n
+    returns:
+        - `dict[str, Any]`: the manifest
+    raises:
+        - `ValueError`: if the checksum or size doesn't match, a file is missing \
+            or a member would extract outside of the artifact
+    """
+    manifest = manifest or read_manifest(store)
+    with tempfile.TemporaryDirectory() as temp:
+        archive = os.path.join(temp, manifest["file"])
+        _download(store, manifest, archive)
+        extracted = os.path.join(temp, "extracted")
+        _extract(archive, extracted)
+        if missing := [
+            n for n in files if not os.path.exists(os.path.join(extracted, n))
+        ]:
+            raise ValueError(f"{manifest['file']}: missing {missing}")
+        for arcname, dest in files.items():
+            _move(os.path.join(extracted, arcname), dest)
+    logging.info("Fetched %s from %s", manifest["file"], store)
+    return manifest
+
+
+class ArtifactPuller:
+    """Pulls artifacts from a store into local files, remembering the manifest \
+        of the last one pulled so it isn't fetched again.
+
+    Args:
+        - `store (str | None)`: directory or url, see `read_manifest`; None to import instead
+        - `manifest_path (str)`: where to keep the manifest of the last pull
+    """
+
+    def __init__(self, store: str | None, manifest_path: str) -> None:
+        self.store = store
+        self.manifest_path = manifest_path
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__}({self.store})>"
+
+    @property
+    def pulled(self) -> dict[str, t.Any] | None:
+        """the manifest of the last artifact pulled, if any"""
+        try:
+            with open(self.manifest_path, "r", -1, "utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def pull(
+        self, files: dict[str, str], store: str | None = None, force: bool = False
+    ) -> dict[str, t.Any] | None:
+        """Fetches the latest artifact's files into place, \
+            unless it's the one last pulled.
+
+        args:
+            - `files (dict[str, str])`: name in the artifact -> file or directory \
+                to replace, see `fetch_artifact`
+            - `store (str, optional)`: directory or url. Defaults to `self.store`.
+            - `force (bool, optional)`: fetch it even if it's the one last pulled, \
+                e.g. when its files are missing. Defaults to False.\n
+        returns:
+            - `dict[str, Any] | None`: the manifest if it was fetched, `None` if current
+        raises:
+            - `OSError`, `ValueError`, `RequestException`, `TarError`: \
+                see `read_manifest` and `fetch_artifact`
+        """
+        store = store or self.store
+        manifest = read_manifest(store)
+        if not force and (self.pulled or {}).get("sha256") == manifest["sha256"]:
+            logging.info("Artifact %s is current", manifest["version"])
+            return None
+        fetch_artifact(store, files, manifest)
+        _write_json(self.manifest_path, manifest)
+        return manifest
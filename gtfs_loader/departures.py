@@ -0,0 +1,148 @@
+"""Builds the departures board of a stop on the `Timetable`."""
+
+import math
+import typing as t
+from datetime import datetime
+
+from sqlalchemy import orm as saorm
+
+from .query import Query
+from .timetable import Timetable
+
+ServiceDays = t.Iterable[tuple[datetime, t.Collection[str]]]
+
+# the columns of `Query.get_departures_query`, in order
+DEPARTURE_COLUMNS = (
+    "route_id",
+    "direction_id",
+    "trip_id",
+    "stop_id",
+    "stop_sequence",
+    "platform_code",
+    "headsign",
+    "scheduled_timestamp",
+    "predicted_timestamp",
+    "departure_timestamp",
+    "delay",
+)
+
+
+class DepartureBoard:
+    """The departures from a stop that `Query.get_departures_query` returns, \
+        with the schedule read from a `Timetable`: sqlite is only asked for \
+        the stops (a parent station's children) and their predictions.
+
+    Args:
+        - `session (Session)`: session to read the stops and predictions with
+        - `timetable (Timetable)`: the schedule
+        - `stop_id (str)`: stop or parent station
+        - `now (float)`: unix timestamp to look ahead of
+    """
+
+    __slots__ = ("timetable", "now", "platforms", "predictions")
+
+    def __init__(
+        self, session: saorm.Session, timetable: Timetable, stop_id: str, now: float
+    ) -> None:
+        self.timetable = timetable
+        self.now = now
+        self.platforms: dict[str, str | None] = dict(
+            session.execute(Query.get_departure_stops_query(stop_id)).all()
+        )
+        # joined like the sql: a departure per prediction of the stop time
+        self.predictions: dict[tuple[str, str], list[dict[str, t.Any]]] = {}
+        for prediction in session.execute(
+            Query.get_stop_predictions_query(list(self.platforms))
+        ).mappings():
+            self.predictions.setdefault(
+                (prediction["trip_id"], prediction["stop_id"]), []
+            ).append(dict(prediction))
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__}({len(self.platforms)} stops, "
+            f"{len(self.predictions)} predictions)>"
+        )
+
+    def _scheduled(
+        self, stop_id: str, service_date: datetime, service_ids: t.Collection[str]
+    ) -> t.Iterator[dict[str, t.Any]]:
+        """yields a stop's scheduled departures of a service day, \
+            at or after `now` once predicted (late trips are looked for an hour back)"""
+        unix_time = service_date.timestamp()
+        for (
+            trip_id,
+            route_id,
+            direction_id,
+            sequence,
+            seconds,
+            headsign,
+        ) in self.timetable.departures(
+            stop_id,
+            math.ceil(self.now - unix_time - 3600),
+            service_ids=service_ids,
+        ):
+            scheduled = seconds + unix_time
+            for prediction in self.predictions.get((trip_id, stop_id)) or [{}]:
+                predicted = prediction.get("predicted_timestamp")
+                departure = scheduled if predicted is None else predicted
+                if departure < self.now:
+                    continue
+                yield {
+                    "route_id": route_id,
+                    "direction_id": direction_id,
+                    "trip_id": trip_id,
+                    "stop_id": stop_id,
+                    "stop_sequence": sequence,
+                    "platform_code": self.platforms[stop_id],
+                    "headsign": headsign,
+                    "scheduled_timestamp": scheduled,
+                    "predicted_timestamp": predicted,
+                    "departure_timestamp": departure,
+                    "delay": None if predicted is None else predicted - scheduled,
+                }
+
+    def _added(self) -> t.Iterator[dict[str, t.Any]]:
+        """yields the predictions of trips that aren't scheduled at their stop \
+            (e.g. added trips) at or after `now`"""
+        for (trip_id, stop_id), predictions in self.predictions.items():
+            if stop_id in {s[0] for s in self.timetable.stops_of_trip(trip_id)}:
+                continue
+            for prediction in predictions:
+                predicted = prediction["predicted_timestamp"]
+                if (predicted or 0) >= self.now:
+                    yield prediction | {
+                        "platform_code": self.platforms[stop_id],
+                        "scheduled_timestamp": None,
+                        "departure_timestamp": predicted,
+                        "delay": None,
+                    }
+
+    def departures(
+        self, service_days: ServiceDays, limit: int = 3
+    ) -> list[dict[str, t.Any]]:
+        """Returns the next departures per route/direction.
+
+        args:
+            - `service_days (Iterable[tuple[datetime, Collection[str]]])`: \
+                service date and its active service_ids, \
+                see `ServiceCalendar.service_ids`
+            - `limit (int, optional)`: departures per route/direction. Defaults to 3.\n
+        returns:
+            - `list[dict[str, Any]]`: departures, soonest first.
+        """
+        departures = list(self._added())
+        for service_date, service_ids in service_days:
+            for stop_id in self.platforms:
+                departures.extend(self._scheduled(stop_id, service_date, service_ids))
+        ranked: dict[tuple[str, int], list[dict[str, t.Any]]] = {}
+        for departure in sorted(departures, key=lambda d: d["departure_timestamp"]):
+            group = ranked.setdefault(
+                (departure["route_id"], departure["direction_id"]), []
+            )
+            if len(group) < limit:
+                group.append({k: departure[k] for k in DEPARTURE_COLUMNS})
+        return sorted(
+            (d for group in ranked.values() for d in group),
+            key=lambda d: d["departure_timestamp"],
+        )
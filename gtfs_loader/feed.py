@@ -1,570 +1,922 @@
-"""Feed Object for GTFS Loader"""
-
-# pylint: disable=unused-wildcard-import
-# pylint: disable=wildcard-import
-# pylint: disable=unused-argument
-# pylint: disable=too-many-instance-attributes
-# pylint: disable=line-too-long
-# pylint: disable=too-many-locals
-# pylint: disable=too-many-branches
-import io
-import logging
-import os
-import shutil
-import sqlite3
-import tempfile
-import textwrap
-import time
-import typing as t
-from datetime import datetime
-from zipfile import ZipFile
-
-import asteval
-import geojson as gj
-import pandas as pd
-import pandas.core.generic as pdcg
-import requests as req
-import sqlalchemy as sa
-import timeout_function_decorator
-from sqlalchemy import event, exc
-from sqlalchemy import orm as saorm
-
-from gtfs_orms import *
-from helper_functions import removes_session, timeit
-
-from .query import Query
-
-
-class Feed:
-    """Loads GTFS data into a route_type specific SQLite database. \
-        This class also contains methods to query the database. \
-        inherits from Query class, which contains queries. \
-    This class is thread-safe.
-        
-
-    Args:
-        - `url (str)`: url of GTFS feed
-        - `gtfs_name (str, optional)`: name of GTFS feed. Defaults to auto-parsed from url.
-    """
-
-    SL_ROUTES = ("741", "742", "743", "751", "749", "746")
-
-    # note that the order of these tables matters; avoids foreign key errors
-    SCHEDULE_ORMS = (
-        Agency,
-        Calendar,
-        CalendarDate,
-        CalendarAttribute,
-        Stop,
-        Route,
-        ShapePoint,
-        Trip,
-        TripProperty,
-        MultiRouteTrip,
-        StopTime,
-        LinkedDataset,
-        Facility,
-        FacilityProperty,
-        Transfer,
-    )
-
-    REALTIME_ORMS = (Alert, Vehicle, Prediction)
-
-    PARKING_FILE = "parking.json"
-    STOPS_FILE = "stops.json"
-    SHAPES_FILE = "shapes.json"
-
-    @staticmethod
-    def find_orm(name: str) -> t.Type[Base] | None:
-        """returns the `type` of the orm by name
-
-        args:
-            - `name (str)`: name of the orm
-        returns:
-            - `type[Base]`: type of the orm
-        """
-        for cls in Base.__subclasses__():
-            if cls.__name__.lower() == name.lower():
-                return cls
-        return None
-
-    get_orm = find_orm
-
-    @staticmethod
-    @event.listens_for(sa.Engine, "connect")
-    def _on_connect(
-        dbapi_connection: sqlite3.Connection,
-        connection_record: sa.pool.ConnectionPoolEntry,
-    ) -> None:
-        """Sets sqlite pragma for each connection,\
-            automitcally called when a connection is created.
-
-        Args:
-            - `dbapi_connection (sqlite3.Connection)`: connection to sqlite database
-            - `connection_record (ConnectionRecord, optional)`: connection record
-        """
-
-        if not isinstance(dbapi_connection, sqlite3.Connection):
-            logging.warning("db %s is unsupported", dbapi_connection.__class__.__name__)
-            return
-        cursor = dbapi_connection.cursor()
-        for pragma in ["foreign_keys=ON", "auto_vacuum='1'", "shrink_memory"]:
-            try:
-                cursor.execute(f"PRAGMA {pragma}")
-            except sqlite3.OperationalError:
-                logging.warning("PRAGMA %s failed", pragma)
-        cursor.close()
-
-    @staticmethod
-    @event.listens_for(sa.Engine, "close")
-    def _on_close(
-        dbapi_connection: sqlite3.Connection,
-        connection_record: sa.pool.ConnectionPoolEntry,
-    ) -> None:
-        """Sets sqlite pragma on close automatically.
-
-        Args:
-            - `dbapi_connection (sqlite3.Connection)`: connection to sqlite database
-            - `connection_record (ConnectionRecord, optional)`: connection record
-        """
-        if not isinstance(dbapi_connection, sqlite3.Connection):
-            logging.warning("db %s is unsupported", dbapi_connection.__class__.__name__)
-            return
-        cursor = dbapi_connection.cursor()
-        try:
-            cursor.execute("PRAGMA optimize")
-        except sqlite3.OperationalError:
-            logging.warning("PRAGMA optimize failed")
-        cursor.close()
-
-    def _get_session(self, readonly: bool = False, **kwargs) -> saorm.Session:
-        """returns a `Session` from `Feed.scoped_session`.
-
-        wrapper for `sa.scoped_session.__call__(...)`
-
-        args:
-            - `readonly (bool)`: whether the session is readonly
-            - `**kwargs`: keyword arguments to pass to `scoped_session` \n
-        returns:
-            - `Session`: session object
-        """
-
-        session = self.scoped_session(**kwargs)
-        if not readonly:
-            return session
-
-        def _abort(*args, **kwargs) -> None:
-            """abort the flush call to enforce readonly"""
-            logging.warning("readonly session: aborting flush")
-
-        session.flush = _abort
-        return session
-
-    def __init__(self, url: str, gtfs_name: str | None = None) -> None:
-        """
-        Initializes Feed object with url.
-
-        Parses url to get GTFS name and create db path in temp dir.
-
-        Args:
-            - `url (str)`: url of GTFS feed
-            - `gtfs_name (str, optional)`: name of GTFS feed. Defaults to auto-parsed from url.
-        """
-        super().__init__()
-        self.url = url
-        # ------------------------------- Connection/Session Setup ------------------------------- #
-        self.gtfs_name = gtfs_name or url.rsplit("/", maxsplit=1)[-1].split(".")[0]
-        self.zip_path = os.path.join(tempfile.gettempdir(), self.gtfs_name)
-        self.db_path = os.path.join(os.getcwd(), f"{self.gtfs_name}.db")
-        self.engine = sa.create_engine(f"sqlite:///{self.db_path}")
-        self.scoped_session = saorm.scoped_session(
-            saorm.sessionmaker(self.engine, expire_on_commit=False, autoflush=False)
-        )
-
-    def __repr__(self) -> str:
-        return f"<{self.__class__.__name__}({self.url}@{self.gtfs_name}.db)>"
-
-    def __str__(self) -> str:
-        return self.__repr__()
-
-    @timeit
-    def download_gtfs(self, **kwargs) -> None:
-        """Downloads the GTFS feed zip file into a temporary directory.
-
-        args:
-            - `**kwargs`: keyword arguments to pass to `requests.get()`
-        """
-        try:
-            source = req.get(self.url, timeout=10, **kwargs)
-        except req.exceptions.SSLError:
-            source = req.get(self.url, timeout=10, verify=False, **kwargs)
-        if not source.ok:
-            raise req.exceptions.HTTPError(f"download {self.url}: {source.status_code}")
-        with ZipFile(io.BytesIO(source.content)) as zipfile_bytes:
-            zipfile_bytes.extractall(self.zip_path)
-        logging.info("Downloaded zip from %s to %s", self.url, self.zip_path)
-
-    def remove_zip(self) -> None:
-        """Removes the GTFS zip file."""
-        if not os.path.exists(self.zip_path):
-            logging.warning("%s does not exist", self.zip_path)
-            return
-        shutil.rmtree(self.zip_path)
-        logging.info("Removed %s", self.zip_path)
-
-    @timeit
-    def import_gtfs(self, *args, purge: bool = True, **kwargs) -> None:
-        """Dumps GTFS data into a SQLite database.
-
-        Args:
-            - `*args`: args to pass to pd.read_csv
-            - `purge (bool)`: whether to purge the database before loading (default: True)
-            - `**kwargs`: keyword args for pd.read_csv
-        """
-        # ------------------------------- Create Tables ------------------------------- #
-        self.download_gtfs()
-        if purge:
-            Base.metadata.drop_all(self.engine)
-            Base.metadata.create_all(self.engine)
-        # ------------------------------- Dump Data ------------------------------- #
-        for orm in __class__.SCHEDULE_ORMS:
-            with pd.read_csv(
-                os.path.join(self.zip_path, orm.__filename__), *args, **kwargs
-            ) as read:
-                chunk: pd.DataFrame
-                for chunk in read:
-                    if orm.__filename__ == "shapes.txt":
-                        self.to_sql(chunk["shape_id"].drop_duplicates(), Shape)
-                    if hasattr(orm, "index"):  # what if this is chunked? it explodes.
-                        chunk["index"] = chunk.index
-                    self.to_sql(chunk, orm)
-        self.remove_zip()
-        logging.info("Loaded %s", self.gtfs_name)
-
-    @timeit
-    @removes_session
-    def import_realtime(self, orm: t.Type[Alert | Vehicle | Prediction] | str) -> None:
-        """Imports realtime data into the database.
-
-        Args:
-            - `orm (Type[Alert | Vehicle | Prediction] | str)`: realtime ORM.
-        """
-        session = self._get_session(readonly=True)
-        if isinstance(orm, str):
-            orm = __class__.find_orm(orm)
-        if orm not in __class__.REALTIME_ORMS:
-            raise ValueError(f"{orm} is not a realtime ORM")
-        dataset: list[LinkedDataset] = session.execute(
-            Query.get_dataset_query(orm.__realtime_name__)
-        ).one_or_none()
-        if not dataset:
-            return
-        self.to_sql(dataset[0].as_dataframe(), orm, purge=True)
-
-    @timeit
-    @removes_session
-    def purge_and_filter(self, date: datetime) -> None:
-        """Purges and filters the database.
-
-        Args:
-            - `date (datetime)`: date to filter on
-        """
-        session = self._get_session()
-        for stmt in [
-            Query.delete_calendars_query(date),
-            Query.delete_facilities_query("parking-area", "bike-storage"),
-        ]:
-            res: sa.CursorResult = session.execute(stmt)
-            logging.info("Deleted %s rows from %s", res.rowcount, stmt.table.name)
-        session.commit()
-
-    @timeit
-    def export_geojsons(self, key: str, *route_types: str, file_path: str) -> None:
-        """Generates geojsons for stops and shapes.
-
-        Args:
-            - `key (str)`: the type of data to export (RAPID_TRANSIT, BUS, etc.)
-            - `*route_types (str)`: route types to export
-            - `file_path (str)`: path to export files to
-        """
-        # pylint:disable=unspecified-encoding
-        query_obj = Query(*route_types)
-        file_subpath = os.path.join(file_path, key)
-        def_kwargs = {"mode": "w", "encoding": "utf-8"}
-        for path in (file_path, file_subpath):
-            if not os.path.exists(path):
-                os.mkdir(path)
-        file: io.TextIOWrapper
-        with open(os.path.join(file_subpath, self.SHAPES_FILE), **def_kwargs) as file:
-            gj.dump(self.get_shape_features(key, query_obj, "agency"), file)
-            logging.info("Exported %s", file.name)
-        with open(os.path.join(file_subpath, self.PARKING_FILE), **def_kwargs) as file:
-            gj.dump(self.get_parking_features(key, query_obj), file)
-            logging.info("Exported %s", file.name)
-        with open(os.path.join(file_subpath, self.STOPS_FILE), **def_kwargs) as file:
-            gj.dump(
-                self.get_stop_features(key, query_obj, "child_stops", "routes"), file
-            )
-            logging.info("Exported %s", file.name)
-
-    @removes_session
-    def get_stop_features(self, key: str, query_obj: Query, *include: str) -> None:
-        """Generates geojsons for stops and shapes.
-
-        Args:
-            - `key (str)`: the type of data to export (RAPID_TRANSIT, BUS, etc.)
-            - `query_obj (Query)`: Query object
-            - `*include (str)`: other orms to include\n
-        returns:
-            - `FeatureCollection`: stops as FeatureCollection
-        """
-        session = self._get_session(readonly=True)
-        stops: list[tuple[Stop]] = session.execute(query_obj.parent_stops_query).all()
-        if key == "rapid_transit":
-            stops += session.execute(Query("3").parent_stops_query).all()
-        if "4" in query_obj.route_types:
-            stops += session.execute(
-                query_obj.select(Stop).where(Stop.vehicle_type == "4")
-            ).all()
-        return gj.FeatureCollection([s[0].as_feature(*include) for s in stops])
-
-    @removes_session
-    def get_shape_features(
-        self, key: str, query_obj: Query, *include: str
-    ) -> gj.FeatureCollection:
-        """Generates geojsons for shapes.
-
-        Args:
-            - `key (str)`: the type of data to export (RAPID_TRANSIT, BUS, etc.)
-            - `query_obj (Query)`: Query object
-            - `*include (str)`: other orms to include\n
-        returns:
-            - `FeatureCollection`: shapes as FeatureCollection
-        """
-        session = self._get_session(readonly=True)
-        shapes: list[tuple[Shape]] = session.execute(query_obj.get_shapes_query()).all()
-        if key in ["rapid_transit", "all_routes"]:
-            shapes += session.execute(
-                query_obj.get_shapes_from_route_query(*self.SL_ROUTES).where(
-                    Route.route_type != "2"
-                )
-            ).all()
-        return gj.FeatureCollection(
-            [s[0].as_feature(*include) for s in sorted(set(shapes), reverse=True)]
-        )
-
-    @removes_session
-    def get_parking_features(
-        self, key: str, query_obj: Query, *include: str
-    ) -> gj.FeatureCollection:
-        """Generates geojsons for facilities.
-
-        Args:
-            - `key (str)`: the type of data to export (RAPID_TRANSIT, BUS, etc.)
-            - `query_obj (Query)`: Query object
-            - `*include (str)`: other orms to include \n
-        returns:
-            - `FeatureCollection`: facilities as FeatureCollection
-        """
-
-        session = self._get_session(readonly=True)
-        facils: list[tuple[Facility]] = session.execute(
-            query_obj.get_facilities_query("parking-area")
-        ).all()
-        if key == "rapid_transit":
-            facils += session.execute(
-                Query("3").get_facilities_query("parking-area")
-            ).all()
-        if "4" in query_obj.route_types:
-            facils += session.execute(query_obj.ferry_parking_query).all()
-        return gj.FeatureCollection([f[0].as_feature(*include) for f in facils])
-
-    @removes_session
-    def get_vehicles_feature(
-        self, key: str, query_obj: Query, *include: str
-    ) -> gj.FeatureCollection:
-        """Returns vehicles as FeatureCollection.
-        notes:
-            - early return if ferry data is requested.
-            - tries 10 times to get data \n
-        args:
-            - `key (str)`: the type of data to export (RAPID_TRANSIT, BUS, etc.)
-            - `query_obj (Query)`: Query object
-            - `*include (str)`: other orms to include \n
-        returns:
-            - `FeatureCollection`: vehicles as FeatureCollection
-        """
-        session = self._get_session(readonly=True)
-        if key == "ferry":  # no ferry data :(
-            return gj.FeatureCollection([])
-        _routes: list[str] = []
-        if key == "rapid_transit":
-            _routes.extend(self.SL_ROUTES)
-            # _routes.extend([*self.SL_ROUTES, "Shuttle-Generic"])
-        data: list[tuple[Vehicle]] = []
-        for attempt in range(10):
-            try:
-                data = session.execute(query_obj.get_vehicles_query(*_routes)).all()
-            except (exc.OperationalError, exc.DatabaseError) as error:
-                logging.error("Failed to get vehicle data: %s", error)
-            if any(v[0].predictions for v in data):
-                break
-            time.sleep(0.5)
-        if not data:
-            logging.error("No data returned in %s attemps", attempt + 1)
-        return gj.FeatureCollection([v[0].as_feature(*include) for v in data])
-
-    @removes_session
-    def to_sql(
-        self, data: pdcg.NDFrame, orm: t.Type[Base], purge: bool = False, **kwargs
-    ) -> int | None:
-        """Helper function to dump dataframe to sql.
-
-        Args:
-            - `data (pd.DataFrame)`: dataframe to dump
-            - `orm (any)`: table to dump to
-            - `purge (bool, optional)`: whether to purge table before dumping. Defaults to False.
-            - `**kwargs`: keyword args to pass to pd.to_sql \n
-        returns:
-            - `int`: number of rows added
-        """
-        session = self._get_session()
-        if purge:
-            while True:
-                try:
-                    session.execute(Query.delete(orm))
-                    session.commit()
-                    break
-                except exc.IllegalStateChangeError:
-                    time.sleep(1)
-
-        try:
-            res = data.to_sql(
-                name=orm.__tablename__,
-                con=self.engine,
-                if_exists="append",
-                index=False,
-                **kwargs,
-            )
-        except exc.IntegrityError:
-            res = self.to_sql(data.iloc[1:], orm, **kwargs)
-        logging.info("Added %s rows to %s", res, orm.__tablename__)
-        return res
-
-    @removes_session
-    def get_orm_json(
-        self, _orm: type[Base] | str, *include: str, geojson: bool = False, **params
-    ) -> list[dict[str, t.Any]] | gj.FeatureCollection:
-        """Returns a dictionary of the ORM names and their corresponding JSON names.
-
-        args:
-            - `_orm (str)`: ORM to return.
-            - `*include (str)`: other orms to include
-            - `geojson (bool)`: use `geojson` rather than `json`\n
-            - `**params`: keyword arguments to pass to the query\n
-        Returns:
-            - `list[dict[str]]`: dictionary of the ORM names and their corresponding JSON names.
-        """
-        # pylint: disable=line-too-long
-        session = self._get_session(readonly=True)
-        if isinstance(_orm, str):
-            _orm = self.find_orm(_orm)
-        if not _orm:
-            return []
-        comp_ops = ["<", ">", "!"]
-        param_list: list[dict[str, str]] = []
-        non_cols: list[dict[str, str]] = []
-        for key, value in params.items():
-            if value in {"null", "None", "none"}:
-                if "!" in key:
-                    p_item = {
-                        "key": key.replace("!", ""),
-                        "action": "IS NOT",
-                        "value": "NULL",
-                    }
-                else:
-                    p_item = {"key": key, "action": "IS", "value": "NULL"}
-            else:
-                op_index = next(
-                    (key.find(op) for op in comp_ops if key.find(op) > 0), None
-                )
-                if op_index is None:
-                    p_item = {"key": key, "action": "=", "value": value}
-                elif not value and not key[op_index] == "!":
-                    p_item = {
-                        "key": key[:op_index],
-                        "action": key[op_index],
-                        "value": key[op_index + 1 :],
-                    }
-                else:
-                    p_item = {
-                        "key": key[:op_index],
-                        "action": f"{key[op_index]}=",
-                        "value": value,
-                    }
-            if p_item["key"] in _orm.cols:
-                param_list.append(p_item)
-            else:
-                non_cols.append(p_item)
-        stmt = Query.select(_orm).where(
-            *(
-                sa.text(
-                    f"""{_orm.__tablename__}.{v['key']} {v['action']} {v['value'] if v['value'] == 'NULL' else f'\'{v["value"]}\''}"""
-                )
-                for v in param_list
-            )
-        )
-        if non_cols:
-            _eval = asteval.Interpreter()
-            data = []
-            for d in session.execute(stmt).all():
-                for c in non_cols:
-                    if hasattr(d[0], c["key"]):
-                        if _eval.eval(
-                            textwrap.dedent(
-                                f"""
-                                "{getattr(d[0], c['key'])}" {c['action'].lower() if c['action'] != '=' else '=='} "{c['value'].replace('NULL', 'None')}"
-                            """
-                            ).replace("\n", "")
-                        ):
-                            data.append(d)
-        else:
-            data: list[tuple[Base]] = session.execute(stmt).all()
-        if geojson:
-            if not data:
-                return gj.FeatureCollection([])
-            if callable(getattr(data[0][0], "as_feature", None)):
-                return gj.FeatureCollection([d[0].as_feature(*include) for d in data])
-            raise ValueError(f"{_orm} does not have an as_feature method")
-        return [d[0].as_json(*include) for d in data]
-
-    def timeout_get_orm_json(
-        self,
-        _orm: type[Base] | str,
-        *include: str,
-        timeout=15,
-        geojson: bool = False,
-        **params,
-    ) -> list[dict[str]] | gj.FeatureCollection:
-        """timeout version of `Feed.get_orm_json`;\
-            to not specify a timeout, use that function
-            
-        args:
-            - `_orm (str)`: ORM to return.
-            - `*include (str)`: other orms to include
-            - `timeout (int)`: timeout for the function in seconds
-            - `geojson (bool)`: use `geojson` rather than `json`\n
-            - `**params`: keyword arguments to pass to the query\n
-        Returns:
-            - `list[dict[str]]`: dictionary of the ORM names and their corresponding JSON names.
-        """
-
-        @timeout_function_decorator.timeout(timeout)
-        def _get_orm_json():
-            return self.get_orm_json(_orm, *include, geojson=geojson, **params)
-
-        return _get_orm_json()
-
-    def close(self) -> None:
-        """Closes the connection to the database."""
-        self.engine.dispose()
+"""Feed Object for GTFS Loader"""
+
+# pylint: disable=unused-wildcard-import
+# pylint: disable=wildcard-import
+# pylint: disable=unused-argument
+# pylint: disable=too-many-instance-attributes
+# pylint: disable=line-too-long
+# pylint: disable=too-many-locals
+# pylint: disable=too-many-branches
+import contextlib
+import hashlib
+import io
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import typing as t
+from collections import Counter
+from datetime import datetime, timedelta
+from zipfile import ZipFile
+
+import geojson as gj
+import pandas as pd
+import pandas.core.generic as pdcg
+import requests as req
+import sqlalchemy as sa
+from sqlalchemy import event, exc
+from sqlalchemy import orm as saorm
+
+from gtfs_orms import *
+from helper_functions import (
+    encode_polyline,
+    get_date,
+    removes_session,
+    timeit,
+    to_seconds_series,
+)
+
+from .departures import DepartureBoard
+from .feed_cache import FeedCache, FeedCacheWriter
+from .orm_filter import compile_query
+from .query import Query
+from .timetable import Timetable
+
+
+class Feed:
+    """Loads GTFS data into a route_type specific SQLite database. \
+        This class also contains methods to query the database. \
+        inherits from Query class, which contains queries. \
+    This class is thread-safe.
+        
+
+    Args:
+        - `url (str)`: url of GTFS feed
+        - `gtfs_name (str, optional)`: name of GTFS feed. Defaults to auto-parsed from url.
+        - `shape_points (bool, optional)`: also import `shape_points` rows. Defaults to False.
+    """
+
+    SL_ROUTES = ("741", "742", "743", "751", "749", "746")
+
+    # note that the order of these tables matters; avoids foreign key errors
+    SCHEDULE_ORMS = (
+        Agency,
+        Calendar,
+        CalendarDate,
+        CalendarAttribute,
+        Stop,
+        Route,
+        ShapePoint,
+        Trip,
+        TripProperty,
+        MultiRouteTrip,
+        StopTime,
+        LinkedDataset,
+        Facility,
+        FacilityProperty,
+        Transfer,
+    )
+
+    REALTIME_ORMS = (Alert, Vehicle, Prediction)
+
+    PARKING_FILE = "parking.json"
+    STOPS_FILE = "stops.json"
+    SHAPES_FILE = "shapes.json"
+
+    STREAM_BATCH_SIZE = 500  # rows fetched per round trip by `stream_orm_json`
+
+    PROGRESS_STEPS = 10_000  # sqlite vm steps between deadline checks
+    _deadline = threading.local()  # per thread, see `Feed.deadline`
+
+    @staticmethod
+    def find_orm(name: str) -> t.Type[Base] | None:
+        """returns the `type` of the orm by name
+
+        args:
+            - `name (str)`: name of the orm
+        returns:
+            - `type[Base]`: type of the orm
+        """
+        for cls in Base.__subclasses__():
+            if cls.__name__.lower() == name.lower():
+                return cls
+        return None
+
+    get_orm = find_orm
+
+    @staticmethod
+    @event.listens_for(sa.Engine, "connect")
+    def _on_connect(
+        dbapi_connection: sqlite3.Connection,
+        connection_record: sa.pool.ConnectionPoolEntry,
+    ) -> None:
+        """Sets sqlite pragma for each connection,\
+            automitcally called when a connection is created.
+
+        Args:
+            - `dbapi_connection (sqlite3.Connection)`: connection to sqlite database
+            - `connection_record (ConnectionRecord, optional)`: connection record
+        """
+
+        if not isinstance(dbapi_connection, sqlite3.Connection):
+            logging.warning("db %s is unsupported", dbapi_connection.__class__.__name__)
+            return
+        cursor = dbapi_connection.cursor()
+        for pragma in ["foreign_keys=ON", "auto_vacuum='1'", "shrink_memory"]:
+            try:
+                cursor.execute(f"PRAGMA {pragma}")
+            except sqlite3.OperationalError:
+                logging.warning("PRAGMA %s failed", pragma)
+        cursor.close()
+        dbapi_connection.set_progress_handler(
+            __class__._progress_handler,  # pylint: disable=protected-access
+            __class__.PROGRESS_STEPS,
+        )
+
+    @staticmethod
+    def _progress_handler() -> int:
+        """sqlite progress handler; aborts the running statement with \
+            `sqlite3.OperationalError: interrupted` once the deadline \
+            of the thread running it has passed.
+
+        returns:
+            - `int`: non-zero to abort
+        """
+        # pylint: disable=protected-access
+        deadline: float | None = getattr(__class__._deadline, "value", None)
+        return int(deadline is not None and time.monotonic() > deadline)
+
+    @staticmethod
+    @event.listens_for(sa.Engine, "close")
+    def _on_close(
+        dbapi_connection: sqlite3.Connection,
+        connection_record: sa.pool.ConnectionPoolEntry,
+    ) -> None:
+        """Sets sqlite pragma on close automatically.
+
+        Args:
+            - `dbapi_connection (sqlite3.Connection)`: connection to sqlite database
+            - `connection_record (ConnectionRecord, optional)`: connection record
+        """
+        if not isinstance(dbapi_connection, sqlite3.Connection):
+            logging.warning("db %s is unsupported", dbapi_connection.__class__.__name__)
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("PRAGMA optimize")
+        except sqlite3.OperationalError:
+            logging.warning("PRAGMA optimize failed")
+        cursor.close()
+
+    def _get_session(self, readonly: bool = False, **kwargs) -> saorm.Session:
+        """returns a `Session` from `Feed.scoped_session`.
+
+        wrapper for `sa.scoped_session.__call__(...)`
+
+        args:
+            - `readonly (bool)`: whether the session is readonly
+            - `**kwargs`: keyword arguments to pass to `scoped_session` \n
+        returns:
+            - `Session`: session object
+        """
+
+        session = self.scoped_session(**kwargs)
+        if not readonly:
+            return session
+
+        def _abort(*args, **kwargs) -> None:
+            """abort the flush call to enforce readonly"""
+            logging.warning("readonly session: aborting flush")
+
+        session.flush = _abort
+        return session
+
+    def __init__(
+        self, url: str, gtfs_name: str | None = None, shape_points: bool = False
+    ) -> None:
+        """
+        Initializes Feed object with url.
+
+        Parses url to get GTFS name and create db path in temp dir.
+
+        Args:
+            - `url (str)`: url of GTFS feed
+            - `gtfs_name (str, optional)`: name of GTFS feed. Defaults to auto-parsed from url.
+            - `shape_points (bool, optional)`: also import shapes.txt as `shape_points` rows \
+                (for `/api/shape_point`); shapes are drawn from `Shape.polyline`. Defaults to False.
+        """
+        super().__init__()
+        self.url = url
+        self.shape_points = shape_points
+        # ------------------------------- Connection/Session Setup ------------------------------- #
+        self.gtfs_name = gtfs_name or url.rsplit("/", maxsplit=1)[-1].split(".")[0]
+        self.zip_path = os.path.join(tempfile.gettempdir(), self.gtfs_name)
+        self.db_path = os.path.join(os.getcwd(), f"{self.gtfs_name}.db")
+        self.timetable_path = os.path.join(os.getcwd(), f"{self.gtfs_name}.timetable")
+        self.timetable: Timetable | None = None  # see `Feed.load_timetable`
+        self.cache = FeedCache(os.path.join(os.getcwd(), f"{self.gtfs_name}_cache"))
+        self.feed_version: str | None = None  # see `Feed.download_gtfs`
+        self.engine = sa.create_engine(f"sqlite:///{self.db_path}")
+        self.scoped_session = saorm.scoped_session(
+            saorm.sessionmaker(self.engine, expire_on_commit=False, autoflush=False)
+        )
+        # bumped after every realtime import; used to invalidate realtime caches
+        self.generation = 0
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__}({self.url}@{self.gtfs_name}.db)>"
+
+    def __str__(self) -> str:
+        return self.__repr__()
+
+    @timeit
+    def download_gtfs(self, **kwargs) -> None:
+        """Downloads the GTFS feed zip file into a temporary directory; \
+            `Feed.feed_version` becomes the hash of the zip.
+
+        args:
+            - `**kwargs`: keyword arguments to pass to `requests.get()`
+        """
+        try:
+            source = req.get(self.url, timeout=10, **kwargs)
+        except req.exceptions.SSLError:
+            source = req.get(self.url, timeout=10, verify=False, **kwargs)
+        if not source.ok:
+            raise req.exceptions.HTTPError(f"download {self.url}: {source.status_code}")
+        self.feed_version = hashlib.sha256(source.content).hexdigest()[:16]
+        with ZipFile(io.BytesIO(source.content)) as zipfile_bytes:
+            zipfile_bytes.extractall(self.zip_path)
+        logging.info("Downloaded zip from %s to %s", self.url, self.zip_path)
+
+    def remove_zip(self) -> None:
+        """Removes the GTFS zip file."""
+        if not os.path.exists(self.zip_path):
+            logging.warning("%s does not exist", self.zip_path)
+            return
+        shutil.rmtree(self.zip_path)
+        logging.info("Removed %s", self.zip_path)
+
+    @timeit
+    def import_gtfs(
+        self,
+        *args,
+        purge: bool = True,
+        date: datetime | None = None,
+        days_ahead: int = 7,
+        cached: bool = False,
+        **kwargs,
+    ) -> None:
+        """Dumps GTFS data into a SQLite database.
+
+        Parsed files are cached as parquet by feed version (see `FeedCache`), \
+            so a feed that's already cached is read from there instead of its CSVs.
+
+        Args:
+            - `*args`: args to pass to pd.read_csv
+            - `purge (bool)`: whether to purge the database before loading (default: True)
+            - `date (datetime, optional)`: skip trips (and their stop times, etc.) \
+                not running within `days_ahead` days of this date. Defaults to None (keep all).
+            - `days_ahead (int, optional)`: see `date`. Defaults to 7.
+            - `cached (bool, optional)`: load the latest cached feed without downloading, \
+                if there is one. Defaults to False.
+            - `**kwargs`: keyword args for pd.read_csv
+        """
+        # ------------------------------- Create Tables ------------------------------- #
+        version = self.cache.latest if cached else None
+        if version is None:
+            self.download_gtfs()
+            version = self.feed_version
+        else:  # labels artifacts published from it, see `FeedLoader.publish_artifact`
+            self.feed_version = version
+        if purge:
+            Base.metadata.drop_all(self.engine)
+            Base.metadata.create_all(self.engine)
+        # ------------------------------- Dump Data ------------------------------- #
+        service_ids: set[str] | None = None
+        trip_ids: set[str] = set()
+        skipped: t.Counter[str] = Counter()
+        shape_points: list[pd.DataFrame] = []
+        from_cache = self.cache.has(version)
+        with contextlib.ExitStack() as stack:
+            writer = (
+                None
+                if from_cache or version is None
+                else stack.enter_context(self.cache.write(version))
+            )
+            for orm in __class__.SCHEDULE_ORMS:
+                if orm is Trip and date:  # calendars are loaded by now
+                    service_ids = self.build_service_calendar().service_ids(
+                        *(date + timedelta(days=i) for i in range(days_ahead))
+                    )
+                chunk: pd.DataFrame
+                for chunk in (
+                    self.cache.read(version, orm.__filename__, kwargs.get("chunksize"))
+                    if from_cache
+                    else self._read_gtfs(orm, writer, *args, **kwargs)
+                ):
+                    if service_ids is not None:
+                        rows = len(chunk)
+                        chunk = self._active_rows(chunk, orm, service_ids, trip_ids)
+                        skipped[orm.__tablename__] += rows - len(chunk)
+                    if orm is ShapePoint:  # see `Shape.polyline`
+                        shape_points.append(chunk)
+                        continue
+                    if hasattr(orm, "index"):  # what if this is chunked? it explodes.
+                        chunk = chunk.assign(index=chunk.index)
+                    self.to_sql(chunk, orm)
+                if orm is ShapePoint:
+                    self._import_shapes(pd.concat(shape_points, ignore_index=True))
+        for table, rows in (+skipped).items():
+            logging.info("Skipped %s rows of inactive service from %s", rows, table)
+        if os.path.exists(self.zip_path):
+            self.remove_zip()
+        logging.info(
+            "Loaded %s (%s%s)",
+            self.gtfs_name,
+            version,
+            ", cached" if from_cache else "",
+        )
+
+    def _read_gtfs(
+        self, orm: t.Type[Base], writer: FeedCacheWriter | None, *args, **kwargs
+    ) -> t.Generator[pd.DataFrame, None, None]:
+        """Reads a GTFS file from the downloaded zip in chunks, \
+            adding the columns derived on import, and appends them to `writer`.
+
+        Args:
+            - `orm (Type[Base])`: orm of the file
+            - `writer (FeedCacheWriter | None)`: cache to write to, if any
+            - `*args`: args to pass to pd.read_csv
+            - `**kwargs`: keyword args for pd.read_csv\n
+        Yields:
+            - `pd.DataFrame`: chunks
+        """
+        with pd.read_csv(
+            os.path.join(self.zip_path, orm.__filename__), *args, **kwargs
+        ) as read:
+            chunk: pd.DataFrame
+            for chunk in read:
+                if orm.__filename__ == "stop_times.txt":  # see `StopTime`
+                    chunk["arrival_seconds"] = to_seconds_series(chunk["arrival_time"])
+                    chunk["departure_seconds"] = to_seconds_series(
+                        chunk["departure_time"]
+                    )
+                if writer is not None:
+                    writer.append(orm.__filename__, chunk)
+                yield chunk
+
+    def _import_shapes(self, points: pd.DataFrame) -> None:
+        """Writes `shapes` with each shape's points as an encoded polyline, \
+            and `shape_points` too if `Feed.shape_points`.
+
+        Args:
+            - `points (pd.DataFrame)`: shapes.txt
+        """
+        points = points.astype(
+            {"shape_pt_lat": float, "shape_pt_lon": float, "shape_pt_sequence": int}
+        ).sort_values(["shape_id", "shape_pt_sequence"])
+        shapes = (
+            points.groupby("shape_id", sort=False)[["shape_pt_lat", "shape_pt_lon"]]
+            .apply(lambda group: encode_polyline(group.to_numpy()))
+            .rename("polyline")
+            .reset_index()
+        )
+        self.to_sql(shapes, Shape)
+        if self.shape_points:
+            self.to_sql(points, ShapePoint, chunksize=100_000)
+
+    @staticmethod
+    def _active_rows(
+        chunk: pd.DataFrame,
+        orm: t.Type[Base],
+        service_ids: set[str],
+        trip_ids: set[str],
+    ) -> pd.DataFrame:
+        """Drops rows of inactive service from an import chunk: \
+            trips not in `service_ids`, and rows referencing a dropped trip.
+
+        Args:
+            - `chunk (pd.DataFrame)`: chunk of `orm.__filename__`
+            - `orm (Type[Base])`: table the chunk is for
+            - `service_ids (set[str])`: active service_ids
+            - `trip_ids (set[str])`: trips kept so far, added to as trips are read\n
+        Returns:
+            - `pd.DataFrame`: the rows to keep
+        """
+        if orm is Trip:
+            keep = chunk["service_id"].isin(service_ids)
+            trip_ids.update(chunk.loc[keep, "trip_id"])
+            return chunk[keep]
+        keep = pd.Series(True, index=chunk.index)
+        for column in ("trip_id", "from_trip_id", "to_trip_id"):
+            if column in chunk:
+                keep &= chunk[column].isna() | chunk[column].isin(trip_ids)
+        return chunk if keep.all() else chunk[keep]
+
+    @timeit
+    @removes_session
+    def import_realtime(self, orm: t.Type[Alert | Vehicle | Prediction] | str) -> None:
+        """Imports realtime data into the database.
+
+        Args:
+            - `orm (Type[Alert | Vehicle | Prediction] | str)`: realtime ORM.
+        """
+        session = self._get_session(readonly=True)
+        if isinstance(orm, str):
+            orm = __class__.find_orm(orm)
+        if orm not in __class__.REALTIME_ORMS:
+            raise ValueError(f"{orm} is not a realtime ORM")
+        dataset: list[LinkedDataset] = session.execute(
+            Query.get_dataset_query(orm.__realtime_name__)
+        ).one_or_none()
+        if not dataset:
+            return
+        for table_orm, dataframe in dataset[0].as_dataframes().items():
+            # databases built before a table was added get it on the next nightly import
+            table_orm.__table__.create(self.engine, checkfirst=True)
+            self.to_sql(dataframe, table_orm, purge=True)
+        self.generation += 1
+
+    @timeit
+    @removes_session
+    def build_service_calendar(self) -> ServiceCalendar:
+        """Builds the `ServiceCalendar` (active service_ids per day) \
+            from the imported calendars, and makes it `ServiceCalendar.latest`.
+
+        returns:
+            - `ServiceCalendar`: the service calendar
+        """
+        service_calendar = ServiceCalendar.from_session(self._get_session())
+        ServiceCalendar.latest = service_calendar
+        logging.info("Built %s", service_calendar)
+        return service_calendar
+
+    @timeit
+    def _build_timetable(self) -> Timetable:
+        """Writes the memory-mapped `Timetable` from `stop_times` and maps it; \
+            run after the schedule is imported and filtered.
+
+        returns:
+            - `Timetable`: the timetable
+        """
+        Timetable.write(
+            self.timetable_path,
+            pd.read_sql(Query.get_timetable_query(), self.engine),
+        )
+        self.timetable = Timetable(self.timetable_path)
+        logging.info("Built %s", self.timetable)
+        return self.timetable
+
+    def load_timetable(self) -> Timetable:
+        """Maps the `Timetable` written by `build_derived_tables`, \
+            building it if it's missing or unreadable.
+
+        returns:
+            - `Timetable`: the timetable
+        """
+        try:
+            self.timetable = Timetable(self.timetable_path)
+        except (OSError, ValueError):
+            return self._build_timetable()
+        return self.timetable
+
+    @timeit
+    @removes_session
+    def purge_and_filter(self, date: datetime, days_ahead: int = 7) -> None:
+        """Purges and filters the database.
+
+        Args:
+            - `date (datetime)`: date to filter on
+            - `days_ahead (int, optional)`: keep calendars running \
+                within this many days of `date`. Defaults to 7.
+        """
+        service_ids = self.build_service_calendar().service_ids(
+            *(date + timedelta(days=i) for i in range(days_ahead))
+        )
+        session = self._get_session()
+        for stmt in [
+            Query.delete_calendars_query(*service_ids),
+            Query.delete_facilities_query("parking-area", "bike-storage"),
+        ]:
+            res: sa.CursorResult = session.execute(stmt)
+            logging.info("Deleted %s rows from %s", res.rowcount, stmt.table.name)
+        session.commit()
+
+    def build_derived_tables(self) -> None:
+        """Builds what's derived from the imported schedule: `stop_routes`, \
+            the trip summaries and the timetable; run after it's imported and filtered."""
+        self._build_stop_routes()
+        self._build_trip_summaries()
+        self._build_timetable()
+
+    @timeit
+    @removes_session
+    def _build_stop_routes(self) -> None:
+        """Materializes `stop_routes` (`StopRoute`), which backs `Stop.routes`; \
+            run after the schedule is imported and filtered."""
+        session = self._get_session()
+        session.execute(Query.delete(StopRoute))
+        res: sa.CursorResult = session.execute(Query.insert_stop_routes_query())
+        session.commit()
+        logging.info("Added %s rows to %s", res.rowcount, StopRoute.__tablename__)
+
+    @timeit
+    @removes_session
+    def _build_trip_summaries(self) -> None:
+        """Fills the summary columns of `Trip` (`last_stop_id`, `stop_count`, ...), \
+            which back `Trip.destination`; run after the schedule is imported and filtered."""
+        session = self._get_session()
+        res: sa.CursorResult = session.execute(Query.update_trip_summaries_query())
+        session.commit()
+        logging.info("Summarized %s rows of %s", res.rowcount, Trip.__tablename__)
+
+    @timeit
+    def export_geojsons(self, key: str, *route_types: str, file_path: str) -> None:
+        """Generates geojsons for stops and shapes.
+
+        Args:
+            - `key (str)`: the type of data to export (RAPID_TRANSIT, BUS, etc.)
+            - `*route_types (str)`: route types to export
+            - `file_path (str)`: path to export files to
+        """
+        # pylint:disable=unspecified-encoding
+        query_obj = Query(*route_types)
+        file_subpath = os.path.join(file_path, key)
+        def_kwargs = {"mode": "w", "encoding": "utf-8"}
+        for path in (file_path, file_subpath):
+            if not os.path.exists(path):
+                os.mkdir(path)
+        file: io.TextIOWrapper
+        with open(os.path.join(file_subpath, self.SHAPES_FILE), **def_kwargs) as file:
+            gj.dump(self._get_shape_features(key, query_obj, "agency"), file)
+            logging.info("Exported %s", file.name)
+        with open(os.path.join(file_subpath, self.PARKING_FILE), **def_kwargs) as file:
+            gj.dump(self._get_parking_features(key, query_obj), file)
+            logging.info("Exported %s", file.name)
+        with open(os.path.join(file_subpath, self.STOPS_FILE), **def_kwargs) as file:
+            gj.dump(
+                self._get_stop_features(key, query_obj, "child_stops", "routes"), file
+            )
+            logging.info("Exported %s", file.name)
+
+    @removes_session
+    def _get_stop_features(self, key: str, query_obj: Query, *include: str) -> None:
+        """Generates geojsons for stops and shapes.
+
+        Args:
+            - `key (str)`: the type of data to export (RAPID_TRANSIT, BUS, etc.)
+            - `query_obj (Query)`: Query object
+            - `*include (str)`: other orms to include\n
+        returns:
+            - `FeatureCollection`: stops as FeatureCollection
+        """
+        session = self._get_session(readonly=True)
+        stops: list[tuple[Stop]] = session.execute(query_obj.parent_stops_query).all()
+        if key == "rapid_transit":
+            stops += session.execute(Query("3").parent_stops_query).all()
+        if "4" in query_obj.route_types:
+            stops += session.execute(
+                query_obj.select(Stop).where(Stop.vehicle_type == "4")
+            ).all()
+        return gj.FeatureCollection([s[0].as_feature(*include) for s in stops])
+
+    @removes_session
+    def _get_shape_features(
+        self, key: str, query_obj: Query, *include: str
+    ) -> gj.FeatureCollection:
+        """Generates geojsons for shapes.
+
+        Args:
+            - `key (str)`: the type of data to export (RAPID_TRANSIT, BUS, etc.)
+            - `query_obj (Query)`: Query object
+            - `*include (str)`: other orms to include\n
+        returns:
+            - `FeatureCollection`: shapes as FeatureCollection
+        """
+        session = self._get_session(readonly=True)
+        shapes: list[tuple[Shape]] = session.execute(query_obj.get_shapes_query()).all()
+        if key in ["rapid_transit", "all_routes"]:
+            shapes += session.execute(
+                query_obj.get_shapes_from_route_query(*self.SL_ROUTES).where(
+                    Route.route_type != "2"
+                )
+            ).all()
+        return gj.FeatureCollection(
+            [s[0].as_feature(*include) for s in sorted(set(shapes), reverse=True)]
+        )
+
+    @removes_session
+    def _get_parking_features(
+        self, key: str, query_obj: Query, *include: str
+    ) -> gj.FeatureCollection:
+        """Generates geojsons for facilities.
+
+        Args:
+            - `key (str)`: the type of data to export (RAPID_TRANSIT, BUS, etc.)
+            - `query_obj (Query)`: Query object
+            - `*include (str)`: other orms to include \n
+        returns:
+            - `FeatureCollection`: facilities as FeatureCollection
+        """
+
+        session = self._get_session(readonly=True)
+        facils: list[tuple[Facility]] = session.execute(
+            query_obj.get_facilities_query("parking-area")
+        ).all()
+        if key == "rapid_transit":
+            facils += session.execute(
+                Query("3").get_facilities_query("parking-area")
+            ).all()
+        if "4" in query_obj.route_types:
+            facils += session.execute(query_obj.ferry_parking_query).all()
+        return gj.FeatureCollection([f[0].as_feature(*include) for f in facils])
+
+    @removes_session
+    def get_vehicles_feature(
+        self, key: str, query_obj: Query, *include: str
+    ) -> gj.FeatureCollection:
+        """Returns vehicles as FeatureCollection.
+        notes:
+            - early return if ferry data is requested.
+            - tries 10 times to get data \n
+        args:
+            - `key (str)`: the type of data to export (RAPID_TRANSIT, BUS, etc.)
+            - `query_obj (Query)`: Query object
+            - `*include (str)`: other orms to include \n
+        returns:
+            - `FeatureCollection`: vehicles as FeatureCollection
+        """
+        session = self._get_session(readonly=True)
+        if key == "ferry":  # no ferry data :(
+            return gj.FeatureCollection([])
+        _routes: list[str] = []
+        if key == "rapid_transit":
+            _routes.extend(self.SL_ROUTES)
+            # _routes.extend([*self.SL_ROUTES, "Shuttle-Generic"])
+        data: list[tuple[Vehicle]] = []
+        for attempt in range(10):
+            try:
+                data = session.execute(query_obj.get_vehicles_query(*_routes)).all()
+            except (exc.OperationalError, exc.DatabaseError) as error:
+                logging.error("Failed to get vehicle data: %s", error)
+            if any(v[0].predictions for v in data):
+                break
+            time.sleep(0.5)
+        if not data:
+            logging.error("No data returned in %s attemps", attempt + 1)
+        return gj.FeatureCollection([v[0].as_feature(*include) for v in data])
+
+    @removes_session
+    def get_vehicle_features(
+        self, keys_dict: dict[str, list[str]], *include: str
+    ) -> dict[str, list[gj.Feature]]:
+        """Returns the vehicles of every key at once, as `get_vehicles_feature` would \
+            (without its retries), from `VehicleRecord`s: the vehicles and their \
+            relationships are loaded in bulk and each is serialized once.
+
+        args:
+            - `keys_dict (dict[str, list[str]])`: key -> route types
+            - `*include (str)`: other orms to include, see `VehicleRecord.RELATIONSHIPS`\n
+        returns:
+            - `dict[str, list[Feature]]`: key -> vehicle features
+        """
+        session = self._get_session(readonly=True)
+        keys: dict[str, list[str]] = {}
+        for key, route_types in keys_dict.items():
+            if key == "ferry":  # no ferry data :(
+                keys[key] = []
+                continue
+            keys[key] = (
+                session.execute(
+                    Query(*route_types)
+                    .get_vehicles_query(
+                        *(self.SL_ROUTES if key == "rapid_transit" else ())
+                    )
+                    .with_only_columns(Vehicle.vehicle_id)
+                )
+                .scalars()
+                .all()
+            )
+        vehicle_ids = {i for ids in keys.values() for i in ids}
+        records = {
+            record.vehicle_id: record
+            for record in (
+                VehicleRecord.from_session(session, *vehicle_ids, include=include)
+                if vehicle_ids
+                else []
+            )
+        }
+        cache: dict[int, dict[str, t.Any]] = {}
+        features = {
+            i: record.as_feature(*include, cache=cache) for i, record in records.items()
+        }
+        return {
+            key: [features[i] for i in ids if i in features]
+            for key, ids in keys.items()
+        }
+
+    @removes_session
+    def to_sql(
+        self, data: pdcg.NDFrame, orm: t.Type[Base], purge: bool = False, **kwargs
+    ) -> int | None:
+        """Helper function to dump dataframe to sql.
+
+        Args:
+            - `data (pd.DataFrame)`: dataframe to dump
+            - `orm (any)`: table to dump to
+            - `purge (bool, optional)`: whether to purge table before dumping. Defaults to False.
+            - `**kwargs`: keyword args to pass to pd.to_sql \n
+        returns:
+            - `int`: number of rows added
+        """
+        session = self._get_session()
+        if purge:
+            while True:
+                try:
+                    session.execute(Query.delete(orm))
+                    session.commit()
+                    break
+                except exc.IllegalStateChangeError:
+                    time.sleep(1)
+
+        try:
+            res = data.to_sql(
+                name=orm.__tablename__,
+                con=self.engine,
+                if_exists="append",
+                index=False,
+                **kwargs,
+            )
+        except exc.IntegrityError:
+            res = self.to_sql(data.iloc[1:], orm, **kwargs)
+        logging.info("Added %s rows to %s", res, orm.__tablename__)
+        return res
+
+    @removes_session
+    def get_orm_json(
+        self, _orm: type[Base] | str, *include: str, geojson: bool = False, **params
+    ) -> list[dict[str, t.Any]] | gj.FeatureCollection:
+        """Returns a dictionary of the ORM names and their corresponding JSON names.
+
+        args:
+            - `_orm (str)`: ORM to return.
+            - `*include (str)`: other orms to include
+            - `geojson (bool)`: use `geojson` rather than `json`\n
+            - `**params`: filters, ordering and paging, see `compile_query`\n
+        Returns:
+            - `list[dict[str]]`: dictionary of the ORM names and their corresponding JSON names.
+        """
+        session = self._get_session(readonly=True)
+        if isinstance(_orm, str):
+            _orm = self.find_orm(_orm)
+        if not _orm:
+            return []
+        if not include and not geojson:  # no objects needed, see `compile_query`
+            stmt, page = compile_query(_orm, json_rows=True, **params)
+            return list(page(session.execute(stmt)))
+        stmt, page = compile_query(_orm, **params)
+        data: list[tuple[Base]] = list(page(session.execute(stmt)))
+        if geojson:
+            if not data:
+                return gj.FeatureCollection([])
+            if callable(getattr(data[0][0], "as_feature", None)):
+                return gj.FeatureCollection([d[0].as_feature(*include) for d in data])
+            raise ValueError(f"{_orm} does not have an as_feature method")
+        return [d[0].as_json(*include) for d in data]
+
+    @removes_session
+    def get_departures(
+        self, stop_id: str, limit: int = 3, now: float | None = None
+    ) -> list[dict[str, t.Any]]:
+        """Returns the next departures per route/direction from a stop, \
+            predictions merged with the schedule of the services active \
+            in `ServiceCalendar.latest`: from `self.timetable` when it's mapped \
+            (see `DepartureBoard`), else in one sql query \
+            (see `Query.get_departures_query`).
+
+        args:
+            - `stop_id (str)`: stop or parent station
+            - `limit (int, optional)`: departures per route/direction. Defaults to 3.
+            - `now (float, optional)`: unix timestamp. Defaults to `time.time()`.\n
+        Returns:
+            - `list[dict[str, Any]]`: departures, soonest first.
+        """
+        service_calendar = ServiceCalendar.latest or self.build_service_calendar()
+        service_days = [  # yesterday's trips run past midnight
+            (date, service_calendar.service_ids(date))
+            for date in (get_date(), get_date(-1))
+        ]
+        session = self._get_session(readonly=True)
+        now = time.time() if now is None else now
+        if self.timetable is not None:
+            board = DepartureBoard(session, self.timetable, stop_id, now)
+            return board.departures(service_days, limit)
+        stmt = Query.get_departures_query(stop_id, now, service_days, limit)
+        return [dict(row) for row in session.execute(stmt).mappings()]
+
+    def stream_orm_json(
+        self,
+        _orm: type[Base] | str,
+        *include: str,
+        timeout: float = 15,
+        geojson: bool = False,
+        **params,
+    ) -> t.Generator[dict[str, t.Any] | gj.Feature, None, None]:
+        """streaming version of `Feed.get_orm_json`; yields rows one at a time \
+            from a server-side cursor, so memory stays flat regardless of table size.
+
+        params are validated before this returns, not on the first `next()`; \
+            the query runs under `Feed.deadline` while the rows are consumed.
+
+        args:
+            - `_orm (str)`: ORM to return.
+            - `*include (str)`: other orms to include
+            - `timeout (float)`: seconds to stream for, see `Feed.deadline`
+            - `geojson (bool)`: yield features rather than `json`\n
+            - `**params`: filters, ordering and paging, see `compile_query`\n
+        returns:
+            - `Generator[dict[str, Any] | Feature]`: rows; \
+                raises `TimeoutError` once cancelled by the deadline
+        raises:
+            - `ValueError`: if the orm isn't found, can't be geojson, or a param is malformed
+        """
+        if isinstance(_orm, str):
+            _orm = self.find_orm(_orm)
+        if not _orm:
+            raise ValueError("orm not found")
+        if geojson and not callable(getattr(_orm, "as_feature", None)):
+            raise ValueError(f"{_orm} does not have an as_feature method")
+        json_rows = not include and not geojson
+        stmt, page = compile_query(_orm, json_rows=json_rows, **params)
+        stmt = stmt.execution_options(yield_per=self.STREAM_BATCH_SIZE)
+
+        def _stream() -> t.Generator[dict[str, t.Any] | gj.Feature, None, None]:
+            # own session: the generator outlives the request's scoped session
+            with saorm.Session(self.engine) as session, self.deadline(timeout) as end:
+                try:
+                    for row in page(session.execute(stmt)):
+                        if json_rows:
+                            yield row
+                        elif geojson:
+                            yield row[0].as_feature(*include)
+                        else:
+                            yield row[0].as_json(*include)
+                except exc.OperationalError as error:
+                    if time.monotonic() > end:
+                        raise TimeoutError(f"stream_orm_json > {timeout}s") from error
+                    raise
+
+        return _stream()
+
+    @contextlib.contextmanager
+    def deadline(self, timeout: float) -> t.Generator[float, None, None]:
+        """cancels sqlite work started on this thread within the block \
+            once `timeout` seconds have passed; the statement stops \
+            inside sqlite rather than running on in the background.
+
+        args:
+            - `timeout (float)`: seconds\n
+        yields:
+            - `float`: the deadline, as `time.monotonic()`
+        """
+        previous = getattr(self._deadline, "value", None)
+        self._deadline.value = time.monotonic() + timeout
+        try:
+            yield self._deadline.value
+        finally:
+            self._deadline.value = previous
+
+    def timeout_get_orm_json(
+        self,
+        _orm: type[Base] | str,
+        *include: str,
+        timeout=15,
+        geojson: bool = False,
+        **params,
+    ) -> list[dict[str]] | gj.FeatureCollection:
+        """timeout version of `Feed.get_orm_json`;\
+            to not specify a timeout, use that function
+            
+        args:
+            - `_orm (str)`: ORM to return.
+            - `*include (str)`: other orms to include
+            - `timeout (int)`: timeout for the function in seconds
+            - `geojson (bool)`: use `geojson` rather than `json`\n
+            - `**params`: filters, ordering and paging, see `compile_query`\n
+        Returns:
+            - `list[dict[str]]`: dictionary of the ORM names and their corresponding JSON names.
+        raises:
+            - `TimeoutError`: if the query was cancelled by the deadline
+        """
+        with self.deadline(timeout) as deadline:
+            res = self.get_orm_json(_orm, *include, geojson=geojson, **params)
+        if res is None and time.monotonic() > deadline:
+            raise TimeoutError(f"get_orm_json > {timeout}s")
+        return res
+
+    def close(self) -> None:
+        """Closes the connection to the database."""
+        self.engine.dispose()
@@ -0,0 +1,165 @@
+"""Holds the parquet cache of parsed GTFS tables."""
+
+import contextlib
+import logging
+import os
+import shutil
+import typing as t
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+class FeedCacheWriter:
+    """Appends parsed chunks of GTFS files to parquet files, one per file.
+
+    Args:
+        - `path (str)`: directory to write to
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._writers: dict[str, pq.ParquetWriter] = {}
+
+    def append(self, filename: str, chunk: pd.DataFrame) -> None:
+        """appends a chunk of a GTFS file; the schema is set by the first chunk: \
+            integer columns stay integers, everything else is a string.
+
+        args:
+            - `filename (str)`: GTFS file the chunk is from, e.g. `stop_times.txt`
+            - `chunk (pd.DataFrame)`: parsed chunk
+        """
+        writer = self._writers.get(filename)
+        if writer is None:
+            schema = pa.schema(
+                (
+                    column,
+                    (
+                        pa.int64()
+                        if pd.api.types.is_integer_dtype(dtype)
+                        else pa.string()
+                    ),
+                )
+                for column, dtype in chunk.dtypes.items()
+            )
+            writer = pq.ParquetWriter(
+                os.path.join(self.path, f"{os.path.splitext(filename)[0]}.parquet"),
+                schema,
+            )
+            self._writers[filename] = writer
+        writer.write_table(
+            pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False)
+        )
+
+    def close(self) -> None:
+        """closes every parquet file"""
+        for writer in self._writers.values():
+            writer.close()
+        self._writers.clear()
+
+
+class FeedCache:
+    """Parquet cache of parsed GTFS tables, one directory per feed version, \
+        so a reimport of the same feed, or a cold start without a database, \
+        doesn't parse the CSVs again (or download them, see `Feed.import_gtfs`).
+
+    `LATEST` holds the last version written completely.
+
+    Args:
+        - `path (str)`: cache directory
+        - `keep (int, optional)`: versions to keep. Defaults to 2.
+    """
+
+    LATEST_FILE = "LATEST"
+
+    def __init__(self, path: str, keep: int = 2) -> None:
+        self.path = path
+        self.keep = keep
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__}({self.path}@{self.latest})>"
+
+    @property
+    def latest(self) -> str | None:
+        """the last version written, if any"""
+        try:
+            with open(os.path.join(self.path, self.LATEST_FILE), "r", -1, "utf-8") as f:
+                version = f.read().strip()
+        except OSError:
+            return None
+        return version if self.has(version) else None
+
+    def has(self, version: str | None) -> bool:
+        """if `version` is cached"""
+        return bool(version) and os.path.isdir(os.path.join(self.path, version))
+
+    def read(
+        self, version: str, filename: str, chunksize: int | None = None
+    ) -> t.Generator[pd.DataFrame, None, None]:
+        """yields a cached GTFS file in chunks, indexed as `pd.read_csv` would.
+
+        args:
+            - `version (str)`: feed version
+            - `filename (str)`: GTFS file, e.g. `stop_times.txt`
+            - `chunksize (int, optional)`: rows per chunk. Defaults to None (one chunk).\n
+        yields:
+            - `pd.DataFrame`: chunks
+        """
+        path = os.path.join(
+            self.path, version, f"{os.path.splitext(filename)[0]}.parquet"
+        )
+        if not os.path.exists(path):
+            return
+        start = 0
+        file = pq.ParquetFile(path)
+        for batch in file.iter_batches(
+            batch_size=chunksize or file.metadata.num_rows or 1
+        ):
+            chunk = batch.to_pandas(types_mapper={pa.int64(): pd.Int64Dtype()}.get)
+            chunk.index = pd.RangeIndex(start, start + len(chunk))
+            start += len(chunk)
+            yield chunk
+
+    @contextlib.contextmanager
+    def write(self, version: str) -> t.Generator[FeedCacheWriter, None, None]:
+        """writes a version; it's only cached (and `LATEST`) \
+            if the block finishes without an exception.
+
+        args:
+            - `version (str)`: feed version\n
+        yields:
+            - `FeedCacheWriter`: writer to append chunks to
+        """
+        path = os.path.join(self.path, f"{version}.tmp")
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+        writer = FeedCacheWriter(path)
+        try:
+            yield writer
+            writer.close()
+        except BaseException:
+            writer.close()
+            shutil.rmtree(path, ignore_errors=True)
+            raise
+        shutil.rmtree(os.path.join(self.path, version), ignore_errors=True)
+        os.replace(path, os.path.join(self.path, version))
+        with open(os.path.join(self.path, self.LATEST_FILE), "w", -1, "utf-8") as f:
+            f.write(version)
+        logging.info("Cached %s to %s", version, self.path)
+        self.prune(version)
+
+    def prune(self, *keep: str) -> None:
+        """removes all but the newest `self.keep` versions (and `keep`)"""
+        versions = sorted(
+            (
+                entry
+                for entry in os.scandir(self.path)
+                if entry.is_dir() and not entry.name.endswith(".tmp")
+            ),
+            key=lambda entry: entry.stat().st_mtime,
+            reverse=True,
+        )
+        for entry in versions[self.keep :]:
+            if entry.name not in keep:
+                shutil.rmtree(entry.path, ignore_errors=True)
@@ -1,135 +1,342 @@
-"""FeedLoader class."""
-
-import logging
-import os
-import time
-import typing as t
-from threading import Thread
-
-from schedule import Scheduler
-
-from gtfs_orms import Alert, Prediction, Vehicle
-from helper_functions import get_date, timeit
-
-from .feed import Feed
-
-
-class FeedLoader(Scheduler, Feed):
-    """Loads GTFS data into map \
-        and schedules jobs to import realtime data.
-
-    Args:
-        - `url (str)`: URL of GTFS feed
-        - `geojson_path (str)`: Path to save geojsons
-        - `keys_dict (dict[str, list[str]])`: Dictionary of keys to load
-        - `**kwargs`: Keyword arguments to pass to `Feed`, such as `gtfs_name`
-    """
-
-    @property
-    def geojsons_exist(self) -> bool:
-        """if *all* geojsons exist"""
-        return all(
-            os.path.exists(os.path.join(self.geojson_path, k, fname))
-            for k in self.keys_dict
-            for fname in [self.SHAPES_FILE, self.PARKING_FILE, self.STOPS_FILE]
-        )
-
-    @property
-    def db_exists(self) -> bool:
-        """if the database exists"""
-        return os.path.exists(self.db_path)
-
-    def __init__(
-        self, url: str, geojson_path: str, keys_dict: dict[str, list[str]], **kwargs
-    ) -> None:
-        """Initializes FeedLoader.
-
-        Args:
-            - `url (str)`: URL of GTFS feed.
-            - `geojson_path (str)`: Path to save geojsons.
-            - `keys_dict (dict[str, list[str]])`: Dictionary of keys to load.
-            - `**kwargs`: Keyword arguments to pass to `Feed`, such as `gtfs_name`.
-        """
-        Scheduler.__init__(self)
-        Feed.__init__(self, url, **kwargs)
-        self.url = url
-        self.keys_dict = keys_dict
-        self.geojson_path = geojson_path
-
-    @timeit
-    def nightly_import(self, **kwargs) -> None:
-        """Runs the nightly import.
-
-        args:
-            - `**kwargs`: keyword arguments to pass to `import_gtfs`.\n
-        """
-        self.import_gtfs(chunksize=100000, dtype=object, **kwargs)
-        for orm in self.__class__.REALTIME_ORMS:
-            self.import_realtime(orm)
-        self.purge_and_filter(date=get_date())
-
-    @timeit
-    def geojson_exports(self) -> None:
-        """Exports geojsons all geojsons listed in `self.keys_dict`"""
-        for key, routes in self.keys_dict.items():
-            self.export_geojsons(key, *routes, file_path=self.geojson_path)
-
-    def import_and_run(
-        self, import_data: bool = False, timezone: str = "America/New_York", **kwargs
-    ) -> t.NoReturn:
-        """this is the main entrypoint for the application.
-
-        Args:
-            - `import_data (bool, optional)`: reloads the database and geojsons.\
-                Defaults to False.
-            - `timezone (str, optional)`: Timezone. Defaults to "America/New_York".
-            - `**kwargs`: Keyword arguments to pass to `nightly import`.
-        """
-
-        if import_data or not self.db_exists:
-            self.nightly_import(**kwargs)
-        if import_data or not self.geojsons_exist:
-            self.geojson_exports()
-        self.run(timezone=timezone)
-
-    def run(self, timezone: str = "America/New_York") -> t.NoReturn:
-        """Schedules jobs.
-
-        Args:
-            - `timezone (str, optional)`: Timezone. Defaults to "America/New_York".
-        """
-
-        def threader(func: t.Callable, *args, join: bool = False, **kwargs) -> None:
-            """threads a function.
-
-            Args:
-                func (Callable): Function to thread.
-                *args: Arguments for func.
-                join (bool, optional): Whether to join thread. Defaults to True.
-                **kwargs: Keyword arguments for func.
-            """
-
-            job_thread = Thread(target=func, args=args, kwargs=kwargs)
-            job_thread.start()
-            if join:
-                job_thread.join()
-
-        logging.info("Starting scheduler")
-        self.every().minute.do(threader, self.import_realtime, Alert, join=True)
-        self.every(12).seconds.do(threader, self.import_realtime, Vehicle, join=True)
-        self.every(20).seconds.do(threader, self.import_realtime, Prediction, join=True)
-        self.every().day.at("04:00", tz=timezone).do(threader, self.geojson_exports)
-        self.every().day.at("03:30", tz=timezone).do(threader, self.nightly_import)
-        while True:
-            self.run_pending()
-            time.sleep(1)
-
-    def stop(self, full: bool = False) -> None:
-        """Stops the scheduler.
-
-        args:
-            - `full (bool, optional)`: Whether to close db connection. Defaults to False.
-        """
-        self.clear()
-        if full:
-            self.close()
+"""FeedLoader class."""
+
+import logging
+import os
+import sqlite3
+import tarfile
+import tempfile
+import time
+import typing as t
+from threading import Thread
+
+import requests as req
+import sqlalchemy as sa
+from schedule import Scheduler
+
+from gtfs_orms import Alert, Base, Prediction, Vehicle
+from helper_functions import get_date, timeit
+
+from .artifact import ArtifactPuller, publish_artifact
+from .feed import Feed
+from .ingest_election import IngestElection
+from .timetable import Timetable
+from .vehicle_snapshots import VehicleSnapshots
+
+
+class FeedLoader(Scheduler, Feed):
+    """Loads GTFS data into map \
+        and schedules jobs to import realtime data.
+
+    Args:
+        - `url (str)`: URL of GTFS feed
+        - `geojson_path (str)`: Path to save geojsons
+        - `keys_dict (dict[str, list[str]])`: Dictionary of keys to load
+        - `artifact (str, optional)`: directory or url to pull prebuilt artifacts from
+        - `**kwargs`: Keyword arguments to pass to `Feed`, such as `gtfs_name`
+    """
+
+    @property
+    def geojsons_exist(self) -> bool:
+        """if *all* geojsons exist"""
+        return all(
+            os.path.exists(os.path.join(self.geojson_path, k, fname))
+            for k in self.keys_dict
+            for fname in [self.SHAPES_FILE, self.PARKING_FILE, self.STOPS_FILE]
+        )
+
+    @property
+    def db_exists(self) -> bool:
+        """if the database exists"""
+        return os.path.exists(self.db_path)
+
+    @property
+    def db_current(self) -> bool:
+        """if the database has every table and column of the orms, \
+            i.e. wasn't created by an older version"""
+        inspector = sa.inspect(self.engine)
+        return all(
+            inspector.has_table(table.name)
+            and {c["name"] for c in inspector.get_columns(table.name)}
+            >= set(table.columns.keys())
+            for table in Base.metadata.sorted_tables
+        )
+
+    def __init__(
+        self,
+        url: str,
+        geojson_path: str,
+        keys_dict: dict[str, list[str]],
+        artifact: str | None = None,
+        **kwargs,
+    ) -> None:
+        """Initializes FeedLoader.
+
+        Args:
+            - `url (str)`: URL of GTFS feed.
+            - `geojson_path (str)`: Path to save geojsons.
+            - `keys_dict (dict[str, list[str]])`: Dictionary of keys to load.
+            - `artifact (str, optional)`: directory or url to pull prebuilt artifacts from \
+                instead of importing, see `FeedLoader.pull_artifact`. Defaults to None.
+            - `**kwargs`: Keyword arguments to pass to `Feed`, such as `gtfs_name`.
+        """
+        Scheduler.__init__(self)
+        Feed.__init__(self, url, **kwargs)
+        self.keys_dict = keys_dict
+        self.geojson_path = geojson_path
+        self.artifacts = ArtifactPuller(
+            artifact, os.path.join(os.getcwd(), f"{self.gtfs_name}.artifact.json")
+        )
+        # one process per db ingests, see `FeedLoader.elect_and_run`
+        self.election = IngestElection(self.db_path, self.timetable_path)
+        self.snapshots = VehicleSnapshots(self, f"{self.db_path}.vehicles")
+
+    def acquire_ingest_lock(self) -> bool:
+        """Tries to become the ingestor, see `IngestElection.acquire`; \
+            the ingestor publishes the shared vehicles.
+
+        Returns:
+            - `bool`: if this process is the ingestor
+        """
+        if self.election.is_ingestor:
+            return True
+        if not self.election.acquire():
+            return False
+        self.snapshots.share(writable=True)
+        return True
+
+    def release_ingest_lock(self) -> None:
+        """Stops being the ingestor, if it is."""
+        if not self.election.is_ingestor:
+            return
+        self.election.release()
+        self.snapshots.share(writable=False)
+
+    def follow_ingestor(self) -> None:
+        """Catches up with the ingestor: a new timetable means a new database \
+            (nightly import or `pull_artifact`), so it's reopened along with the \
+            calendar; a new realtime generation is pushed to stream subscribers."""
+        self.election.follow_timetable(self._reload_timetable)
+        generation = self.election.read_generation(self.generation)
+        if generation != self.generation:
+            self.snapshots.load_shared()
+            self.generation = generation
+            self.snapshots.publish()
+
+    def _reload_timetable(self) -> None:
+        """reopens the database and maps the timetable the ingestor replaced"""
+        self.reload_database()
+        self.timetable = Timetable(self.timetable_path)
+
+    def reload_database(self) -> None:
+        """Reopens the database after it's been replaced: pooled connections \
+            still hold the old file, and snapshots were built from it."""
+        self.engine.dispose()
+        self.snapshots.clear()
+        self.build_service_calendar()
+
+    def elect_and_run(
+        self,
+        import_data: bool = False,
+        timezone: str = "America/New_York",
+        poll: float = 1.0,
+        **kwargs,
+    ) -> t.NoReturn:
+        """Runs `import_and_run` in the one process that gets the ingest lock; \
+            every other process follows it read-only, and takes over if it dies.
+
+        Args:
+            - `import_data (bool, optional)`: see `import_and_run`. \
+                Ignored when taking over. Defaults to False.
+            - `timezone (str, optional)`: Timezone. Defaults to "America/New_York".
+            - `poll (float, optional)`: seconds between checks while following. Defaults to 1.
+            - `**kwargs`: Keyword arguments to pass to `import_and_run`.
+        """
+        if not self.acquire_ingest_lock():
+            logging.info("Following ingestor (pid %s)", os.getpid())
+            import_data = False
+            while not self.acquire_ingest_lock():
+                self.follow_ingestor()
+                time.sleep(poll)
+        logging.info("Elected ingestor (pid %s)", os.getpid())
+        self.generation = self.election.read_generation(self.generation)
+        self.import_and_run(import_data=import_data, timezone=timezone, **kwargs)
+
+    @timeit
+    def nightly_import(self, **kwargs) -> None:
+        """Runs the nightly import.
+
+        args:
+            - `**kwargs`: keyword arguments to pass to `import_gtfs`.\n
+        """
+        date = get_date()
+        self.import_gtfs(chunksize=100000, dtype=object, date=date, **kwargs)
+        for orm in self.__class__.REALTIME_ORMS:
+            self.import_realtime(orm)
+        self.purge_and_filter(date=date)
+        self.build_derived_tables()
+
+    def import_realtime(self, orm: t.Type[Alert | Vehicle | Prediction] | str) -> None:
+        """Imports realtime data into the database, \
+            then pushes the vehicle changes to any stream subscribers.
+
+        Args:
+            - `orm (Type[Alert | Vehicle | Prediction] | str)`: realtime ORM.
+        """
+        super().import_realtime(orm)
+        self.publish_generation()
+
+    def publish_generation(self) -> None:
+        """Publishes the current realtime generation: the vehicles to `shared` \
+            and the generation for the other processes, then the vehicle \
+            changes to this process' stream subscribers."""
+        self.snapshots.publish_shared()
+        self.election.write_generation(self.generation)
+        self.snapshots.publish()
+
+    @timeit
+    def geojson_exports(self) -> None:
+        """Exports geojsons all geojsons listed in `self.keys_dict`"""
+        for key, routes in self.keys_dict.items():
+            self.export_geojsons(key, *routes, file_path=self.geojson_path)
+
+    @property
+    def _artifact_files(self) -> dict[str, str]:
+        """name in the artifact -> local path"""
+        return {
+            os.path.basename(self.db_path): self.db_path,
+            os.path.basename(self.timetable_path): self.timetable_path,
+            os.path.basename(self.geojson_path): self.geojson_path,
+        }
+
+    @timeit
+    def publish_artifact(self, store: str) -> dict[str, t.Any]:
+        """Publishes the database (a consistent copy), timetable and geojsons \
+            as an artifact, versioned by date and feed version.
+
+        Args:
+            - `store (str)`: directory to publish to, see `artifact.publish_artifact`\n
+        Returns:
+            - `dict[str, Any]`: manifest
+        """
+        with tempfile.TemporaryDirectory() as temp:
+            copy_path = os.path.join(temp, os.path.basename(self.db_path))
+            source, copy = sqlite3.connect(self.db_path), sqlite3.connect(copy_path)
+            source.backup(copy)
+            source.close()
+            copy.close()
+            return publish_artifact(
+                store,
+                f"{get_date():%Y%m%d}-{self.feed_version or 'local'}",
+                self._artifact_files | {os.path.basename(self.db_path): copy_path},
+            )
+
+    @timeit
+    def pull_artifact(self, store: str | None = None) -> bool:
+        """Replaces the database, timetable and geojsons with the latest artifact, \
+            unless it's the one already pulled; either way the calendar and \
+            timetable are loaded from it. Errors are logged, not raised.
+
+        Args:
+            - `store (str, optional)`: directory or url. Defaults to `self.artifacts.store`.\n
+        Returns:
+            - `bool`: if the database is now the latest artifact
+        """
+        try:
+            manifest = self.artifacts.pull(
+                self._artifact_files,
+                store,
+                force=not (self.db_exists and self.geojsons_exist),
+            )
+        except (
+            OSError,
+            ValueError,
+            req.exceptions.RequestException,
+            tarfile.TarError,
+        ) as error:
+            logging.error(
+                "Couldn't pull artifact from %s: %s",
+                store or self.artifacts.store,
+                error,
+            )
+            return False
+        if manifest is not None:  # replaced; also rebuilds the calendar
+            self.reload_database()
+        else:  # current, but this process may not have loaded it yet
+            self.build_service_calendar()
+        self.load_timetable()
+        return True
+
+    def import_and_run(
+        self, import_data: bool = False, timezone: str = "America/New_York", **kwargs
+    ) -> t.NoReturn:
+        """this is the main entrypoint for the application.
+
+        Args:
+            - `import_data (bool, optional)`: reloads the database and geojsons.\
+                Defaults to False.
+            - `timezone (str, optional)`: Timezone. Defaults to "America/New_York".
+            - `**kwargs`: Keyword arguments to pass to `nightly import`.
+        """
+
+        if (
+            self.artifacts.store
+            and not import_data
+            and self.pull_artifact()
+            and self.db_current
+        ):
+            logging.info("Serving artifact from %s", self.artifacts.store)
+        elif import_data or not self.db_exists or not self.db_current:
+            # a fresh container rebuilds from the feed cache, if there is one
+            self.nightly_import(cached=not (import_data or self.db_exists), **kwargs)
+        else:
+            self.build_service_calendar()
+            self.load_timetable()
+        if import_data or not self.geojsons_exist:
+            self.geojson_exports()
+        self.run(timezone=timezone)
+
+    def run(self, timezone: str = "America/New_York") -> t.NoReturn:
+        """Schedules jobs.
+
+        Args:
+            - `timezone (str, optional)`: Timezone. Defaults to "America/New_York".
+        """
+
+        def threader(func: t.Callable, *args, join: bool = False, **kwargs) -> None:
+            """threads a function.
+
+            Args:
+                func (Callable): Function to thread.
+                *args: Arguments for func.
+                join (bool, optional): Whether to join thread. Defaults to True.
+                **kwargs: Keyword arguments for func.
+            """
+
+            job_thread = Thread(target=func, args=args, kwargs=kwargs)
+            job_thread.start()
+            if join:
+                job_thread.join()
+
+        logging.info("Starting scheduler")
+        self.every().minute.do(threader, self.import_realtime, Alert, join=True)
+        self.every(12).seconds.do(threader, self.import_realtime, Vehicle, join=True)
+        self.every(20).seconds.do(threader, self.import_realtime, Prediction, join=True)
+        if self.artifacts.store:  # published by `app.py --build_artifact`
+            self.every().day.at("04:30", tz=timezone).do(threader, self.pull_artifact)
+        else:
+            self.every().day.at("04:00", tz=timezone).do(threader, self.geojson_exports)
+            self.every().day.at("03:30", tz=timezone).do(threader, self.nightly_import)
+        while True:
+            self.run_pending()
+            time.sleep(1)
+
+    def stop(self, full: bool = False) -> None:
+        """Stops the scheduler.
+
+        args:
+            - `full (bool, optional)`: Whether to close db connection. Defaults to False.
+        """
+        self.clear()
+        self.release_ingest_lock()
+        if full:
+            self.close()
@@ -0,0 +1,98 @@
+"""Holds the lock that elects the one process per database that ingests."""
+
+import fcntl
+import logging
+import os
+import typing as t
+
+
+class IngestElection:
+    """Elects the one process per database that ingests: \
+        it holds an `flock` on `<db>.lock`, which the os releases when it dies.
+
+    the ingestor writes each realtime generation to `<db>.generation` \
+        and replaces the timetable after each nightly import or artifact pull; \
+        the other processes follow both, see `FeedLoader.follow_ingestor`.
+
+    Args:
+        - `db_path (str)`: database the processes share
+        - `timetable_path (str)`: timetable the ingestor replaces
+    """
+
+    def __init__(self, db_path: str, timetable_path: str) -> None:
+        self.lock_path = f"{db_path}.lock"
+        self.generation_path = f"{db_path}.generation"
+        self.timetable_path = timetable_path
+        self._lock_file: t.IO[str] | None = None
+        self._timetable_stat: tuple[int, int] | None = None
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__}({self.lock_path}, "
+            f"ingestor={self.is_ingestor})>"
+        )
+
+    @property
+    def is_ingestor(self) -> bool:
+        """if this process holds the ingest lock"""
+        return self._lock_file is not None
+
+    def acquire(self) -> bool:
+        """Tries to take the ingest lock (`flock` on `self.lock_path`), without blocking; \
+            the os releases it when the holding process dies.
+
+        Returns:
+            - `bool`: if this process holds the lock
+        """
+        if self._lock_file is not None:
+            return True
+        # pylint: disable-next=consider-using-with
+        lock_file = open(self.lock_path, "a+", -1, "utf-8")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        lock_file.truncate(0)
+        lock_file.write(str(os.getpid()))
+        lock_file.flush()
+        self._lock_file = lock_file
+        return True
+
+    def release(self) -> None:
+        """Releases the ingest lock, if held."""
+        if self._lock_file is None:
+            return
+        fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+        self._lock_file.close()
+        self._lock_file = None
+
+    def read_generation(self, default: int) -> int:
+        """the last realtime generation the ingestor wrote, or `default`"""
+        try:
+            with open(self.generation_path, "r", -1, "utf-8") as file:
+                return int(file.read())
+        except (OSError, ValueError):
+            return default
+
+    def write_generation(self, generation: int) -> None:
+        """writes the realtime generation for the other processes, atomically"""
+        with open(f"{self.generation_path}.tmp", "w", -1, "utf-8") as file:
+            file.write(str(generation))
+        os.replace(f"{self.generation_path}.tmp", self.generation_path)
+
+    def follow_timetable(self, reload: t.Callable[[], t.Any]) -> None:
+        """Calls `reload` if the timetable has been replaced since it last succeeded; \
+            errors reloading (`OSError`, `ValueError`) are retried on the next call.
+
+        args:
+            - `reload (Callable[[], Any])`: reopens the database and maps the timetable
+        """
+        try:
+            # replaced, not rewritten; extracted artifacts keep their old mtime
+            stat = os.stat(self.timetable_path)
+            if (stat.st_ino, stat.st_mtime_ns) != self._timetable_stat:
+                reload()
+                self._timetable_stat = stat.st_ino, stat.st_mtime_ns
+        except (OSError, ValueError) as error:
+            logging.debug("No timetable to follow: %s", error)
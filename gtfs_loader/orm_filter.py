@@ -0,0 +1,463 @@
+"""Compiles `/api/<orm>` query params into sql where clauses and python predicates"""
+
+import itertools
+import operator
+import re
+import typing as t
+from datetime import datetime
+
+import sqlalchemy as sa
+from sqlalchemy import orm as saorm
+
+from gtfs_orms import Base
+
+NULLS = {"null", "None", "none"}
+COMP_OPS = ["<", ">", "!"]
+SUFFIXES = {"in": "IN", "notin": "NOT IN", "like": "LIKE"}
+OPERATORS: dict[str, t.Callable[[t.Any, t.Any], bool]] = {
+    "=": operator.eq,
+    "!=": operator.ne,
+    "<=": operator.le,
+    ">=": operator.ge,
+    "<": operator.lt,
+    ">": operator.gt,
+    "IS": operator.is_,
+    "IS NOT": operator.is_not,
+    "IN": lambda a, b: a in b,
+    "NOT IN": lambda a, b: a not in b,
+    "LIKE": lambda a, b: b.fullmatch(str(a)) is not None,
+}
+SQL_OPERATORS: dict[str, t.Callable[[t.Any, t.Any], sa.ColumnElement[bool]]] = (
+    OPERATORS
+    | {
+        "IN": sa.ColumnOperators.in_,
+        "NOT IN": sa.ColumnOperators.not_in,
+        "LIKE": sa.ColumnOperators.like,
+    }
+)
+_MISSING = object()
+BOOLS = {"true": True, "1": True, "yes": True, "false": False, "0": False, "no": False}
+# python type -> raw request value to it; raises `ValueError` if it can't
+COERCERS: dict[type, t.Callable[[str], t.Any]] = {
+    bool: lambda value: BOOLS.get(value.lower(), _MISSING),
+    int: lambda value: int(value) if value.lstrip("-").isdigit() else float(value),
+    float: float,
+    datetime: datetime.fromisoformat,
+    str: str,
+}
+
+
+class Filter:
+    """A single parsed `key action value` filter.
+
+    Args:
+        - `key (str)`: attribute, column, or dotted relationship path
+        - `action (str)`: one of `OPERATORS`
+        - `value (str | list[str] | None)`: raw value from the request, \
+            a list for `IN`/`NOT IN`, `None` for null checks
+    """
+
+    __slots__ = ("key", "action", "value")
+
+    def __init__(self, key: str, action: str, value: str | list[str] | None) -> None:
+        """Initializes Filter.
+
+        args:
+            - `key (str)`: attribute, column, or dotted relationship path
+            - `action (str)`: one of `OPERATORS`
+            - `value (str | list[str] | None)`: raw value, `None` for null checks
+        """
+        self.key = key
+        self.action = action
+        self.value = value
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__}({self.key} {self.action} {self.value})>"
+
+    @classmethod
+    def parse(cls, key: str, value: str) -> t.Self:
+        """parses a request arg into a Filter.
+
+        `key=value`, `key!=value`, `key<=value`, `key>=value`, \
+            `key<value` and `key>value` (the latter two arrive as a key with \
+            an empty value), `null` values for `IS`/`IS NOT`, and \
+            `key:in=a,b`, `key:notin=a,b`, `key:like=pattern%`.
+
+        args:
+            - `key (str)`: request arg key
+            - `value (str)`: request arg value\n
+        returns:
+            - `Filter`: the parsed filter
+        raises:
+            - `ValueError`: if the `:suffix` is unknown
+        """
+        if ":" in key:
+            key, suffix = key.rsplit(":", 1)
+            if suffix not in SUFFIXES:
+                raise ValueError(f"unknown filter {key}:{suffix}")
+            if (action := SUFFIXES[suffix]) == "LIKE":
+                return cls(key, action, value)
+            return cls(key, action, value.split(","))
+        if value in NULLS:
+            return cls(key.replace("!", ""), "IS NOT" if "!" in key else "IS", None)
+        op_index = next((key.find(op) for op in COMP_OPS if key.find(op) > 0), None)
+        if op_index is None:
+            return cls(key, "=", value)
+        if not value and not key[op_index] == "!":
+            return cls(key[:op_index], key[op_index], key[op_index + 1 :])
+        return cls(key[:op_index], f"{key[op_index]}=", value)
+
+    def coerced(self, _type: type) -> t.Any:
+        """returns the value coerced to a type.
+
+        args:
+            - `_type (type)`: type to coerce to\n
+        returns:
+            - `Any`: coerced value (list for `IN`), or `_MISSING` if it can't be coerced
+        """
+        if isinstance(self.value, list):
+            values = [coerce(v, _type) for v in self.value]
+            return _MISSING if any(v is _MISSING for v in values) else values
+        return coerce(self.value, _type)
+
+    def clause(self, column: sa.ColumnElement) -> sa.ColumnElement[bool]:
+        """returns the filter as a sql clause against a column.
+
+        the value is coerced to the column's python type and bound as a \
+            parameter, so every request with the same filters compiles \
+            to the same (cached) statement.
+
+        args:
+            - `column (ColumnElement)`: column to compare\n
+        returns:
+            - `ColumnElement[bool]`: where clause
+        raises:
+            - `ValueError`: if the value isn't valid for the column type
+        """
+        if self.value is None:
+            return column.is_(None) if self.action == "IS" else column.is_not(None)
+        if self.action == "LIKE":
+            return column.like(self.value)
+        _type = python_type(column)
+        if (value := self.coerced(_type)) is _MISSING:
+            raise ValueError(
+                f"{self.key}: {self.value} is not a valid {_type.__name__}"
+            )
+        if _type is datetime:  # gtfs dates are stored as imported (YYYYMMDD)
+            column, value = sa.type_coerce(column, sa.String), self.value
+        return SQL_OPERATORS[self.action](column, value)
+
+    def predicate(self) -> t.Callable[[Base], bool]:
+        """returns the filter as a python predicate on an orm instance.
+
+        the value is coerced to the type of the attribute it's compared \
+            against (once per type), so `delay>=60` compares numbers, \
+            not strings. attributes that aren't set fall back to a \
+            `get_<key>()` method, and to `False` if neither exists.
+
+        returns:
+            - `Callable[[Base], bool]`: predicate
+        """
+        key, compare, raw = self.key, OPERATORS[self.action], self.value
+        getter_name = f"get_{key}"
+        like = like_pattern(raw) if self.action == "LIKE" else None
+        coerced: dict[type, t.Any] = {}
+
+        def _predicate(obj: Base) -> bool:
+            attr = getattr(obj, key, _MISSING)
+            if attr is _MISSING:
+                if not callable(getter := getattr(obj, getter_name, None)):
+                    return False
+                attr = getter()
+            if raw is None:
+                return compare(attr, None)
+            if attr is None:
+                return False
+            if like:
+                return compare(attr, like)
+            _type = type(attr)
+            if _type not in coerced:
+                coerced[_type] = self.coerced(_type)
+            value = coerced[_type]
+            if value is _MISSING:
+                return compare(str(attr), raw)
+            return compare(attr, value)
+
+        return _predicate
+
+
+def coerce(value: str, _type: type) -> t.Any:
+    """coerces a raw request value to a python type, see `COERCERS`.
+
+    args:
+        - `value (str)`: raw value
+        - `_type (type)`: type to coerce to\n
+    returns:
+        - `Any`: coerced value, or `_MISSING` if it can't be coerced
+    """
+    if (coercer := COERCERS.get(_type)) is None:
+        return _MISSING
+    try:
+        return coercer(value)
+    except ValueError:
+        return _MISSING
+
+
+def python_type(column: sa.ColumnElement) -> type:
+    """returns the python type of a column, `str` if it doesn't have one.
+
+    args:
+        - `column (ColumnElement)`: column\n
+    returns:
+        - `type`: python type
+    """
+    try:
+        return column.type.python_type
+    except NotImplementedError:
+        return str
+
+
+def like_pattern(pattern: str) -> re.Pattern:
+    """compiles a sql `LIKE` pattern (`%`, `_`) to a regex; \
+        case insensitive, like sqlite.
+
+    args:
+        - `pattern (str)`: `LIKE` pattern\n
+    returns:
+        - `re.Pattern`: regex to `fullmatch` with
+    """
+    return re.compile(
+        "".join(
+            ".*" if char == "%" else "." if char == "_" else re.escape(char)
+            for char in pattern
+        ),
+        re.IGNORECASE | re.DOTALL,
+    )
+
+
+def compile_order_by(_orm: type[Base], order_by: str) -> list[sa.UnaryExpression]:
+    """compiles an `order_by` param, e.g. `route_id,-stop_sequence`.
+
+    args:
+        - `_orm (type[Base])`: orm to order
+        - `order_by (str)`: comma separated columns, `-` prefix for descending\n
+    returns:
+        - `list[UnaryExpression]`: order by clauses
+    raises:
+        - `ValueError`: if a key isn't a column
+    """
+    clauses: list[sa.UnaryExpression] = []
+    for key in order_by.split(","):
+        column = key.lstrip("-")
+        if column not in _orm.cols:
+            raise ValueError(f"can't order {_orm.__name__} by {column}")
+        attr = getattr(_orm, column)
+        clauses.append(attr.desc() if key.startswith("-") else attr.asc())
+    return clauses
+
+
+def _relationship_clause(
+    _orm: type[Base], path: list[str], _filter: Filter
+) -> sa.ColumnElement[bool] | None:
+    """builds an `EXISTS` clause for a dotted relationship path, \
+        e.g. `route.route_type` -> `Prediction.route.has(Route.route_type == ...)`.
+
+    args:
+        - `_orm (type[Base])`: orm the path starts from
+        - `path (list[str])`: relationship names followed by a column name
+        - `_filter (Filter)`: filter to apply to the column\n
+    returns:
+        - `ColumnElement[bool] | None`: clause, or `None` if the path doesn't resolve
+    """
+    attr, *rest = path
+    if not rest:
+        if attr not in _orm.cols:
+            return None
+        return _filter.clause(getattr(_orm, attr))
+    rel = saorm.class_mapper(_orm).relationships.get(attr)
+    if rel is None:
+        return None
+    inner = _relationship_clause(rel.mapper.class_, rest, _filter)
+    if inner is None:
+        return None
+    return _exists(_orm, attr, inner)
+
+
+def _exists(
+    _orm: type[Base], attr: str, *inner: sa.ColumnElement[bool]
+) -> sa.ColumnElement[bool]:
+    """`EXISTS` a row of relationship `attr` matching every clause"""
+    rel = getattr(_orm, attr)
+    if rel.property.uselist:
+        return rel.any(sa.and_(*inner))
+    return rel.has(sa.and_(*inner))
+
+
+def compile_filters(
+    _orm: type[Base], params: dict[str, str]
+) -> tuple[list[sa.ColumnElement[bool]], t.Callable[[Base], bool] | None]:
+    """compiles request params into sql where clauses and a single \
+        python predicate for whatever can't be expressed in sql.
+
+    - columns are compared in sql, with bound, typed parameters
+    - derived attributes with a sql version (`Base.json_expressions`, like `delay`) \
+        are compared against it
+    - dotted relationship paths (`route.route_type=3`, `stop.stop_name=...`) \
+        and `__filter_aliases__` become `EXISTS` subqueries, one per relationship: \
+        filters through the same one apply to the same related row
+    - anything else is checked in python after the query, \
+        all filters ANDed in one pass
+
+    args:
+        - `_orm (type[Base])`: orm to filter
+        - `params (dict[str, str])`: request params\n
+    returns:
+        - `tuple[list[ColumnElement[bool]], Callable[[Base], bool] | None]`: \
+            where clauses, predicate (`None` if every filter ran in sql)
+    raises:
+        - `ValueError`: if a filter is malformed or its value doesn't fit the column
+    """
+    aliases: dict[str, str] = getattr(_orm, "__filter_aliases__", {})
+    expressions = _orm.json_expressions()
+    clauses: list[sa.ColumnElement[bool]] = []
+    related: dict[str, list[sa.ColumnElement[bool]]] = {}
+    predicates: list[t.Callable[[Base], bool]] = []
+    for key, value in params.items():
+        _filter = Filter.parse(key, value)
+        if _filter.key in _orm.cols:
+            clauses.append(_filter.clause(getattr(_orm, _filter.key)))
+            continue
+        if _filter.key in expressions:
+            clauses.append(_filter.clause(expressions[_filter.key]))
+            continue
+        attr, *path = aliases.get(_filter.key, _filter.key).split(".")
+        rel = saorm.class_mapper(_orm).relationships.get(attr) if path else None
+        if (
+            rel is not None
+            and (clause := _relationship_clause(rel.mapper.class_, path, _filter))
+            is not None
+        ):
+            related.setdefault(attr, []).append(clause)
+            continue
+        predicates.append(_filter.predicate())
+    clauses.extend(_exists(_orm, attr, *inner) for attr, inner in related.items())
+    if not predicates:
+        return clauses, None
+    if len(predicates) == 1:
+        return clauses, predicates[0]
+    return clauses, lambda obj: all(p(obj) for p in predicates)
+
+
+def compile_after(_orm: type[Base], after: str) -> sa.ColumnElement[bool]:
+    """compiles an `after` cursor, the primary key(s) of the last row \
+        of the previous page, comma separated for composite keys.
+
+    args:
+        - `_orm (type[Base])`: orm to page
+        - `after (str)`: cursor\n
+    returns:
+        - `ColumnElement[bool]`: where clause for rows after the cursor
+    raises:
+        - `ValueError`: if the cursor doesn't match the primary key
+    """
+    columns = [getattr(_orm, key) for key in _orm.primary_keys]
+    values = after.split(",", len(columns) - 1)
+    if len(values) != len(columns):
+        raise ValueError(f"after must be {','.join(_orm.primary_keys)}: {after}")
+    clauses = [
+        Filter(column.key, ">", value).clause(column)
+        for column, value in zip(columns, values)
+    ]
+    if len(clauses) == 1:
+        return clauses[0]
+    return sa.tuple_(*(c.left for c in clauses)) > sa.tuple_(
+        *(c.right for c in clauses)
+    )
+
+
+def next_cursor(_orm: type[Base], row: dict[str, t.Any]) -> str:
+    """returns the `after` cursor that continues from a row.
+
+    args:
+        - `_orm (type[Base])`: orm of the row
+        - `row (dict[str, Any])`: last row of a page, as json\n
+    returns:
+        - `str`: cursor
+    """
+    return ",".join(str(row.get(key)) for key in _orm.primary_keys)
+
+
+def _object_as_json(row: sa.Row[tuple[Base]]) -> dict[str, t.Any]:
+    """`as_json()` of the orm object in a row"""
+    return row[0].as_json()
+
+
+def compile_query(
+    _orm: type[Base],
+    order_by: str | None = None,
+    limit: int | str | None = None,
+    offset: int | str | None = None,
+    after: str | None = None,
+    json_rows: bool = False,
+    **params: str,
+) -> tuple[sa.Select, t.Callable[[t.Iterable], t.Iterable]]:
+    """compiles request params into a select and a function that applies \
+        whatever has to run in python (filters + paging) to its result.
+
+    paging by `after` (keyset) orders by the primary key, \
+        so it can't be combined with `order_by`.
+
+    with `json_rows`, the function yields `as_json()` dicts; \
+        if no filter has to run in python and the orm allows it (`Base.row_json`), \
+        plain rows of `Base.json_select()` are selected rather than orm objects.
+
+    args:
+        - `_orm (type[Base])`: orm to query
+        - `order_by (str, optional)`: comma separated columns, `-` prefix for descending
+        - `limit (int, optional)`: max rows to return
+        - `offset (int, optional)`: rows to skip
+        - `after (str, optional)`: primary key(s) of the last row of the previous page
+        - `json_rows (bool, optional)`: yield `as_json()` dicts rather than rows
+        - `**params (str)`: filters, see `compile_filters`\n
+    returns:
+        - `tuple[Select, Callable[[Iterable], Iterable]]`: select, \
+            function to pass its (lazy) result through
+    raises:
+        - `ValueError`: if a param is malformed
+    """
+    clauses, predicate = compile_filters(_orm, params)
+    stmt = sa.select(_orm).where(*clauses)
+    limit = int(limit) if limit else None
+    offset = int(offset) if offset else 0
+    if offset < 0 or (limit or 0) < 0:
+        raise ValueError(f"limit/offset must be >= 0: {limit}, {offset}")
+    if after:
+        if order_by:
+            raise ValueError(
+                "after pages by primary key; it can't be used with order_by"
+            )
+        stmt = stmt.where(compile_after(_orm, after))
+    if order_by:
+        stmt = stmt.order_by(*compile_order_by(_orm, order_by))
+    elif after or limit is not None:  # pages need a stable order
+        stmt = stmt.order_by(*(getattr(_orm, key) for key in _orm.primary_keys))
+    to_json = None
+    if json_rows and not predicate and _orm.row_json:
+        stmt = stmt.with_only_columns(*_orm.json_select())
+        to_json = _orm.row_as_json
+    elif json_rows:
+        to_json = _object_as_json
+    if not predicate:
+        stmt = stmt.limit(limit).offset(offset or None)
+        return stmt, lambda rows: map(to_json, rows) if to_json else rows
+
+    def _page(rows: t.Iterable) -> t.Iterable:
+        """filters and pages rows in python"""
+        rows = itertools.islice(
+            (row for row in rows if predicate(row[0])),
+            offset,
+            offset + limit if limit is not None else None,
+        )
+        return map(to_json, rows) if to_json else rows
+
+    return stmt, _page
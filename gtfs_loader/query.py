@@ -1,359 +1,590 @@
-"""Defines a class to hold and generate queries."""
-
-# pylint: disable=unused-wildcard-import
-# pylint: disable=wildcard-import
-# pylint: disable=no-self-argument
-import datetime as dt
-import typing as t
-
-from sqlalchemy.orm import aliased
-from sqlalchemy.sql import *
-
-from gtfs_orms import *
-from helper_functions import classproperty
-
-
-class Query:
-    """
-    Class to hold and generate queries. \n
-    Called with `Query(r1, r2, ...)`
-
-    Args:
-        - `*route_types (str)`: list of route_types to query
-    """
-
-    @classproperty
-    def ferry_parking_query(cls: t.Type[t.Self]) -> Select[tuple[Base]]:
-        """
-        Returns a query for ferry parking.
-
-        Returns:
-            - `Select[tuple[Base]]`: A query for ferry parking.
-        """
-        return (
-            select(Facility)
-            .join(Stop, Facility.stop_id == Stop.stop_id)
-            .where(Stop.vehicle_type == "4")
-            .where(Facility.facility_type == "parking-area")
-        )
-
-    @staticmethod
-    def select(*orms: Base, **kwargs) -> Select[tuple[Base]]:
-        """
-        Returns a generic select query for tables.
-
-        Args:
-            - `*orms`: tables to query
-            - `**kwargs`: kwargs for select\n
-        Returns:
-            - `Select[tuple[Base]]`: A generic select query for tables.
-        """
-        return select(*orms, **kwargs)
-
-    @staticmethod
-    def delete(orm: Base) -> Delete:
-        """
-        Returns a generic delete query for a table.
-
-        args:
-            - `orm (Base)`: table to query\n
-        Returns:
-            - `Delete`: A generic delete query for a table.
-        """
-        return delete(orm)
-
-    @staticmethod
-    def update(orm: Base) -> Update:
-        """
-        Returns a generic update query for a table.
-
-        args:
-            - `orm (Base)`: table to query\n
-        returns:
-            - `Update`: A generic update query for a table.
-        """
-        return update(orm)
-
-    @staticmethod
-    def get_active_calendars_query(
-        date: dt.datetime, specific: bool = False, days_ahead: int = 7
-    ) -> Select[tuple[Base]]:
-        """
-        Returns a query for active calendars on a date.
-
-        Args:
-            - `date (datetime)`: date to query
-            - `specific (bool, optional)`: whether to query for specific date. \
-                Defaults to False (query for week)
-            - `days_ahead (int, optional)`: number of days ahead to query. Defaults to 7.\n
-        Returns:
-            - `Select[tuple[Base]]`: A query for active calendars on a date.
-        """
-        if specific:
-            return (
-                select(Calendar)
-                .join(
-                    CalendarAttribute,
-                    Calendar.service_id == CalendarAttribute.service_id,
-                )
-                .join(
-                    CalendarDate,
-                    Calendar.service_id == CalendarDate.service_id,
-                    isouter=True,
-                )
-                .where(
-                    or_(
-                        and_(
-                            CalendarAttribute.service_schedule_typicality != "6",
-                            Calendar.start_date
-                            <= (date + dt.timedelta(days=7)).strftime("%Y%m%d"),
-                            Calendar.end_date >= date.strftime("%Y%m%d"),
-                            getattr(Calendar, date.strftime("%A").lower()),
-                            not_(
-                                and_(
-                                    CalendarDate.date == date.strftime("%Y%m%d"),
-                                    CalendarDate.exception_type == "2",
-                                    CalendarDate.service_id.isnot(None),
-                                )
-                            ),
-                        ),
-                        and_(
-                            CalendarDate.date == date.strftime("%Y%m%d"),
-                            CalendarDate.exception_type == "1",
-                            CalendarDate.service_id.isnot(None),
-                            CalendarAttribute.service_schedule_typicality != "6",
-                        ),
-                    )
-                )
-            )
-
-        return (
-            select(Calendar)
-            .join(
-                CalendarAttribute, Calendar.service_id == CalendarAttribute.service_id
-            )
-            .join(
-                CalendarDate,
-                Calendar.service_id == CalendarDate.service_id,
-                isouter=True,
-            )
-            .where(
-                or_(
-                    and_(
-                        CalendarAttribute.service_schedule_typicality != "6",
-                        Calendar.start_date
-                        <= (date + dt.timedelta(days=days_ahead)).strftime("%Y%m%d"),
-                        Calendar.end_date >= date.strftime("%Y%m%d"),
-                    ),
-                    and_(
-                        CalendarDate.date == date.strftime("%Y%m%d"),
-                        CalendarDate.exception_type == "1",
-                        CalendarDate.service_id.isnot(None),
-                        CalendarAttribute.service_schedule_typicality != "6",
-                    ),
-                )
-            )
-        )
-
-    @staticmethod
-    def delete_calendars_query(*args, **kwargs) -> Delete:
-        """
-        Returns a query to delete calendars.
-
-        Args:
-            - `*args`: args for get_active_calendars_query
-            - `**kwargs`: kwargs for get_active_calendars_query \n
-        Returns:
-            - `Delete`: A query to delete calendars.
-        """
-
-        return delete(Calendar).where(
-            Calendar.service_id.notin_(
-                select(
-                    __class__.get_active_calendars_query(
-                        *args, **kwargs
-                    ).columns.service_id
-                )
-            )
-        )
-
-    @staticmethod
-    def delete_facilities_query(*exclude: str) -> Delete:
-        """Returns a query to delete facilities.
-
-        Args:
-            - `*exclude (str)`: list of facility types to exclude.
-        Returns:
-            - `Select[tuple[Base]]`: A query to delete facilities.
-        """
-
-        return delete(Facility).where(
-            Facility.facility_id.not_in(
-                select(Facility.facility_id).where(
-                    Facility.facility_type.in_(exclude), Facility.stop_id.isnot(None)
-                )
-            )
-        )
-
-    @staticmethod
-    def get_shapes_from_route_query(*routes: str) -> Select[tuple[Base]]:
-        """Returns a query for shapes.
-
-        Args:
-            - `*routes (str)`: list of routes to query. Defaults to None.\n
-        Returns:
-            - `Select[tuple[Base]]`: A query for shapes.
-        """
-        base_query = (
-            select(Shape)
-            .join(Trip, Shape.shape_id == Trip.shape_id)
-            .join(Route, Trip.route_id == Route.route_id)
-        )
-        if not routes:
-            return base_query
-        return base_query.where(Route.route_id.in_(routes))
-
-    @staticmethod
-    def get_dataset_query(realtime_name: str) -> Select[tuple[Base]]:
-        """Returns a query for linked dataset.
-
-        Args:
-            - `realtime_name (str)`: realtime name\n
-        Returns:
-            - `Select[tuple[Base]]`: A query for linked dataset."""
-        return select(LinkedDataset).where(getattr(LinkedDataset, realtime_name))
-
-    @staticmethod
-    def get_item_by_attr_query(
-        orm: t.Type[Base], param: str, param_value: Any
-    ) -> Select[tuple[Base]]:
-        """Returns a query for an item by id.
-
-        Args:
-            - `orm (t.Type[Base])`: table to query \n
-        Returns:
-            - `Select[tuple[Base]]`: A query for an item by id.
-        """
-        return select(orm).where(getattr(orm, param) == param_value)
-
-    def __init__(self, *route_types: str) -> None:
-        """Initializes Query, called with Query(r1, r2, ...)
-
-        Args:
-            - `*route_types (str)`: list of route_types to query
-        """
-        self.route_types = route_types
-        self.trip_query = self._get_trips_query()
-        self.parent_stops_query = self._get_parent_stops_query()
-
-    def __repr__(self) -> str:
-        return f"<{self.__class__.__name__}(route_types={', '.join(self.route_types)})>"
-
-    def __str__(self) -> str:
-        return self.__repr__()
-
-    def _get_trips_query(self) -> Select[tuple[Base]]:
-        """Returns a query for trips.
-
-        Returns:
-            - `Select[tuple[Base]]`: A query for trips."""
-        return (
-            select(Trip)
-            .distinct()
-            .join(Route, Trip.route_id == Route.route_id)
-            .where(
-                or_(
-                    Route.route_type.in_(self.route_types),
-                    Trip.trip_id.in_(
-                        select(Trip.trip_id)
-                        .distinct()
-                        .join(MultiRouteTrip, Trip.trip_id == MultiRouteTrip.trip_id)
-                        .join(Route, MultiRouteTrip.added_route_id == Route.route_id)
-                        .where(Route.route_type.in_(self.route_types))
-                    ),
-                )
-            )
-        )
-
-    def _get_parent_stops_query(self) -> Select[tuple[Base]]:
-        """Returns a query for parent stops.
-
-        Returns:
-            - `Select[tuple[Base]]`: A query for parent stops.
-        """
-
-        parent = aliased(Stop)
-        return (
-            select(parent)
-            .distinct()
-            .where(parent.location_type == "1")
-            .join(Stop, parent.stop_id == Stop.parent_station)
-            .join(StopTime, Stop.stop_id == StopTime.stop_id)
-            .where(StopTime.trip_id.in_(select(self.trip_query.columns.trip_id)))
-        )
-
-    def get_shapes_query(self) -> Select[tuple[Base]]:
-        """Returns a query for shapes.
-
-        Returns:
-            - `Select[tuple[Base]]`: A query for shapes."""
-        return (
-            select(Shape)
-            .distinct()
-            .join(Trip, Shape.shape_id == Trip.shape_id)
-            .where(Trip.trip_id.in_(select(self.trip_query.columns.trip_id)))
-        )
-
-    def get_routes_query(self) -> Select[tuple[Base]]:
-        """Returns a query for routes.
-
-        Returns:
-            - `Select[tuple[Base]]`: A query for routes."""
-
-        return (
-            select(Route)
-            .distinct()
-            .where(Route.route_id.in_(select(self.trip_query.columns.route_id)))
-        )
-
-    def get_vehicles_query(self, *add_routes: str) -> Select[tuple[Base]]:
-        """Returns a query for vehicles.
-
-        Args:
-            - `*add_routes (str, optional)`: list of routes to add to query for vehicles. \
-                Defaults to `None`. \n
-        Returns:
-            - `Select[tuple[Base]]`: A query for vehicles.
-        """
-
-        return (
-            select(Vehicle)
-            .distinct()
-            .join(Route, Vehicle.route_id == Route.route_id)
-            .where(
-                or_(
-                    Vehicle.route_id.in_(
-                        select(self.get_routes_query().columns.route_id)
-                    ),
-                    Vehicle.trip_id.in_(select(self.trip_query.columns.trip_id)),
-                    Vehicle.route_id.in_(add_routes or tuple()),
-                )
-            )
-        )
-
-    def get_facilities_query(self, *types: str) -> Select[tuple[Base]]:
-        """Returns a query for parking facilities.
-
-        Args:
-            - `*types (str)`: list of facility types, \n
-        Returns:
-            - `Select[tuple[Base]]`: A query for parking facilities.
-        """
-        return (
-            select(Facility)
-            .distinct()
-            .where(
-                Facility.stop_id.in_(select(self.parent_stops_query.columns.stop_id)),
-                Facility.facility_type.in_(types),
-            )
-        )
+"""Defines a class to hold and generate queries."""
+
+# pylint: disable=unused-wildcard-import
+# pylint: disable=wildcard-import
+# pylint: disable=no-self-argument
+import datetime as dt
+import typing as t
+
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql import *
+
+from gtfs_orms import *
+from helper_functions import classproperty
+
+
+class Query:
+    """
+    Class to hold and generate queries. \n
+    Called with `Query(r1, r2, ...)`
+
+    Args:
+        - `*route_types (str)`: list of route_types to query
+    """
+
+    @classproperty
+    def ferry_parking_query(cls: t.Type[t.Self]) -> Select[tuple[Base]]:
+        """
+        Returns a query for ferry parking.
+
+        Returns:
+            - `Select[tuple[Base]]`: A query for ferry parking.
+        """
+        return (
+            select(Facility)
+            .join(Stop, Facility.stop_id == Stop.stop_id)
+            .where(Stop.vehicle_type == "4")
+            .where(Facility.facility_type == "parking-area")
+        )
+
+    @staticmethod
+    def select(*orms: Base, **kwargs) -> Select[tuple[Base]]:
+        """
+        Returns a generic select query for tables.
+
+        Args:
+            - `*orms`: tables to query
+            - `**kwargs`: kwargs for select\n
+        Returns:
+            - `Select[tuple[Base]]`: A generic select query for tables.
+        """
+        return select(*orms, **kwargs)
+
+    @staticmethod
+    def delete(orm: Base) -> Delete:
+        """
+        Returns a generic delete query for a table.
+
+        args:
+            - `orm (Base)`: table to query\n
+        Returns:
+            - `Delete`: A generic delete query for a table.
+        """
+        return delete(orm)
+
+    @staticmethod
+    def update(orm: Base) -> Update:
+        """
+        Returns a generic update query for a table.
+
+        args:
+            - `orm (Base)`: table to query\n
+        returns:
+            - `Update`: A generic update query for a table.
+        """
+        return update(orm)
+
+    @staticmethod
+    def get_active_calendars_query(
+        date: dt.datetime, specific: bool = False, days_ahead: int = 7
+    ) -> Select[tuple[Base]]:
+        """
+        Returns a query for active calendars on a date.
+
+        Args:
+            - `date (datetime)`: date to query
+            - `specific (bool, optional)`: whether to query for specific date. \
+                Defaults to False (query for week)
+            - `days_ahead (int, optional)`: number of days ahead to query. Defaults to 7.\n
+        Returns:
+            - `Select[tuple[Base]]`: A query for active calendars on a date.
+        """
+        if specific:
+            return (
+                select(Calendar)
+                .join(
+                    CalendarAttribute,
+                    Calendar.service_id == CalendarAttribute.service_id,
+                )
+                .join(
+                    CalendarDate,
+                    Calendar.service_id == CalendarDate.service_id,
+                    isouter=True,
+                )
+                .where(
+                    or_(
+                        and_(
+                            CalendarAttribute.service_schedule_typicality != "6",
+                            Calendar.start_date
+                            <= (date + dt.timedelta(days=7)).strftime("%Y%m%d"),
+                            Calendar.end_date >= date.strftime("%Y%m%d"),
+                            getattr(Calendar, date.strftime("%A").lower()),
+                            not_(
+                                and_(
+                                    CalendarDate.date == date.strftime("%Y%m%d"),
+                                    CalendarDate.exception_type == "2",
+                                    CalendarDate.service_id.isnot(None),
+                                )
+                            ),
+                        ),
+                        and_(
+                            CalendarDate.date == date.strftime("%Y%m%d"),
+                            CalendarDate.exception_type == "1",
+                            CalendarDate.service_id.isnot(None),
+                            CalendarAttribute.service_schedule_typicality != "6",
+                        ),
+                    )
+                )
+            )
+
+        return (
+            select(Calendar)
+            .join(
+                CalendarAttribute, Calendar.service_id == CalendarAttribute.service_id
+            )
+            .join(
+                CalendarDate,
+                Calendar.service_id == CalendarDate.service_id,
+                isouter=True,
+            )
+            .where(
+                or_(
+                    and_(
+                        CalendarAttribute.service_schedule_typicality != "6",
+                        Calendar.start_date
+                        <= (date + dt.timedelta(days=days_ahead)).strftime("%Y%m%d"),
+                        Calendar.end_date >= date.strftime("%Y%m%d"),
+                    ),
+                    and_(
+                        CalendarDate.date == date.strftime("%Y%m%d"),
+                        CalendarDate.exception_type == "1",
+                        CalendarDate.service_id.isnot(None),
+                        CalendarAttribute.service_schedule_typicality != "6",
+                    ),
+                )
+            )
+        )
+
+    @staticmethod
+    def delete_calendars_query(*service_ids: str) -> Delete:
+        """
+        Returns a query to delete calendars.
+
+        Args:
+            - `*service_ids (str)`: service_ids to keep, \
+                see `ServiceCalendar.service_ids` \n
+        Returns:
+            - `Delete`: A query to delete calendars.
+        """
+
+        return delete(Calendar).where(Calendar.service_id.not_in(service_ids))
+
+    @staticmethod
+    def delete_facilities_query(*exclude: str) -> Delete:
+        """Returns a query to delete facilities.
+
+        Args:
+            - `*exclude (str)`: list of facility types to exclude.
+        Returns:
+            - `Select[tuple[Base]]`: A query to delete facilities.
+        """
+
+        return delete(Facility).where(
+            Facility.facility_id.not_in(
+                select(Facility.facility_id).where(
+                    Facility.facility_type.in_(exclude), Facility.stop_id.isnot(None)
+                )
+            )
+        )
+
+    @staticmethod
+    def insert_stop_routes_query() -> Insert:
+        """Returns a query to materialize `stop_routes` \
+            from `stop_times` and `trips`: one row per stop per route.
+
+        Returns:
+            - `Insert`: A query to fill `StopRoute`.
+        """
+
+        return insert(StopRoute).from_select(
+            ["stop_id", "parent_station", "route_id"],
+            select(StopTime.stop_id, Stop.parent_station, Trip.route_id)
+            .join(Stop, StopTime.stop_id == Stop.stop_id)
+            .join(Trip, StopTime.trip_id == Trip.trip_id)
+            .distinct(),
+        )
+
+    @staticmethod
+    def update_trip_summaries_query() -> Update:
+        """Returns a query to summarize each trip's `stop_times` onto the trip: \
+            last stop, first/last departure and number of stops.
+
+        Returns:
+            - `Update`: A query to fill the summary columns of `Trip`.
+        """
+
+        def _edge(value: ColumnElement, last: bool) -> ColumnElement:
+            """`value` of the first/last stop time of the trip"""
+            return (
+                select(value)
+                .where(StopTime.trip_id == Trip.trip_id)
+                .order_by(
+                    StopTime.stop_sequence.desc() if last else StopTime.stop_sequence
+                )
+                .limit(1)
+                .scalar_subquery()
+            )
+
+        return update(Trip).values(
+            last_stop_id=_edge(StopTime.stop_id, True),
+            first_departure_seconds=_edge(StopTime.departure_seconds, False),
+            last_departure_seconds=_edge(StopTime.departure_seconds, True),
+            stop_count=select(func.count())
+            .where(StopTime.trip_id == Trip.trip_id)
+            .scalar_subquery(),
+        )
+
+    @staticmethod
+    def get_timetable_query() -> Select[tuple[t.Any, ...]]:
+        """Returns a query for the columns of `Timetable`: \
+            every stop time with its trip's route and service.
+
+        Returns:
+            - `Select[tuple[Any, ...]]`: A query for the timetable.
+        """
+        return select(
+            StopTime.trip_id,
+            StopTime.stop_id,
+            StopTime.stop_sequence,
+            StopTime.arrival_seconds,
+            StopTime.departure_seconds,
+            StopTime.pickup_type,
+            func.coalesce(
+                func.nullif(StopTime.stop_headsign, ""), Trip.trip_headsign
+            ).label("headsign"),
+            Trip.route_id,
+            Trip.service_id,
+            Trip.direction_id,
+        ).join(Trip, StopTime.trip_id == Trip.trip_id)
+
+    @staticmethod
+    def get_departures_query(
+        stop_id: str,
+        now: float,
+        service_days: t.Iterable[tuple[dt.datetime, t.Collection[str]]],
+        limit: int = 3,
+        lookback: int = 3600,
+    ) -> Select[tuple[t.Any, ...]]:
+        """Returns a query for the next `limit` departures per route/direction \
+            from a stop (or a parent station's children).
+
+        scheduled `stop_times` of the active services of each service day \
+            (today, and yesterday for trips past midnight) are merged with `predictions`, \
+            plus predictions without a scheduled stop time (added trips), \
+            ranked by predicted (else scheduled) departure with a window function. \
+            stops come from `stop_routes`; the stop/time range is a scan of \
+            `ix_stop_times_stop_id_departure_seconds`.
+
+        Args:
+            - `stop_id (str)`: stop or parent station
+            - `now (float)`: unix timestamp to look ahead of
+            - `service_days (Iterable[tuple[datetime, Collection[str]]])`: \
+                service date and its active service_ids, \
+                see `ServiceCalendar.service_ids`
+            - `limit (int, optional)`: departures per route/direction. Defaults to 3.
+            - `lookback (int, optional)`: seconds before `now` to look for \
+                late trips with a prediction. Defaults to 3600.\n
+        Returns:
+            - `Select[tuple[Any, ...]]`: A query for departures.
+        """
+        stop_ids = select(StopRoute.stop_id).where(
+            or_(StopRoute.stop_id == stop_id, StopRoute.parent_station == stop_id)
+        )
+        predicted = func.nullif(Prediction.departure_time, 0)
+        # predictions of trips that aren't scheduled at the stop, e.g. added trips
+        rows = [
+            select(
+                func.coalesce(Prediction.route_id, Trip.route_id).label("route_id"),
+                func.coalesce(Prediction.direction_id, Trip.direction_id).label(
+                    "direction_id"
+                ),
+                Prediction.trip_id,
+                Prediction.stop_id,
+                Prediction.stop_sequence,
+                Stop.platform_code,
+                Trip.trip_headsign.label("headsign"),
+                null().label("scheduled_timestamp"),
+                predicted.label("predicted_timestamp"),
+                predicted.label("departure_timestamp"),
+                null().label("delay"),
+            )
+            .join(Stop, Prediction.stop_id == Stop.stop_id)
+            .join(Trip, Prediction.trip_id == Trip.trip_id, isouter=True)
+            .where(
+                Prediction.stop_id.in_(stop_ids),
+                predicted >= now,
+                ~exists().where(
+                    StopTime.trip_id == Prediction.trip_id,
+                    StopTime.stop_id == Prediction.stop_id,
+                ),
+            )
+        ]
+        for service_date, service_ids in service_days:
+            _unix_time = service_date.timestamp()
+            scheduled = StopTime.departure_seconds + literal(_unix_time)
+            departure = func.coalesce(  # pylint: disable=assignment-from-no-return
+                predicted, scheduled
+            )
+            rows.append(
+                select(
+                    Trip.route_id,
+                    Trip.direction_id,
+                    StopTime.trip_id,
+                    StopTime.stop_id,
+                    StopTime.stop_sequence,
+                    Stop.platform_code,
+                    func.coalesce(
+                        func.nullif(StopTime.stop_headsign, ""), Trip.trip_headsign
+                    ).label("headsign"),
+                    scheduled.label("scheduled_timestamp"),
+                    predicted.label("predicted_timestamp"),
+                    departure.label("departure_timestamp"),
+                    (predicted - scheduled).label("delay"),
+                )
+                .join(Trip, StopTime.trip_id == Trip.trip_id)
+                .join(Stop, StopTime.stop_id == Stop.stop_id)
+                .join(
+                    Prediction,
+                    and_(
+                        Prediction.trip_id == StopTime.trip_id,
+                        Prediction.stop_id == StopTime.stop_id,
+                    ),
+                    isouter=True,
+                )
+                .where(
+                    StopTime.stop_id.in_(stop_ids),
+                    StopTime.departure_seconds >= now - _unix_time - lookback,
+                    func.coalesce(StopTime.pickup_type, "0") != "1",
+                    Trip.service_id.in_(service_ids),
+                    departure >= now,
+                )
+            )
+        departures = union_all(*rows).subquery()
+        ranked = select(
+            departures,
+            func.row_number()
+            .over(
+                partition_by=(departures.c.route_id, departures.c.direction_id),
+                order_by=departures.c.departure_timestamp,
+            )
+            .label("rank"),
+        ).subquery()
+        return (
+            select(*(c for c in ranked.c if c.name != "rank"))
+            .where(ranked.c.rank <= limit)
+            .order_by(ranked.c.departure_timestamp)
+        )
+
+    @staticmethod
+    def get_departure_stops_query(stop_id: str) -> Select[tuple[str, str | None]]:
+        """Returns a query for the stops departures from a stop are from \
+            (itself, or a parent station's children, as in `stop_routes`), \
+            and their platform codes.
+
+        Args:
+            - `stop_id (str)`: stop or parent station\n
+        Returns:
+            - `Select[tuple[str, str | None]]`: A query for stop_id, platform_code.
+        """
+        return select(Stop.stop_id, Stop.platform_code).where(
+            Stop.stop_id.in_(
+                select(StopRoute.stop_id).where(
+                    or_(
+                        StopRoute.stop_id == stop_id,
+                        StopRoute.parent_station == stop_id,
+                    )
+                )
+            )
+        )
+
+    @staticmethod
+    def get_stop_predictions_query(
+        stop_ids: t.Collection[str],
+    ) -> Select[tuple[t.Any, ...]]:
+        """Returns a query for the predictions at stops, with the columns \
+            of `get_departures_query` that come from them.
+
+        Args:
+            - `stop_ids (Collection[str])`: stops\n
+        Returns:
+            - `Select[tuple[Any, ...]]`: A query for predictions.
+        """
+        predicted = func.nullif(Prediction.departure_time, 0)
+        return (
+            select(
+                func.coalesce(Prediction.route_id, Trip.route_id).label("route_id"),
+                func.coalesce(Prediction.direction_id, Trip.direction_id).label(
+                    "direction_id"
+                ),
+                Prediction.trip_id,
+                Prediction.stop_id,
+                Prediction.stop_sequence,
+                Trip.trip_headsign.label("headsign"),
+                predicted.label("predicted_timestamp"),
+            )
+            .join(Trip, Prediction.trip_id == Trip.trip_id, isouter=True)
+            .where(Prediction.stop_id.in_(stop_ids))
+        )
+
+    @staticmethod
+    def get_shapes_from_route_query(*routes: str) -> Select[tuple[Base]]:
+        """Returns a query for shapes.
+
+        Args:
+            - `*routes (str)`: list of routes to query. Defaults to None.\n
+        Returns:
+            - `Select[tuple[Base]]`: A query for shapes.
+        """
+        base_query = (
+            select(Shape)
+            .join(Trip, Shape.shape_id == Trip.shape_id)
+            .join(Route, Trip.route_id == Route.route_id)
+        )
+        if not routes:
+            return base_query
+        return base_query.where(Route.route_id.in_(routes))
+
+    @staticmethod
+    def get_dataset_query(realtime_name: str) -> Select[tuple[Base]]:
+        """Returns a query for linked dataset.
+
+        Args:
+            - `realtime_name (str)`: realtime name\n
+        Returns:
+            - `Select[tuple[Base]]`: A query for linked dataset."""
+        return select(LinkedDataset).where(getattr(LinkedDataset, realtime_name))
+
+    @staticmethod
+    def get_item_by_attr_query(
+        orm: t.Type[Base], param: str, param_value: Any
+    ) -> Select[tuple[Base]]:
+        """Returns a query for an item by id.
+
+        Args:
+            - `orm (t.Type[Base])`: table to query \n
+        Returns:
+            - `Select[tuple[Base]]`: A query for an item by id.
+        """
+        return select(orm).where(getattr(orm, param) == param_value)
+
+    def __init__(self, *route_types: str) -> None:
+        """Initializes Query, called with Query(r1, r2, ...)
+
+        Args:
+            - `*route_types (str)`: list of route_types to query
+        """
+        self.route_types = route_types
+        self.trip_query = self._get_trips_query()
+        self.parent_stops_query = self._get_parent_stops_query()
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__}(route_types={', '.join(self.route_types)})>"
+
+    def __str__(self) -> str:
+        return self.__repr__()
+
+    def _get_trips_query(self) -> Select[tuple[Base]]:
+        """Returns a query for trips.
+
+        Returns:
+            - `Select[tuple[Base]]`: A query for trips."""
+        return (
+            select(Trip)
+            .distinct()
+            .join(Route, Trip.route_id == Route.route_id)
+            .where(
+                or_(
+                    Route.route_type.in_(self.route_types),
+                    Trip.trip_id.in_(
+                        select(Trip.trip_id)
+                        .distinct()
+                        .join(MultiRouteTrip, Trip.trip_id == MultiRouteTrip.trip_id)
+                        .join(Route, MultiRouteTrip.added_route_id == Route.route_id)
+                        .where(Route.route_type.in_(self.route_types))
+                    ),
+                )
+            )
+        )
+
+    def _get_parent_stops_query(self) -> Select[tuple[Base]]:
+        """Returns a query for parent stops.
+
+        Returns:
+            - `Select[tuple[Base]]`: A query for parent stops.
+        """
+
+        parent = aliased(Stop)
+        return (
+            select(parent)
+            .distinct()
+            .where(parent.location_type == "1")
+            .join(Stop, parent.stop_id == Stop.parent_station)
+            .join(StopTime, Stop.stop_id == StopTime.stop_id)
+            .where(StopTime.trip_id.in_(select(self.trip_query.columns.trip_id)))
+        )
+
+    def get_shapes_query(self) -> Select[tuple[Base]]:
+        """Returns a query for shapes.
+
+        Returns:
+            - `Select[tuple[Base]]`: A query for shapes."""
+        return (
+            select(Shape)
+            .distinct()
+            .join(Trip, Shape.shape_id == Trip.shape_id)
+            .where(Trip.trip_id.in_(select(self.trip_query.columns.trip_id)))
+        )
+
+    def get_routes_query(self) -> Select[tuple[Base]]:
+        """Returns a query for routes.
+
+        Returns:
+            - `Select[tuple[Base]]`: A query for routes."""
+
+        return (
+            select(Route)
+            .distinct()
+            .where(Route.route_id.in_(select(self.trip_query.columns.route_id)))
+        )
+
+    def get_vehicles_query(self, *add_routes: str) -> Select[tuple[Base]]:
+        """Returns a query for vehicles.
+
+        Args:
+            - `*add_routes (str, optional)`: list of routes to add to query for vehicles. \
+                Defaults to `None`. \n
+        Returns:
+            - `Select[tuple[Base]]`: A query for vehicles.
+        """
+
+        return (
+            select(Vehicle)
+            .distinct()
+            .join(Route, Vehicle.route_id == Route.route_id)
+            .where(
+                or_(
+                    Vehicle.route_id.in_(
+                        select(self.get_routes_query().columns.route_id)
+                    ),
+                    Vehicle.trip_id.in_(select(self.trip_query.columns.trip_id)),
+                    Vehicle.route_id.in_(add_routes or tuple()),
+                )
+            )
+        )
+
+    def get_facilities_query(self, *types: str) -> Select[tuple[Base]]:
+        """Returns a query for parking facilities.
+
+        Args:
+            - `*types (str)`: list of facility types, \n
+        Returns:
+            - `Select[tuple[Base]]`: A query for parking facilities.
+        """
+        return (
+            select(Facility)
+            .distinct()
+            .where(
+                Facility.stop_id.in_(select(self.parent_stops_query.columns.stop_id)),
+                Facility.facility_type.in_(types),
+            )
+        )
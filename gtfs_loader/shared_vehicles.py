@@ -0,0 +1,217 @@
+"""Holds the memory-mapped, double-buffered vehicle file the ingestor \
+    publishes every realtime generation to, for the other processes to serve from."""
+
+import math
+import mmap
+import os
+import struct
+import typing as t
+
+import geojson as gj
+
+from helper_functions import json_dumps
+
+MAGIC = b"GTFSVS01"
+HEADER = struct.Struct("<8sQ")  # magic, seq of the last publish
+SLOT = struct.Struct("<QQQQ")  # seq, generation, offset, length
+DATA = 128  # payloads start here
+ALIGN = 8
+
+RECORD = struct.Struct("<ddII")  # lon, lat, id length, feature length
+COUNT = struct.Struct("<I")
+KEY = struct.Struct("<H")
+
+EncodedVehicle = tuple[str, float | None, float | None, str]
+
+
+def _aligned(size: int) -> int:
+    """`size` rounded up to `ALIGN`"""
+    return -(-size // ALIGN) * ALIGN
+
+
+def pack_vehicles(features: dict[str, list[gj.Feature]]) -> bytes:
+    """Packs vehicle features per key; a vehicle in several keys is stored once.
+
+    layout: vehicle count, then per vehicle `RECORD` + id + json encoded feature; \
+        key count, then per key its name, vehicle count and vehicle indexes.
+
+    args:
+        - `features (dict[str, list[Feature]])`: key -> vehicle features\n
+    returns:
+        - `bytes`: payload for `SharedVehicles.write`
+    """
+    index: dict[str, int] = {}
+    records: list[bytes] = []
+    keys: list[bytes] = [COUNT.pack(len(features))]
+    for key, key_features in features.items():
+        indexes: list[int] = []
+        for feature in key_features:
+            if feature["id"] not in index:
+                index[feature["id"]] = len(index)
+                coordinates = (feature.get("geometry") or {}).get("coordinates")
+                lon, lat = coordinates[:2] if coordinates else (math.nan, math.nan)
+                _id, encoded = str(feature["id"]).encode(), json_dumps(feature)
+                records.append(
+                    RECORD.pack(lon, lat, len(_id), len(encoded)) + _id + encoded
+                )
+            indexes.append(index[feature["id"]])
+        name = key.encode()
+        keys.append(KEY.pack(len(name)) + name + COUNT.pack(len(indexes)))
+        keys.append(struct.pack(f"<{len(indexes)}I", *indexes))
+    return b"".join([COUNT.pack(len(records)), *records, *keys])
+
+
+def unpack_vehicles(payload: bytes) -> dict[str, list[EncodedVehicle]]:
+    """Unpacks `pack_vehicles`.
+
+    args:
+        - `payload (bytes)`: packed vehicles\n
+    returns:
+        - `dict[str, list[tuple[str, float | None, float | None, str]]]`: \
+            key -> vehicle id, lon, lat (`None` without geometry), json encoded feature
+    """
+    (count,), offset = COUNT.unpack_from(payload), COUNT.size
+    vehicles: list[EncodedVehicle] = []
+    for _ in range(count):
+        lon, lat, id_size, size = RECORD.unpack_from(payload, offset)
+        offset += RECORD.size
+        _id = payload[offset : offset + id_size].decode()
+        encoded = payload[offset + id_size : offset + id_size + size].decode()
+        offset += id_size + size
+        if math.isnan(lon):
+            lon = lat = None
+        vehicles.append((_id, lon, lat, encoded))
+    (count,), offset = COUNT.unpack_from(payload, offset), offset + COUNT.size
+    keys: dict[str, list[EncodedVehicle]] = {}
+    for _ in range(count):
+        (size,) = KEY.unpack_from(payload, offset)
+        key = payload[offset + KEY.size : offset + KEY.size + size].decode()
+        offset += KEY.size + size
+        (size,), offset = COUNT.unpack_from(payload, offset), offset + COUNT.size
+        indexes = struct.unpack_from(f"<{size}I", payload, offset)
+        offset += 4 * size
+        keys[key] = [vehicles[i] for i in indexes]
+    return keys
+
+
+class SharedVehicles:
+    """A file one process writes payloads to and any number map and read, \
+        without locks: two slots are written alternately (double buffering), \
+        so the last published payload stays intact while the next is written.
+
+    the header holds the seq of the last publish; each slot its seq, \
+        generation, offset and length. a writer zeroes a slot's seq before \
+        overwriting it, so a reader that sees the same seq before and after \
+        copying a slot read it whole (a seqlock).
+
+    Args:
+        - `path (str)`: file to write or read
+        - `writable (bool, optional)`: if this process publishes. Defaults to False.
+    """
+
+    def __init__(self, path: str, writable: bool = False) -> None:
+        self.path = path
+        self.writable = writable
+        self._file: t.BinaryIO | None = None
+        self._map: mmap.mmap | None = None
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__}({self.path}@{self.seq})>"
+
+    def _mapped(self, size: int = 0) -> mmap.mmap | None:
+        """maps the file, remapping it if it's smaller than `size`; \
+            writers create it and grow it to `size`."""
+        if self._map is not None and len(self._map) >= max(size, DATA):
+            return self._map
+        self.close()
+        if self.writable:
+            # pylint: disable-next=consider-using-with
+            self._file = open(self.path, "a+b")
+            if os.fstat(self._file.fileno()).st_size < max(size, DATA):
+                self._file.truncate(max(size, DATA))
+        else:
+            try:
+                # pylint: disable-next=consider-using-with
+                self._file = open(self.path, "rb")
+            except OSError:
+                return None
+            if os.fstat(self._file.fileno()).st_size < max(size, DATA):
+                self.close()
+                return None
+        self._map = mmap.mmap(
+            self._file.fileno(),
+            0,
+            access=mmap.ACCESS_WRITE if self.writable else mmap.ACCESS_READ,
+        )
+        return self._map
+
+    @property
+    def seq(self) -> int:
+        """seq of the last publish, 0 if there's none"""
+        mapped = self._mapped()
+        if mapped is None or mapped[: len(MAGIC)] != MAGIC:
+            return 0
+        return HEADER.unpack_from(mapped)[1]
+
+    def write(self, generation: int, payload: bytes) -> int:
+        """Publishes a payload to the slot not holding the last one.
+
+        args:
+            - `generation (int)`: realtime generation of the payload
+            - `payload (bytes)`: see `pack_vehicles`\n
+        returns:
+            - `int`: seq of this publish
+        """
+        if not self.writable:
+            raise PermissionError(f"{self} isn't writable")
+        seq = self.seq + 1
+        mapped = self._mapped()
+        slot = HEADER.size + (seq & 1) * SLOT.size
+        other_seq, _, other_offset, other_length = SLOT.unpack_from(
+            mapped, HEADER.size + (~seq & 1) * SLOT.size
+        )
+        offset = DATA
+        if other_seq and DATA + len(payload) > other_offset:  # doesn't fit before it
+            offset = _aligned(other_offset + other_length)
+        mapped = self._mapped(offset + len(payload))
+        SLOT.pack_into(mapped, slot, 0, 0, 0, 0)
+        mapped[offset : offset + len(payload)] = payload
+        SLOT.pack_into(mapped, slot, seq, generation, offset, len(payload))
+        HEADER.pack_into(mapped, 0, MAGIC, seq)
+        mapped.flush()
+        return seq
+
+    def read(self, retries: int = 3) -> tuple[int, int, bytes] | None:
+        """Reads the last published payload.
+
+        args:
+            - `retries (int, optional)`: times to retry if it's overwritten while read. \
+                Defaults to 3.\n
+        returns:
+            - `tuple[int, int, bytes] | None`: seq, generation and payload; \
+                `None` if nothing's been published or it kept changing
+        """
+        for _ in range(retries):
+            seq = self.seq
+            if not seq:
+                return None
+            slot = HEADER.size + (seq & 1) * SLOT.size
+            slot_seq, generation, offset, length = SLOT.unpack_from(self._map, slot)
+            if slot_seq != seq:
+                continue
+            mapped = self._mapped(offset + length)
+            if mapped is None:
+                return None
+            payload = mapped[offset : offset + length]
+            if SLOT.unpack_from(mapped, slot)[0] == seq:
+                return seq, generation, payload
+        return None
+
+    def close(self) -> None:
+        """unmaps and closes the file"""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,247 @@
+"""Holds the memory-mapped, columnar timetable built from `stop_times`."""
+
+import json
+import os
+import typing as t
+
+import numpy as np
+import pandas as pd
+
+MAGIC = b"GTFSTT02"  # bumped when the layout changes; older files are rebuilt
+ALIGN = 8
+
+
+def _aligned(size: int) -> int:
+    """`size` rounded up to `ALIGN`"""
+    return -(-size // ALIGN) * ALIGN
+
+
+def _index_dtype(size: int) -> type[np.integer]:
+    """smallest dtype that can index `size` things"""
+    return np.uint16 if size <= np.iinfo(np.uint16).max else np.int32
+
+
+class _Interned(t.NamedTuple):
+    """a string table of the header: the strings, and their index"""
+
+    ids: list[str]
+    index: dict[str, int]
+
+    @classmethod
+    def of(cls, ids: list[str]) -> t.Self:
+        """interns `ids`"""
+        return cls(ids, {value: i for i, value in enumerate(ids)})
+
+
+def _build(
+    stop_times: pd.DataFrame,
+) -> tuple[dict[str, list[str]], dict[str, np.ndarray]]:
+    """assembles the string tables and arrays of a timetable, see `Timetable.write`.
+
+    args:
+        - `stop_times (pd.DataFrame)`: see `Timetable.write`\n
+    returns:
+        - `tuple[dict[str, list[str]], dict[str, ndarray]]`: string tables, arrays
+    """
+    stop_times = stop_times.sort_values(["trip_id", "stop_sequence"], kind="stable")
+    codes: dict[str, np.ndarray] = {}
+    tables: dict[str, list[str]] = {}
+    for column in ("stop_id", "trip_id", "route_id", "service_id", "headsign"):
+        codes[column], ids = pd.factorize(stop_times[column].fillna(""))
+        tables[f"{column}s"] = list(ids)
+    trip_offsets = np.searchsorted(
+        codes["trip_id"], np.arange(len(tables["trip_ids"]) + 1)
+    )
+    arrival, departure = (
+        stop_times[column].fillna(-1).to_numpy(np.int32)
+        for column in ("arrival_seconds", "departure_seconds")
+    )
+    # stop order only holds where riders can board, see `Timetable.departures`
+    boards = np.flatnonzero(stop_times["pickup_type"].fillna("0").astype(str) != "1")
+    stop_order = boards[np.lexsort((departure[boards], codes["stop_id"][boards]))]
+    return tables, {
+        "stop": codes["stop_id"].astype(_index_dtype(len(tables["stop_ids"]))),
+        "stop_sequence": stop_times["stop_sequence"].to_numpy(np.uint16),
+        "arrival": arrival,
+        "departure": departure,
+        "headsign": codes["headsign"].astype(_index_dtype(len(tables["headsigns"]))),
+        "trip_offsets": trip_offsets.astype(np.int32),
+        "trip_route": codes["route_id"][trip_offsets[:-1]].astype(
+            _index_dtype(len(tables["route_ids"]))
+        ),
+        "trip_service": codes["service_id"][trip_offsets[:-1]].astype(
+            _index_dtype(len(tables["service_ids"]))
+        ),
+        "trip_direction": stop_times["direction_id"]
+        .fillna(-1)
+        .to_numpy(np.int8)[trip_offsets[:-1]],
+        "stop_trip": codes["trip_id"][stop_order].astype(
+            _index_dtype(len(tables["trip_ids"]))
+        ),
+        "stop_row": stop_order.astype(np.int32),
+        "stop_departure": departure[stop_order],
+        "stop_offsets": np.searchsorted(
+            codes["stop_id"][stop_order], np.arange(len(tables["stop_ids"]) + 1)
+        ).astype(np.int32),
+    }
+
+
+class Timetable:
+    """Read-only timetable on numpy arrays, memory-mapped from one file \
+        written after the nightly import (see `Feed.build_derived_tables`), \
+        so schedule lookups don't go through sqlite or orm objects \
+        and every process mapping the file shares its pages.
+
+    stop_ids, trip_ids, route_ids, service_ids and headsigns are interned: \
+        the arrays hold their index in the string tables of the header.
+
+    - stop times in trip order (`stop`, `stop_sequence`, `arrival`, `departure`, \
+        `headsign`), sliced by `trip_offsets`
+    - stop times riders can board at, in stop, then departure order \
+        (`stop_trip`, `stop_departure`, and `stop_row` into the trip order), \
+        sliced by `stop_offsets`
+    - per trip: `trip_route`, `trip_service`, `trip_direction`
+
+    times are seconds past the start of the service day, `-1` where missing.
+
+    Args:
+        - `path (str)`: file written by `Timetable.write`
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        buffer = np.memmap(path, dtype=np.uint8, mode="r")  # the arrays are views
+        if bytes(buffer[: len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} is not a timetable")
+        start = len(MAGIC) + 8
+        size = int(buffer[len(MAGIC) : start].view("<u8")[0])
+        header: dict[str, t.Any] = json.loads(bytes(buffer[start : start + size]))
+        data = _aligned(start + size)
+        self.stops = _Interned.of(header["stop_ids"])
+        self.trips = _Interned.of(header["trip_ids"])
+        self.routes = _Interned.of(header["route_ids"])
+        self.services = _Interned.of(header["service_ids"])
+        self.headsigns: list[str] = header["headsigns"]
+        self.arrays: dict[str, np.ndarray] = {
+            name: buffer[data + offset : data + offset + nbytes].view(dtype)
+            for name, (dtype, offset, nbytes) in header["arrays"].items()
+        }
+
+    def __repr__(self) -> str:
+        return (
+            f"<{self.__class__.__name__}({self.path}: {len(self.arrays['stop'])} "
+            f"stop times, {len(self.trips.ids)} trips, {len(self.stops.ids)} stops)>"
+        )
+
+    @staticmethod
+    def write(path: str, stop_times: pd.DataFrame) -> None:
+        """Writes a timetable file, replacing `path` atomically.
+
+        args:
+            - `path (str)`: file to write
+            - `stop_times (pd.DataFrame)`: `trip_id`, `stop_id`, `stop_sequence`, \
+                `arrival_seconds`, `departure_seconds`, `pickup_type`, `headsign`, \
+                `route_id`, `service_id`, `direction_id`; \
+                see `Query.get_timetable_query`
+        """
+        tables, arrays = _build(stop_times)
+        layout, offset = {}, 0
+        for name, array in arrays.items():
+            layout[name] = (array.dtype.str, offset, array.nbytes)
+            offset += _aligned(array.nbytes)
+        header = tables | {"arrays": layout}
+        encoded = json.dumps(header).encode()
+        with open(f"{path}.tmp", "wb") as file:
+            file.write(MAGIC)
+            file.write(np.uint64(len(encoded)).tobytes())
+            file.write(encoded)
+            data = _aligned(file.tell())
+            for name, array in arrays.items():  # offsets are relative to `data`
+                file.seek(data + layout[name][1])
+                file.write(array.tobytes())
+        os.replace(f"{path}.tmp", path)
+
+    def stops_of_trip(self, trip_id: str) -> list[tuple[str, int, int, int]]:
+        """Returns the stop times of a trip, in order.
+
+        args:
+            - `trip_id (str)`: trip\n
+        returns:
+            - `list[tuple[str, int, int, int]]`: stop_id, stop_sequence, \
+                arrival and departure seconds
+        """
+        trip = self.trips.index.get(trip_id)
+        if trip is None:
+            return []
+        rows = slice(*self.arrays["trip_offsets"][trip : trip + 2])
+        return [
+            (self.stops.ids[stop], sequence, arrival, departure)
+            for stop, sequence, arrival, departure in zip(
+                self.arrays["stop"][rows].tolist(),
+                self.arrays["stop_sequence"][rows].tolist(),
+                self.arrays["arrival"][rows].tolist(),
+                self.arrays["departure"][rows].tolist(),
+            )
+        ]
+
+    def departures(
+        self,
+        stop_id: str,
+        start: int,
+        end: int | None = None,
+        service_ids: t.Collection[str] | None = None,
+    ) -> list[tuple[str, str, int, int, int, str]]:
+        """Returns the departures from a stop between two times; \
+            stop times without pickup (`pickup_type` 1) aren't departures.
+
+        args:
+            - `stop_id (str)`: stop
+            - `start (int)`: seconds past the start of the service day, inclusive
+            - `end (int, optional)`: seconds past the start of the service day, \
+                inclusive. Defaults to None (the last departure).
+            - `service_ids (Collection[str], optional)`: only trips of these services, \
+                see `ServiceCalendar.service_ids`. Defaults to None (all).\n
+        returns:
+            - `list[tuple[str, str, int, int, int, str]]`: trip_id, route_id, \
+                direction_id, stop_sequence, departure seconds, headsign; by departure
+        """
+        stop = self.stops.index.get(stop_id)
+        if stop is None:
+            return []
+        first, last = self.arrays["stop_offsets"][stop : stop + 2]
+        departures = self.arrays["stop_departure"][first:last]
+        rows = np.arange(  # missing departures (-1) sort first
+            first + np.searchsorted(departures, max(start, 0), "left"),
+            last if end is None else first + np.searchsorted(departures, end, "right"),
+        )
+        if service_ids is not None:
+            rows = rows[
+                np.isin(
+                    self.arrays["trip_service"][self.arrays["stop_trip"][rows]],
+                    [
+                        self.services.index[s]
+                        for s in service_ids
+                        if s in self.services.index
+                    ],
+                )
+            ]
+        trips = self.arrays["stop_trip"][rows]
+        rows = self.arrays["stop_row"][rows]  # into the trip order
+        return [
+            (
+                self.trips.ids[trip],
+                self.routes.ids[route],
+                direction,
+                sequence,
+                departure,
+                self.headsigns[headsign],
+            )
+            for trip, route, direction, sequence, departure, headsign in zip(
+                trips.tolist(),
+                self.arrays["trip_route"][trips].tolist(),
+                self.arrays["trip_direction"][trips].tolist(),
+                self.arrays["stop_sequence"][rows].tolist(),
+                self.arrays["departure"][rows].tolist(),
+                self.arrays["headsign"][rows].tolist(),
+            )
+        ]
@@ -0,0 +1,237 @@
+"""Holds the in-memory vehicle snapshot and the spatial grid it's served from."""
+
+import math
+import typing as t
+
+import geojson as gj
+
+from helper_functions import json_dumps
+
+BBox = tuple[float, float, float, float]
+
+
+def sse_message(data: str, event: str | None = None, _id: int | None = None) -> str:
+    """formats a server-sent event.
+
+    args:
+        - `data (str)`: event data, single line
+        - `event (str, optional)`: event name. Defaults to None (message).
+        - `_id (int, optional)`: event id. Defaults to None.\n
+    returns:
+        - `str`: the event, ready to write to a `text/event-stream`
+    """
+    message = f"event: {event}\n" if event else ""
+    if _id is not None:
+        message += f"id: {_id}\n"
+    return f"{message}data: {data}\n\n"
+
+
+def parse_bbox(value: str | None) -> BBox | None:
+    """parses a `min_lon,min_lat,max_lon,max_lat` string, \
+        which is what leaflet's `LatLngBounds.toBBoxString()` returns.
+
+    args:
+        - `value (str | None)`: bbox string, usually a request arg\n
+    returns:
+        - `tuple[float, float, float, float] | None`: bbox, or `None` if not given
+    raises:
+        - `ValueError`: if the bbox is malformed
+    """
+    if not value:
+        return None
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(v) for v in value.split(","))
+    except ValueError as error:
+        raise ValueError(
+            f"bbox must be min_lon,min_lat,max_lon,max_lat: {value}"
+        ) from error
+    if min_lon > max_lon or min_lat > max_lat:
+        raise ValueError(f"bbox min > max: {value}")
+    return min_lon, min_lat, max_lon, max_lat
+
+
+class SpatialGrid:
+    """Uniform lon/lat grid that buckets items by cell \
+        so a bbox lookup only touches the cells it overlaps.
+
+    Args:
+        - `cell_size (float, optional)`: size of a cell in degrees. Defaults to 0.02 (~2km).
+    """
+
+    def __init__(self, cell_size: float = 0.02) -> None:
+        """Initializes an empty SpatialGrid.
+
+        args:
+            - `cell_size (float, optional)`: size of a cell in degrees. Defaults to 0.02.
+        """
+        self.cell_size = cell_size
+        self.cells: dict[tuple[int, int], list[tuple[float, float, t.Any]]] = {}
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__}(cells={len(self.cells)}, cell_size={self.cell_size})>"  # pylint: disable=line-too-long
+
+    def _cell(self, lon: float, lat: float) -> tuple[int, int]:
+        """returns the cell a coordinate falls in"""
+        return math.floor(lon / self.cell_size), math.floor(lat / self.cell_size)
+
+    def insert(self, lon: float, lat: float, item: t.Any) -> None:
+        """Inserts an item at a coordinate.
+
+        args:
+            - `lon (float)`: longitude
+            - `lat (float)`: latitude
+            - `item (Any)`: item to store
+        """
+        self.cells.setdefault(self._cell(lon, lat), []).append((lon, lat, item))
+
+    def query(self, bbox: BBox) -> t.Generator[t.Any, None, None]:
+        """yields every item within a bbox.
+
+        args:
+            - `bbox (tuple[float, float, float, float])`: min_lon, min_lat, max_lon, max_lat\n
+        yields:
+            - `Any`: items within the bbox
+        """
+        min_lon, min_lat, max_lon, max_lat = bbox
+        min_x, min_y = self._cell(min_lon, min_lat)
+        max_x, max_y = self._cell(max_lon, max_lat)
+        if (max_x - min_x + 1) * (max_y - min_y + 1) > len(self.cells):
+            cells = (  # zoomed way out; cheaper to walk what's populated
+                c
+                for (x, y), c in self.cells.items()
+                if min_x <= x <= max_x and min_y <= y <= max_y
+            )
+        else:
+            cells = (
+                self.cells.get((x, y), ())
+                for x in range(min_x, max_x + 1)
+                for y in range(min_y, max_y + 1)
+            )
+        for cell in cells:
+            for lon, lat, item in cell:
+                if min_lon <= lon <= max_lon and min_lat <= lat <= max_lat:
+                    yield item
+
+
+class VehicleSnapshot:
+    """Vehicle features for one key at one realtime generation.
+
+    features are json encoded once when the snapshot is built, \
+        so serving a request is a bbox lookup + string join.
+
+    Args:
+        - `generation (int)`: realtime generation the snapshot was built from
+        - `features (list[Feature])`: vehicle features
+        - `cell_size (float, optional)`: grid cell size in degrees. Defaults to 0.02.
+    """
+
+    def __init__(
+        self, generation: int, features: list[gj.Feature], cell_size: float = 0.02
+    ) -> None:
+        """Initializes VehicleSnapshot, encoding each feature.
+
+        args:
+            - `generation (int)`: realtime generation the snapshot was built from
+            - `features (list[Feature])`: vehicle features
+            - `cell_size (float, optional)`: grid cell size in degrees. Defaults to 0.02.
+        """
+        self.generation = generation
+        self.encoded: dict[str, str] = {}
+        self.grid = SpatialGrid(cell_size)
+        for feature in features:
+            self.encoded[feature["id"]] = json_dumps(feature).decode()
+            if feature.get("geometry"):
+                self.grid.insert(*feature["geometry"]["coordinates"][:2], feature["id"])
+
+    @classmethod
+    def from_encoded(
+        cls,
+        generation: int,
+        vehicles: t.Iterable[tuple[str, float | None, float | None, str]],
+        cell_size: float = 0.02,
+    ) -> "VehicleSnapshot":
+        """builds a snapshot from features that are already encoded, \
+            see `shared_vehicles.unpack_vehicles`.
+
+        args:
+            - `generation (int)`: realtime generation the features are from
+            - `vehicles (Iterable[tuple[str, float | None, float | None, str]])`: \
+                vehicle id, lon, lat (`None` without geometry), json encoded feature
+            - `cell_size (float, optional)`: grid cell size in degrees. Defaults to 0.02.\n
+        returns:
+            - `VehicleSnapshot`: the snapshot
+        """
+        snapshot = cls(generation, [], cell_size)
+        for _id, lon, lat, encoded in vehicles:
+            snapshot.encoded[_id] = encoded
+            if lon is not None:
+                snapshot.grid.insert(lon, lat, _id)
+        return snapshot
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__}(generation={self.generation}, vehicles={len(self.encoded)})>"  # pylint: disable=line-too-long
+
+    def __len__(self) -> int:
+        return len(self.encoded)
+
+    def ids(self, bbox: BBox | None = None) -> list[str]:
+        """returns vehicle ids in the snapshot, optionally within a bbox.
+
+        args:
+            - `bbox (tuple[float, float, float, float], optional)`: bbox to filter on\n
+        returns:
+            - `list[str]`: vehicle ids
+        """
+        if bbox is None:
+            return list(self.encoded)
+        return list(self.grid.query(bbox))
+
+    def diff(
+        self, previous: "VehicleSnapshot", bbox: BBox | None = None
+    ) -> tuple[list[str], list[str]]:
+        """returns what changed since a previous snapshot.
+
+        args:
+            - `previous (VehicleSnapshot)`: snapshot to compare against
+            - `bbox (tuple[float, float, float, float], optional)`: bbox to filter on\n
+        returns:
+            - `tuple[list[str], list[str]]`: added/updated ids, removed ids
+        """
+        current = self.ids(bbox)
+        changed = [
+            _id for _id in current if previous.encoded.get(_id) != self.encoded[_id]
+        ]
+        current = set(current)
+        return changed, [_id for _id in previous.ids(bbox) if _id not in current]
+
+    def dumps_delta(self, previous: "VehicleSnapshot", bbox: BBox | None = None) -> str:
+        """returns the changes since a previous snapshot as an encoded \
+            `FeatureCollection` of added/updated features, with the \
+            removed vehicle ids under `removed`.
+
+        args:
+            - `previous (VehicleSnapshot)`: snapshot to compare against
+            - `bbox (tuple[float, float, float, float], optional)`: bbox to filter on\n
+        returns:
+            - `str`: json encoded delta
+        """
+        changed, removed = self.diff(previous, bbox)
+        features = ",".join(self.encoded[_id] for _id in changed)
+        return (
+            f'{{"type":"FeatureCollection","generation":{self.generation},'
+            f'"features":[{features}],"removed":{json_dumps(removed).decode()}}}'
+        )
+
+    def dumps(self, bbox: BBox | None = None) -> str:
+        """returns the snapshot as an encoded `FeatureCollection`.
+
+        args:
+            - `bbox (tuple[float, float, float, float], optional)`: bbox to filter on\n
+        returns:
+            - `str`: json encoded `FeatureCollection`
+        """
+        features = ",".join(self.encoded[_id] for _id in self.ids(bbox))
+        return (
+            f'{{"type":"FeatureCollection","generation":{self.generation},'
+            f'"features":[{features}]}}'
+        )
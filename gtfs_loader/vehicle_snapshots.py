@@ -0,0 +1,314 @@
+"""Holds the vehicle snapshots a process serves, and the streams subscribed to them."""
+
+import queue
+import typing as t
+from collections import deque
+from threading import Lock
+
+from sqlalchemy import orm as saorm
+
+from gtfs_orms import Vehicle
+
+from .query import Query
+from .shared_vehicles import SharedVehicles, pack_vehicles, unpack_vehicles
+from .vehicle_snapshot import VehicleSnapshot, sse_message
+
+if t.TYPE_CHECKING:
+    from .feed_loader import FeedLoader
+
+SnapshotKey = tuple[str, tuple[str, ...]]
+
+
+class _Channel:  # pylint: disable=too-few-public-methods
+    """the stream subscribers of one key/include, \
+        and the last snapshot pushed to them (deltas are diffed against it)"""
+
+    __slots__ = ("subscribers", "pushed")
+
+    def __init__(self, pushed: VehicleSnapshot) -> None:
+        self.subscribers: set[queue.Queue[str]] = set()
+        self.pushed = pushed
+
+
+class VehicleStream:
+    """An open `/vehicles/stream`, from `VehicleSnapshots.stream`: \
+        iterates server-sent events, a `snapshot` then a `delta` per push.
+
+    the wsgi server calls `close` when the response ends (or the client leaves), \
+        which unsubscribes, even if it was never iterated.
+
+    Args:
+        - `snapshots (VehicleSnapshots)`: what it's subscribed to
+        - `cache_key (SnapshotKey)`: key and include it's subscribed to
+        - `subscriber (Queue[str])`: the events pushed to it
+        - `keepalive (float)`: seconds between keepalive comments
+    """
+
+    __slots__ = ("snapshots", "cache_key", "subscriber", "keepalive")
+
+    def __init__(
+        self,
+        snapshots: "VehicleSnapshots",
+        cache_key: SnapshotKey,
+        subscriber: "queue.Queue[str]",
+        keepalive: float,
+    ) -> None:
+        self.snapshots = snapshots
+        self.cache_key = cache_key
+        self.subscriber = subscriber
+        self.keepalive = keepalive
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__}({self.cache_key})>"
+
+    def __iter__(self) -> t.Iterator[str]:
+        while True:
+            try:
+                yield self.subscriber.get(timeout=self.keepalive)
+            except queue.Empty:
+                yield ": keepalive\n\n"
+
+    def close(self) -> None:
+        """Unsubscribes; safe to call more than once."""
+        self.snapshots.unsubscribe(self.cache_key, self.subscriber)
+
+
+class VehicleSnapshots:
+    """Vehicle snapshots of a `FeedLoader`, per key and include: \
+        built at most once per realtime generation (or loaded from `shared`, \
+        the vehicles the ingestor publishes), with a short history for \
+        `/vehicles?since=`, and pushed to `/vehicles/stream` subscribers.
+
+    Args:
+        - `feed_loader (FeedLoader)`: feed the vehicles and generation are from
+        - `path (str)`: shared vehicle file, see `SharedVehicles`
+    """
+
+    SNAPSHOT_CACHE_SIZE = 32
+    SNAPSHOT_HISTORY = 6
+    STREAM_QUEUE_SIZE = 8
+    # each open stream holds a server thread; past this, clients poll `/vehicles?since=`
+    STREAM_MAX_SUBSCRIBERS = 16
+    # what static/js/map.js asks for; published to `shared` every generation
+    SHARED_VEHICLE_INCLUDE = ("next_stop", "route", "stop_time", "trip_properties")
+
+    def __init__(self, feed_loader: "FeedLoader", path: str) -> None:
+        self.feed_loader = feed_loader
+        self.shared = SharedVehicles(path)
+        self._shared_seq = 0
+        self._snapshots: dict[SnapshotKey, deque[VehicleSnapshot]] = {}
+        self._locks: dict[SnapshotKey, Lock] = {}
+        self._channels: dict[SnapshotKey, _Channel] = {}
+        self._subscriber_lock = Lock()
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__}(snapshots={len(self._snapshots)})>"
+
+    @staticmethod
+    def vehicle_include(*include: str) -> tuple[str, ...]:
+        """normalizes what to include with vehicles: stripped, deduplicated, sorted.
+
+        args:
+            - `*include (str)`: other orms to include, as requested\n
+        returns:
+            - `tuple[str, ...]`: the includes
+        raises:
+            - `ValueError`: if one isn't a relationship of `Vehicle` \
+                or in `Vehicle.trip_includes`
+        """
+        included = {i.strip() for i in include} - {""}
+        if unknown := included.difference(
+            saorm.class_mapper(Vehicle).relationships.keys(), Vehicle.trip_includes
+        ):
+            raise ValueError(f"Can't include {', '.join(sorted(unknown))}.")
+        return tuple(sorted(included))
+
+    @classmethod
+    def _snapshot_key(cls, key: str, *include: str) -> SnapshotKey:
+        """normalizes a key + include into a snapshot cache key"""
+        return key, cls.vehicle_include(*include)
+
+    def share(self, writable: bool) -> None:
+        """Reopens `shared`, writable for the ingestor.
+
+        args:
+            - `writable (bool)`: if this process publishes to it
+        """
+        self.shared.close()
+        self.shared = SharedVehicles(self.shared.path, writable=writable)
+
+    def clear(self) -> None:
+        """Drops every snapshot, e.g. after the database is replaced."""
+        self._snapshots.clear()
+        self._locks.clear()
+        self._shared_seq = 0
+
+    def get(self, key: str, *include: str) -> VehicleSnapshot:
+        """returns the vehicle snapshot for a key, \
+            rebuilding it if there's been a realtime import since it was built.
+
+        concurrent requests for the same key/include wait on one rebuild.
+
+        args:
+            - `key (str)`: the type of data to export (RAPID_TRANSIT, BUS, etc.)
+            - `*include (str)`: other orms to include\n
+        returns:
+            - `VehicleSnapshot`: the latest vehicle snapshot
+        """
+        cache_key = self._snapshot_key(key, *include)
+        history = self._snapshots.get(cache_key)
+        if history and history[-1].generation == self.feed_loader.generation:
+            return history[-1]
+        with self._locks.setdefault(cache_key, Lock()):
+            history = self._snapshots.get(cache_key)
+            generation = self.feed_loader.generation
+            if history and history[-1].generation == generation:
+                return history[-1]
+            features = self.feed_loader.get_vehicles_feature(
+                key, Query(*self.feed_loader.keys_dict[key]), *cache_key[1]
+            )
+            if features is None:  # failed; serve what we have
+                return history[-1] if history else VehicleSnapshot(generation, [])
+            snapshot = VehicleSnapshot(generation, features["features"])
+            self._store(cache_key, snapshot)
+        return snapshot
+
+    def get_since(
+        self, key: str, generation: int, *include: str
+    ) -> tuple[VehicleSnapshot, VehicleSnapshot | None]:
+        """returns the latest vehicle snapshot for a key, \
+            along with the snapshot at `generation` if it's still held.
+
+        args:
+            - `key (str)`: the type of data to export (RAPID_TRANSIT, BUS, etc.)
+            - `generation (int)`: generation the client last saw
+            - `*include (str)`: other orms to include\n
+        returns:
+            - `tuple[VehicleSnapshot, VehicleSnapshot | None]`: latest snapshot, \
+                snapshot at `generation` or `None` if it's fallen out of the history
+        """
+        snapshot = self.get(key, *include)
+        history = self._snapshots.get(self._snapshot_key(key, *include), ())
+        return snapshot, next(
+            (s for s in list(history) if s.generation == generation), None
+        )
+
+    def _store(self, cache_key: SnapshotKey, snapshot: VehicleSnapshot) -> None:
+        """appends a snapshot to its history, replacing one of the same generation"""
+        history = self._snapshots.pop(cache_key, None) or deque(
+            maxlen=self.SNAPSHOT_HISTORY
+        )
+        if history and history[-1].generation == snapshot.generation:
+            history.pop()
+        history.append(snapshot)
+        self._snapshots[cache_key] = history
+        while len(self._snapshots) > self.SNAPSHOT_CACHE_SIZE:
+            evicted = next(iter(self._snapshots))
+            del self._snapshots[evicted]
+            self._locks.pop(evicted, None)
+
+    def publish_shared(self) -> None:
+        """Publishes every key's vehicles (with `SHARED_VEHICLE_INCLUDE`) \
+            at the current generation to `shared`, \
+            for every process to serve without sqlite; ingestor only."""
+        features = self.feed_loader.get_vehicle_features(
+            self.feed_loader.keys_dict, *self.SHARED_VEHICLE_INCLUDE
+        )
+        if features is None:
+            return
+        self.shared.write(self.feed_loader.generation, pack_vehicles(features))
+        self.load_shared()
+
+    def load_shared(self) -> None:
+        """Loads the last vehicles published to `shared` as snapshots, \
+            if they're new."""
+        shared = self.shared.read()
+        if shared is None or shared[0] == self._shared_seq:
+            return
+        self._shared_seq, generation, payload = shared
+        for key, vehicles in unpack_vehicles(payload).items():
+            cache_key = self._snapshot_key(key, *self.SHARED_VEHICLE_INCLUDE)
+            with self._locks.setdefault(cache_key, Lock()):
+                self._store(
+                    cache_key, VehicleSnapshot.from_encoded(generation, vehicles)
+                )
+
+    def publish(self) -> None:
+        """pushes vehicle changes to stream subscribers.
+
+        this is the single producer: each subscribed key/include snapshot \
+            is rebuilt once and its delta from the last snapshot pushed \
+            to that key/include is fanned out to every subscriber. \
+            the snapshot history isn't the baseline: `publish_shared` and \
+            `/vehicles` requests store the new generation before this runs.
+        """
+        with self._subscriber_lock:
+            targets = {k: (c, list(c.subscribers)) for k, c in self._channels.items()}
+        for cache_key, (channel, subscribers) in targets.items():
+            previous = channel.pushed
+            snapshot = self.get(cache_key[0], *cache_key[1])
+            if snapshot is previous:
+                continue
+            message = sse_message(
+                snapshot.dumps_delta(previous), "delta", snapshot.generation
+            )
+            channel.pushed = snapshot
+            for subscriber in subscribers:
+                try:
+                    subscriber.put_nowait(message)
+                except queue.Full:  # fell behind; start it over from a snapshot
+                    with subscriber.mutex:
+                        subscriber.queue.clear()
+                    subscriber.put_nowait(
+                        sse_message(snapshot.dumps(), "snapshot", snapshot.generation)
+                    )
+
+    def stream(
+        self, key: str, *include: str, keepalive: float = 15
+    ) -> VehicleStream | None:
+        """subscribes to a key's vehicles, queueing a `snapshot` to send on connect; \
+            at most `STREAM_MAX_SUBSCRIBERS` are open at once.
+
+        args:
+            - `key (str)`: the type of data to export (RAPID_TRANSIT, BUS, etc.)
+            - `*include (str)`: other orms to include
+            - `keepalive (float, optional)`: seconds between keepalive comments.\
+                Defaults to 15.\n
+        returns:
+            - `VehicleStream | None`: the server-sent events, \
+                `None` if `STREAM_MAX_SUBSCRIBERS` streams are open
+        """
+        cache_key = self._snapshot_key(key, *include)
+        subscriber: queue.Queue[str] = queue.Queue(self.STREAM_QUEUE_SIZE)
+        snapshot = self.get(key, *include)
+        with self._subscriber_lock:
+            if (
+                sum(len(c.subscribers) for c in self._channels.values())
+                >= self.STREAM_MAX_SUBSCRIBERS
+            ):
+                return None
+            # later deltas are from `pushed`, which is this snapshot or older
+            subscriber.put_nowait(
+                sse_message(snapshot.dumps(), "snapshot", snapshot.generation)
+            )
+            self._channels.setdefault(cache_key, _Channel(snapshot)).subscribers.add(
+                subscriber
+            )
+        return VehicleStream(self, cache_key, subscriber, keepalive)
+
+    def unsubscribe(
+        self, cache_key: SnapshotKey, subscriber: "queue.Queue[str]"
+    ) -> None:
+        """removes a stream subscriber, and its key/include once it has none.
+
+        args:
+            - `cache_key (SnapshotKey)`: key and include it subscribed to
+            - `subscriber (Queue[str])`: its queue
+        """
+        with self._subscriber_lock:
+            channel = self._channels.get(cache_key)
+            if channel is None:
+                return
+            channel.subscribers.discard(subscriber)
+            if not channel.subscribers:
+                del self._channels[cache_key]
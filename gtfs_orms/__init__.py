@@ -1,24 +1,29 @@
-"""initialize and import all gtfs_schedule business objects"""
-
-# pylint: disable=unused-import
-
-from .agency import Agency
-from .alert import Alert
-from .base import Base
-from .calendar import Calendar
-from .calendar_attribute import CalendarAttribute
-from .calendar_date import CalendarDate
-from .facility import Facility
-from .facility_property import FacilityProperty
-from .linked_datasets import LinkedDataset
-from .multi_route_trip import MultiRouteTrip
-from .prediction import Prediction
-from .route import Route
-from .shape import Shape
-from .shape_point import ShapePoint
-from .stop import Stop
-from .stop_time import StopTime
-from .transfer import Transfer
-from .trip import Trip
-from .trip_property import TripProperty
-from .vehicle import Vehicle
+"""initialize and import all gtfs_schedule business objects"""
+
+# pylint: disable=unused-import
+
+from .agency import Agency
+from .alert import Alert
+from .alert_active_period import AlertActivePeriod
+from .alert_informed_entity import AlertInformedEntity
+from .base import Base
+from .calendar import Calendar
+from .calendar_attribute import CalendarAttribute
+from .calendar_date import CalendarDate
+from .facility import Facility
+from .facility_property import FacilityProperty
+from .linked_datasets import LinkedDataset
+from .multi_route_trip import MultiRouteTrip
+from .prediction import Prediction
+from .route import Route
+from .service_calendar import ServiceCalendar
+from .shape import Shape
+from .shape_point import ShapePoint
+from .stop import Stop
+from .stop_route import StopRoute
+from .stop_time import StopTime
+from .transfer import Transfer
+from .trip import Trip
+from .trip_property import TripProperty
+from .vehicle import Vehicle
+from .vehicle_record import VehicleRecord
@@ -1,66 +1,122 @@
-"""File to hold the Alert class and its associated methods."""
-
-import typing as t
-
-from sqlalchemy.orm import Mapped, mapped_column, reconstructor, relationship
-
-from .base import Base
-
-if t.TYPE_CHECKING:
-    from .route import Route
-    from .stop import Stop
-    from .trip import Trip
-
-
-class Alert(Base):
-    """Alert
-
-    realtime class for the `service_alerts` feed.
-
-    `source`: https://cdn.mbta.com/realtime/Alerts.pb
-
-    https://github.com/google/transit/blob/master/gtfs-realtime/spec/en/reference.md#message-alert
-
-    """
-
-    __tablename__ = "alerts"
-    __realtime_name__ = "service_alerts"
-
-    alert_id: Mapped[str] = mapped_column(primary_key=True)
-    cause: Mapped[t.Optional[str]]
-    effect: Mapped[t.Optional[str]]
-    severity: Mapped[t.Optional[str]]
-    stop_id: Mapped[t.Optional[str]]
-    agency_id: Mapped[t.Optional[str]]
-    route_id: Mapped[t.Optional[str]]
-    route_type: Mapped[t.Optional[str]]
-    direction_id: Mapped[t.Optional[str]]
-    trip_id: Mapped[t.Optional[str]]
-    active_period_end: Mapped[t.Optional[int]]
-    header: Mapped[t.Optional[str]]
-    description: Mapped[t.Optional[str]]
-    url: Mapped[t.Optional[str]]
-    active_period_start: Mapped[t.Optional[int]]
-    timestamp: Mapped[t.Optional[int]]
-
-    route: Mapped["Route"] = relationship(
-        back_populates="alerts",
-        primaryjoin="foreign(Alert.route_id)==Route.route_id",
-        viewonly=True,
-    )
-    trip: Mapped["Trip"] = relationship(
-        back_populates="alerts",
-        primaryjoin="foreign(Alert.trip_id)==Trip.trip_id",
-        viewonly=True,
-    )
-    stop: Mapped["Stop"] = relationship(
-        back_populates="alerts",
-        primaryjoin="foreign(Alert.stop_id)==Stop.stop_id",
-        viewonly=True,
-    )
-
-    @reconstructor
-    def _init_on_load_(self):
-        """Loads active_period_end and active_period_start as datetime objects."""
-        # pylint: disable=attribute-defined-outside-init
-        self.url = self.url or "https://www.mbta.com/"
+"""File to hold the Alert class and its associated methods."""
+
+import functools
+import typing as t
+
+from sqlalchemy import ColumnElement, func, select
+from sqlalchemy.orm import Mapped, mapped_column, reconstructor, relationship
+
+from .base import Base
+
+if t.TYPE_CHECKING:
+    from .alert_active_period import AlertActivePeriod
+    from .alert_informed_entity import AlertInformedEntity
+    from .route import Route
+    from .stop import Stop
+    from .trip import Trip
+
+
+class Alert(Base):
+    """Alert
+
+    realtime class for the `service_alerts` feed. \
+        the entities it informs and the periods it's active \
+        are in `AlertInformedEntity` and `AlertActivePeriod`.
+
+    `source`: https://cdn.mbta.com/realtime/Alerts.pb
+
+    https://github.com/google/transit/blob/master/gtfs-realtime/spec/en/reference.md#message-alert
+
+    """
+
+    __tablename__ = "alerts"
+    __realtime_name__ = "service_alerts"
+    __filter_aliases__ = {
+        "agency_id": "informed_entities.agency_id",
+        "route_id": "informed_entities.route_id",
+        "route_type": "informed_entities.route_type",
+        "direction_id": "informed_entities.direction_id",
+        "stop_id": "informed_entities.stop_id",
+        "trip_id": "informed_entities.trip_id",
+    }
+    __json_attrs__ = ("active_period_start", "active_period_end")
+
+    alert_id: Mapped[str] = mapped_column(primary_key=True)
+    cause: Mapped[t.Optional[str]]
+    effect: Mapped[t.Optional[str]]
+    severity: Mapped[t.Optional[str]]
+    header: Mapped[t.Optional[str]]
+    description: Mapped[t.Optional[str]]
+    url: Mapped[t.Optional[str]]
+    timestamp: Mapped[t.Optional[int]]
+
+    informed_entities: Mapped[list["AlertInformedEntity"]] = relationship(
+        back_populates="alert",
+        primaryjoin="Alert.alert_id==foreign(AlertInformedEntity.alert_id)",
+        order_by="AlertInformedEntity.index",
+        viewonly=True,
+    )
+    active_periods: Mapped[list["AlertActivePeriod"]] = relationship(
+        back_populates="alert",
+        primaryjoin="Alert.alert_id==foreign(AlertActivePeriod.alert_id)",
+        order_by="AlertActivePeriod.index",
+        viewonly=True,
+    )
+    routes: Mapped[list["Route"]] = relationship(
+        back_populates="alerts",
+        secondary="alert_informed_entities",
+        primaryjoin="Alert.alert_id==foreign(AlertInformedEntity.alert_id)",
+        secondaryjoin="foreign(AlertInformedEntity.route_id)==Route.route_id",
+        viewonly=True,
+    )
+    trips: Mapped[list["Trip"]] = relationship(
+        back_populates="alerts",
+        secondary="alert_informed_entities",
+        primaryjoin="Alert.alert_id==foreign(AlertInformedEntity.alert_id)",
+        secondaryjoin="foreign(AlertInformedEntity.trip_id)==Trip.trip_id",
+        viewonly=True,
+    )
+    stops: Mapped[list["Stop"]] = relationship(
+        back_populates="alerts",
+        secondary="alert_informed_entities",
+        primaryjoin="Alert.alert_id==foreign(AlertInformedEntity.alert_id)",
+        secondaryjoin="foreign(AlertInformedEntity.stop_id)==Stop.stop_id",
+        viewonly=True,
+    )
+
+    @reconstructor
+    def _init_on_load_(self):
+        """Loads active_period_end and active_period_start as datetime objects."""
+        # pylint: disable=attribute-defined-outside-init
+        self.url = self.url or "https://www.mbta.com/"
+
+    @functools.cached_property
+    def active_period_start(self) -> int | None:
+        """start of the first active period"""
+        return self.active_periods[0].start if self.active_periods else None
+
+    @functools.cached_property
+    def active_period_end(self) -> int | None:
+        """end of the first active period"""
+        return self.active_periods[0].end if self.active_periods else None
+
+    @classmethod
+    def json_expressions(cls) -> dict[str, ColumnElement]:
+        """`_init_on_load_` and the first active period in sql, \
+            see `Base.json_expressions`"""
+        periods = cls.metadata.tables["alert_active_periods"]
+
+        def _first_period(column: ColumnElement[int]) -> ColumnElement[int]:
+            return (
+                select(column)
+                .where(periods.c.alert_id == cls.alert_id)
+                .order_by(periods.c.index)
+                .limit(1)
+                .scalar_subquery()
+            )
+
+        return {
+            "url": func.coalesce(func.nullif(cls.url, ""), "https://www.mbta.com/"),
+            "active_period_start": _first_period(periods.c.start),
+            "active_period_end": _first_period(periods.c.end),
+        }
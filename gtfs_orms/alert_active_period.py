@@ -0,0 +1,37 @@
+"""File to hold the AlertActivePeriod class and its associated methods."""
+
+import typing as t
+
+from sqlalchemy import Index
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from .base import Base
+
+if t.TYPE_CHECKING:
+    from .alert import Alert
+
+
+class AlertActivePeriod(Base):
+    """AlertActivePeriod
+
+    realtime; one row per period an `Alert` is active, \
+        imported along with it from the `service_alerts` feed. \
+        `start`/`end` are unix timestamps, either may be open.
+
+    https://github.com/google/transit/blob/master/gtfs-realtime/spec/en/reference.md#message-timerange
+
+    """
+
+    __tablename__ = "alert_active_periods"
+    __table_args__ = (Index("ix_alert_active_periods_alert_id", "alert_id"),)
+
+    alert_id: Mapped[str]
+    start: Mapped[t.Optional[int]]
+    end: Mapped[t.Optional[int]]
+    index: Mapped[int] = mapped_column(primary_key=True)
+
+    alert: Mapped["Alert"] = relationship(
+        back_populates="active_periods",
+        primaryjoin="foreign(AlertActivePeriod.alert_id)==Alert.alert_id",
+        viewonly=True,
+    )
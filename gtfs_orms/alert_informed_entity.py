@@ -0,0 +1,45 @@
+"""File to hold the AlertInformedEntity class and its associated methods."""
+
+import typing as t
+
+from sqlalchemy import Index
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from .base import Base
+
+if t.TYPE_CHECKING:
+    from .alert import Alert
+
+
+class AlertInformedEntity(Base):
+    """AlertInformedEntity
+
+    realtime; one row per entity an `Alert` informs, \
+        imported along with it from the `service_alerts` feed.
+
+    https://github.com/google/transit/blob/master/gtfs-realtime/spec/en/reference.md#message-entityselector
+
+    """
+
+    __tablename__ = "alert_informed_entities"
+    __table_args__ = (
+        Index("ix_alert_informed_entities_alert_id", "alert_id"),
+        Index("ix_alert_informed_entities_route_id_stop_id", "route_id", "stop_id"),
+        Index("ix_alert_informed_entities_stop_id", "stop_id"),
+        Index("ix_alert_informed_entities_trip_id", "trip_id"),
+    )
+
+    alert_id: Mapped[str]
+    agency_id: Mapped[t.Optional[str]]
+    route_id: Mapped[t.Optional[str]]
+    route_type: Mapped[t.Optional[str]]
+    direction_id: Mapped[t.Optional[int]]
+    stop_id: Mapped[t.Optional[str]]
+    trip_id: Mapped[t.Optional[str]]
+    index: Mapped[int] = mapped_column(primary_key=True)
+
+    alert: Mapped["Alert"] = relationship(
+        back_populates="informed_entities",
+        primaryjoin="foreign(AlertInformedEntity.alert_id)==Alert.alert_id",
+        viewonly=True,
+    )
@@ -1,159 +1,356 @@
-"""Holds the base class for all GTFS elements"""
-
-import json
-import time
-import typing as t
-
-from sqlalchemy import orm
-
-from helper_functions import classproperty
-
-# pylint: disable=unused-argument
-
-
-class Base(orm.DeclarativeBase):
-    """Base class for all GTFS elements
-
-    Attributes:
-        `__tablename__ (str)`: name of the table
-        `__table_args__ (dict[str, Any])`: table arguments
-        `__filename__ (str)`: name of the associated txt file, if applicable
-        `__realtime_name__ (str)`: name of the realtime operation in LinkedDatasets, if applicable
-    """
-
-    __filename__: str
-    __realtime_name__: str
-    # __table_args__ = {"sqlite_autoincrement": False, "sqlite_with_rowid": False}
-
-    # pylint: disable=no-self-argument
-    @classproperty
-    def primary_keys(cls: t.Type[t.Self]) -> list[str]:
-        """list of string columns as the primary keys for the class."""
-        return [key.name for key in cls.__table__.columns if key.primary_key]
-
-    @classproperty
-    def cols(cls: t.Type[t.Self]) -> list[str]:
-        """list of string columns for the class."""
-        return cls.__table__.columns.keys()
-
-    def __repr__(self) -> str:
-        return f"<{self.__class__.__name__}({', '.join(key + '=' + str(getattr(self, key, None)) for key in self.primary_keys)})>"  # pylint: disable=line-too-long
-
-    def __str__(self) -> str:
-        return str(self.as_dict())
-
-    def __eq__(self, other: t.Self) -> bool:
-        """Implements equality operator.
-
-        Returns:
-            bool: whether the objects are equal
-        """
-        if not isinstance(other, self.__class__):
-            raise NotImplementedError(
-                f"Cannot compare {self.__class__} to {other.__class__}"
-            )
-        return all(
-            getattr(self, key) == getattr(other, key) for key in self.primary_keys
-        )
-
-    def __lt__(self, other: t.Self) -> bool:
-        """Implements less than operator.
-
-        Returns:
-            bool: whether the object is less than the other
-        """
-        if not isinstance(other, self.__class__):
-            raise NotImplementedError(
-                f"Cannot compare {self.__class__} to {other.__class__}"
-            )
-        return all(
-            getattr(self, key) < getattr(other, key) for key in self.primary_keys
-        )
-
-    def __hash__(self) -> int:
-        """Implements hash operator."""
-
-        return hash(tuple(getattr(self, key) for key in self.primary_keys))
-
-    def __bool__(self) -> bool:
-        """Implements bool operator. \\
-            Also represents whether the object is valid to be added to the database."""
-
-        return all(getattr(self, key, None) is not None for key in self.primary_keys)
-
-    def as_json(self, *include, **kwargs) -> dict[str, t.Any]:
-        """Returns a json searizable representation of \
-            the object as opposed to Base.as_dict() which returns a dict.
-            
-        Args:
-            - `*include`: other orm attars to include within the dict
-            - `**kwargs`: unused, but can be used in overriden methods to \
-                pass in additional arguments \n
-        Returns:
-            - `dict[str, Any]`: json searizable representation of the object
-        """
-
-        return {
-            k: v
-            for k, v in self.as_dict(*include).items()
-            if not k.startswith("_") and _is_json_searializable(v)
-        } | {"timestamp": getattr(self, "timestamp", time.time())}
-
-    def _as_json_dict(self) -> dict[str, t.Any]:
-        """Returns a dict representation of the object
-        
-        args:
-            - `*include`: other orm attars to include within the dict
-            - `**kwargs`: unused, but can be used in overriden methods to \
-                pass in additional arguments \n
-        returns:
-            - `dict[str, Any]`: dict representation of the object
-        """
-
-        return {
-            k: v
-            for k, v in self.__dict__.items()
-            if not k.startswith("_") and _is_json_searializable(v)
-        }
-
-    def as_dict(self, *include, **kwargs) -> dict[str, t.Any]:
-        """Returns a dict representation of the object, front-facing.\
-        Override this method to change the `dict `representation.
-        
-        Args:
-            - `*include`: other orm attars to include within the dict
-            - `**kwargs`: unused, but can be used in overriden methods to \
-                pass in additional arguments \n
-        Returns:
-            - `dict[str, Any]`: dict representation of the object
-        """
-        # pylint: disable=protected-access
-
-        new_dict = self.__dict__.copy()
-        new_dict.pop("_sa_instance_state", None)
-        for attr in include:
-            if not hasattr(self, attr):
-                continue
-            attar_val = getattr(self, attr)
-            if isinstance(attar_val, Base):
-                new_dict[attr] = attar_val._as_json_dict()
-            if isinstance(attar_val, list):
-                new_dict[attr] = [
-                    d._as_json_dict() if isinstance(d, Base) else d for d in attar_val
-                ]
-        return new_dict
-
-
-def _is_json_searializable(obj: t.Any) -> bool:
-    """Checks if an object is JSON serializable.
-
-    Args:
-        - `obj (Any)`: Object to check. \n
-    Returns:
-        - `bool`: Whether the object is JSON serializable.
-    """
-    try:
-        json.dumps(obj)
-        return True
-    except TypeError:
-        return False
+"""Holds the base class for all GTFS elements"""
+
+import functools
+import operator
+import time
+import typing as t
+
+from sqlalchemy import ColumnElement, Row, orm
+
+from helper_functions import classproperty
+
+# pylint: disable=unused-argument
+
+_JSON_TYPES = (str, int, float, bool, type(None))
+
+
+class Base(orm.DeclarativeBase):
+    """Base class for all GTFS elements
+
+    Attributes:
+        `__tablename__ (str)`: name of the table
+        `__table_args__ (dict[str, Any])`: table arguments
+        `__filename__ (str)`: name of the associated txt file, if applicable
+        `__realtime_name__ (str)`: name of the realtime operation in LinkedDatasets, if applicable
+        `__filter_aliases__ (dict[str, str])`: non-column attributes that map to a \
+            relationship column (`stop_name` -> `stop.stop_name`), \
+            so `/api` filters on them run in sql
+        `__json_attrs__ (tuple[str, ...])`: json native non-column attributes \
+            (set in a reconstructor, or cached properties); serialized along with \
+            the columns without being checked by `as_json`, not when included \
+            in another object's json
+        `__row_json__ (bool | None)`: whether `as_json()` (without includes) can be built \
+            from a plain row of `json_select()`; by default, whether `as_json` and `as_dict` \
+            aren't overridden
+    """
+
+    __filename__: str
+    __realtime_name__: str
+    __filter_aliases__: dict[str, str] = {}
+    __json_attrs__: tuple[str, ...] = ()
+    __row_json__: bool | None = None
+    # __table_args__ = {"sqlite_autoincrement": False, "sqlite_with_rowid": False}
+
+    # pylint: disable=no-self-argument
+    @classproperty
+    def primary_keys(cls: t.Type[t.Self]) -> list[str]:
+        """list of string columns as the primary keys for the class."""
+        return [key.name for key in cls.__table__.columns if key.primary_key]
+
+    @classproperty
+    def cols(cls: t.Type[t.Self]) -> list[str]:
+        """list of string columns for the class."""
+        return cls.__table__.columns.keys()
+
+    @classproperty
+    def json_cols(cls: t.Type[t.Self]) -> frozenset[str]:
+        """columns whose type is json native, so their values don't need checking."""
+        return _json_cols(cls)
+
+    @classproperty
+    def row_json(cls: t.Type[t.Self]) -> bool:
+        """whether `as_json()` can skip the orm object, see `__row_json__`."""
+        if cls.__row_json__ is not None:
+            return cls.__row_json__
+        return cls.as_json is Base.as_json and cls.as_dict is Base.as_dict
+
+    @classmethod
+    def json_expressions(cls) -> dict[str, ColumnElement]:
+        """sql versions of derived attributes (reconstructors, cached properties), \
+            for `json_select()` and `/api` filters. override along with the attribute.
+
+        returns:
+            - `dict[str, ColumnElement]`: attribute name -> expression, \
+                replaces the column of the same name
+        """
+        return {}
+
+    @classmethod
+    def json_select(cls) -> list[ColumnElement]:
+        """columns to select to build `as_json()` from a row, \
+            with `json_expressions()` computed in sql.
+
+        returns:
+            - `list[ColumnElement]`: labeled columns
+        """
+        expressions = cls.json_expressions()
+        columns = cls.__table__.columns
+        return [
+            expressions[c.key].label(c.key) if c.key in expressions else c
+            for c in columns
+        ] + [e.label(k) for k, e in expressions.items() if k not in columns]
+
+    @classmethod
+    def row_as_json(cls, row: Row) -> dict[str, t.Any]:
+        """`as_json()` of a row of `json_select()`, without loading the object.
+
+        args:
+            - `row (Row)`: row of `json_select()`\n
+        returns:
+            - `dict[str, Any]`: json searizable representation of the row
+        """
+        return _row_serializer(cls)(row)
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__}({', '.join(key + '=' + str(getattr(self, key, None)) for key in self.primary_keys)})>"  # pylint: disable=line-too-long
+
+    def __str__(self) -> str:
+        return str(self.as_dict())
+
+    def __eq__(self, other: t.Self) -> bool:
+        """Implements equality operator.
+
+        Returns:
+            bool: whether the objects are equal
+        """
+        if not isinstance(other, self.__class__):
+            raise NotImplementedError(
+                f"Cannot compare {self.__class__} to {other.__class__}"
+            )
+        return all(
+            getattr(self, key) == getattr(other, key) for key in self.primary_keys
+        )
+
+    def __lt__(self, other: t.Self) -> bool:
+        """Implements less than operator.
+
+        Returns:
+            bool: whether the object is less than the other
+        """
+        if not isinstance(other, self.__class__):
+            raise NotImplementedError(
+                f"Cannot compare {self.__class__} to {other.__class__}"
+            )
+        return all(
+            getattr(self, key) < getattr(other, key) for key in self.primary_keys
+        )
+
+    def __hash__(self) -> int:
+        """Implements hash operator."""
+
+        return hash(tuple(getattr(self, key) for key in self.primary_keys))
+
+    def __bool__(self) -> bool:
+        """Implements bool operator. \\
+            Also represents whether the object is valid to be added to the database."""
+
+        return all(getattr(self, key, None) is not None for key in self.primary_keys)
+
+    def as_json(self, *include, **kwargs) -> dict[str, t.Any]:
+        """Returns a json searizable representation of \
+            the object as opposed to Base.as_dict() which returns a dict.
+            
+        Args:
+            - `*include`: other orm attars to include within the dict
+            - `**kwargs`: unused, but can be used in overriden methods to \
+                pass in additional arguments \n
+        Returns:
+            - `dict[str, Any]`: json searizable representation of the object
+        """
+
+        if self.__class__.as_dict is Base.as_dict:
+            json_dict = _serializer(self.__class__)(self, include)
+        else:  # overridden, so go through it
+            json_cols = self.json_cols
+            json_dict = {
+                k: v
+                for k, v in self.as_dict(*include).items()
+                if not k.startswith("_")
+                and (k in json_cols or _is_json_searializable(v))
+            }
+        return json_dict | {"timestamp": getattr(self, "timestamp", time.time())}
+
+    def _as_json_dict(self) -> dict[str, t.Any]:
+        """Returns a dict representation of the object
+        
+        args:
+            - `*include`: other orm attars to include within the dict
+            - `**kwargs`: unused, but can be used in overriden methods to \
+                pass in additional arguments \n
+        returns:
+            - `dict[str, Any]`: dict representation of the object
+        """
+
+        return _serializer(self.__class__, json_attrs=False)(self)
+
+    def as_dict(self, *include, **kwargs) -> dict[str, t.Any]:
+        """Returns a dict representation of the object, front-facing.\
+        Override this method to change the `dict `representation.
+        
+        Args:
+            - `*include`: other orm attars to include within the dict
+            - `**kwargs`: unused, but can be used in overriden methods to \
+                pass in additional arguments \n
+        Returns:
+            - `dict[str, Any]`: dict representation of the object
+        """
+
+        new_dict = self.__dict__.copy()
+        new_dict.pop("_sa_instance_state", None)
+        return _add_included(self, include, new_dict)
+
+
+def _add_included(
+    obj: Base, include: t.Iterable[str], _dict: dict[str, t.Any]
+) -> dict[str, t.Any]:
+    """Adds included orm attributes to a dict, \
+        as dicts (or lists of dicts) of the related objects.
+
+    Args:
+        - `obj (Base)`: object the attributes belong to
+        - `include (Iterable[str])`: orm attributes to include
+        - `_dict (dict[str, Any])`: dict to add to \n
+    Returns:
+        - `dict[str, Any]`: the same dict
+    """
+    # pylint: disable=protected-access
+    for attr in include:
+        if not hasattr(obj, attr):
+            continue
+        attar_val = getattr(obj, attr)
+        if isinstance(attar_val, Base):
+            _dict[attr] = attar_val._as_json_dict()
+        if isinstance(attar_val, list):
+            _dict[attr] = [
+                d._as_json_dict() if isinstance(d, Base) else d for d in attar_val
+            ]
+    return _dict
+
+
+def _is_json_searializable(obj: t.Any) -> bool:
+    """Checks if an object is JSON serializable, \
+        by type rather than by encoding it.
+
+    Args:
+        - `obj (Any)`: Object to check. \n
+    Returns:
+        - `bool`: Whether the object is JSON serializable.
+    """
+    if isinstance(obj, _JSON_TYPES):
+        return True
+    if isinstance(obj, (list, tuple)):
+        return all(_is_json_searializable(o) for o in obj)
+    if isinstance(obj, dict):
+        return all(
+            isinstance(k, _JSON_TYPES) and _is_json_searializable(v)
+            for k, v in obj.items()
+        )
+    return False
+
+
+@functools.cache
+def _json_cols(cls: t.Type[Base]) -> frozenset[str]:
+    """Returns the columns of a class whose python type is json native.
+
+    Args:
+        - `cls (Type[Base])`: orm class \n
+    Returns:
+        - `frozenset[str]`: column names
+    """
+    json_cols = set()
+    for column in cls.__table__.columns:
+        try:
+            if column.type.python_type in _JSON_TYPES:
+                json_cols.add(column.key)
+        except NotImplementedError:
+            pass
+    return frozenset(json_cols)
+
+
+@functools.cache
+def _serializer(
+    cls: t.Type[Base], json_attrs: bool = True
+) -> t.Callable[[Base, t.Iterable[str]], dict[str, t.Any]]:
+    """Builds the json serializer for a class.
+
+    json native columns are read in one go with an `itemgetter` and \
+        `__json_attrs__` with an `attrgetter` (computing cached properties); \
+        anything else set on the instance is type checked.
+
+    Args:
+        - `cls (Type[Base])`: orm class
+        - `json_attrs (bool, optional)`: get `__json_attrs__`; included objects \
+            don't, so they don't load what they're computed from. Defaults to True.\n
+    Returns:
+        - `Callable[[Base, Iterable[str]], dict[str, Any]]`: serializer, \
+            takes an instance and the orm attributes to include
+    """
+    json_cols = _json_cols(cls)
+    columns = tuple(k for k in cls.cols if k in json_cols)
+    attrs = tuple(cls.__json_attrs__) if json_attrs else ()
+    known = frozenset(columns + attrs)
+    get_columns = _tuple_getter(operator.itemgetter, columns)
+    get_attrs = _tuple_getter(operator.attrgetter, attrs)
+
+    def _serialize(obj: Base, include: t.Iterable[str] = ()) -> dict[str, t.Any]:
+        _dict = obj.__dict__
+        try:
+            json_dict = dict(zip(columns, get_columns(_dict)))
+            extra = _dict.keys() - known
+        except KeyError:  # not (yet) loaded; check everything
+            json_dict, extra = {}, _dict.keys() - attrs
+        json_dict.update(zip(attrs, get_attrs(obj)))
+        for key in extra:
+            value = _dict[key]
+            if not key.startswith("_") and (
+                key in json_cols or _is_json_searializable(value)
+            ):
+                json_dict[key] = value
+        return _add_included(obj, include, json_dict)
+
+    return _serialize
+
+
+def _tuple_getter(
+    getter: t.Callable[..., t.Callable[[t.Any], t.Any]], keys: tuple[str, ...]
+) -> t.Callable[[t.Any], tuple[t.Any, ...]]:
+    """`operator.itemgetter`/`attrgetter` that always returns a tuple.
+
+    Args:
+        - `getter (Callable)`: `operator.itemgetter` or `operator.attrgetter`
+        - `keys (tuple[str, ...])`: keys to get \n
+    Returns:
+        - `Callable[[Any], tuple[Any, ...]]`: getter
+    """
+    if len(keys) > 1:
+        return getter(*keys)
+    if keys:
+        _get = getter(keys[0])
+        return lambda obj: (_get(obj),)
+    return lambda obj: ()
+
+
+@functools.cache
+def _row_serializer(cls: t.Type[Base]) -> t.Callable[[Row], dict[str, t.Any]]:
+    """Builds the json serializer for rows of `cls.json_select()`.
+
+    Args:
+        - `cls (Type[Base])`: orm class \n
+    Returns:
+        - `Callable[[Row], dict[str, Any]]`: serializer
+    """
+    keys = [c.key for c in cls.json_select()]
+    json_cols = _json_cols(cls) | cls.json_expressions().keys()
+    checked = [key for key in keys if key not in json_cols]
+    has_timestamp = "timestamp" in keys
+
+    def _serialize(row: Row) -> dict[str, t.Any]:
+        json_dict = dict(zip(keys, row))
+        for key in checked:
+            if not _is_json_searializable(json_dict[key]):
+                del json_dict[key]
+        if not has_timestamp:
+            json_dict["timestamp"] = time.time()
+        return json_dict
+
+    return _serialize
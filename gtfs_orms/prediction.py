@@ -1,174 +1,235 @@
-"""File to hold the Prediction class and its associated methods."""
-
-# pylint: disable=line-too-long
-
-import typing as t
-
-from sqlalchemy.orm import Mapped, mapped_column, reconstructor, relationship
-
-from .base import Base
-
-if t.TYPE_CHECKING:
-    from .route import Route
-    from .stop import Stop
-    from .stop_time import StopTime
-    from .trip import Trip
-    from .vehicle import Vehicle
-
-
-class Prediction(Base):
-    """Prediction
-
-    mutated from the original GTFS spec
-
-    this table is realtime and thus violatile. all relationships are viewonly
-
-    this is better known as a TripUpdate,\
-        but i called it prediction way back then and never changed it :P
-        
-    `source`: https://cdn.mbta.com/realtime/TripUpdates.pb
-    
-    https://github.com/google/transit/blob/master/gtfs-realtime/spec/en/reference.md#message-tripupdate
-
-    """
-
-    __tablename__ = "predictions"
-    __realtime_name__ = "trip_updates"
-
-    prediction_id: Mapped[str]
-    arrival_time: Mapped[t.Optional[int]]
-    departure_time: Mapped[t.Optional[int]]
-    direction_id: Mapped[t.Optional[int]]
-    stop_sequence: Mapped[t.Optional[int]]
-    route_id: Mapped[t.Optional[str]]
-    stop_id: Mapped[t.Optional[str]]
-    trip_id: Mapped[t.Optional[str]]
-    vehicle_id: Mapped[t.Optional[str]]
-    index: Mapped[int] = mapped_column(primary_key=True)
-
-    route: Mapped["Route"] = relationship(
-        back_populates="predictions",
-        primaryjoin="foreign(Prediction.route_id)==Route.route_id",
-        viewonly=True,
-    )
-    stop: Mapped["Stop"] = relationship(
-        back_populates="predictions",
-        primaryjoin="foreign(Prediction.stop_id)==Stop.stop_id",
-        viewonly=True,
-    )
-    trip: Mapped["Trip"] = relationship(
-        back_populates="predictions",
-        primaryjoin="foreign(Prediction.trip_id)==Trip.trip_id",
-        viewonly=True,
-    )
-    vehicle: Mapped["Vehicle"] = relationship(
-        back_populates="predictions",
-        primaryjoin="foreign(Prediction.vehicle_id)==Vehicle.vehicle_id",
-        viewonly=True,
-    )
-
-    stop_time: Mapped["StopTime"] = relationship(
-        primaryjoin="""and_(foreign(Prediction.trip_id)==StopTime.trip_id,
-        foreign(Prediction.stop_id)==StopTime.stop_id,)""",
-        viewonly=True,
-        uselist=False,
-    )
-
-    @property
-    def destination(self) -> "Stop | None":
-        """the destination of the trip as a `stop`"""
-        if self.trip:
-            return self.trip.destination
-        return max(
-            (s for s in self.vehicle.predictions if s.trip_id == self.trip_id),
-            default=None,
-        )
-
-    @reconstructor
-    def _init_on_load_(self) -> None:
-        """Converts arrival_time and departure_time to datetime objects."""
-        # pylint: disable=attribute-defined-outside-init
-        self.stop_sequence = self.stop_sequence or 0
-        self.stop_name = self.stop.stop_name if self.stop else None
-        self.platform_code = self.stop.platform_code if self.stop else None
-        self.platform_name = self.stop.platform_name if self.stop else None
-        # self.stop_url = self.stop.stop_url if self.stop else None
-        self.delay = self._get_delay()
-
-    def __repr__(self) -> str:
-        """override for `Base.__repr__`"""
-
-        return (
-            f"<{self.__class__}({self.trip_id}, {self.stop_id}, {self.stop_sequence})>"
-        )
-
-    def __lt__(self, other: "Prediction") -> bool:
-        """Implements less than operator.
-
-        Returns:
-            - `bool`: whether the object is less than the other
-        """
-        if not isinstance(other, self.__class__):
-            raise NotImplementedError(
-                f"Cannot compare {self.__class__} to {other.__class__}"
-            )
-        if self.trip_id == other.trip_id:
-            return self.stop_sequence < other.stop_sequence
-        return super().__lt__(other)
-
-    def __eq__(self, other: "Prediction") -> bool:
-        """Implements equality operator.
-
-        Returns:
-            - `bool`: whether the objects are equal
-        """
-        if not isinstance(other, self.__class__):
-            raise NotImplementedError(
-                f"Cannot compare {self.__class__} to {other.__class__}"
-            )
-
-        if self.trip_id == other.trip_id:
-            return self.stop_sequence == other.stop_sequence
-        return super().__eq__(other)
-
-    def _get_delay(self) -> int | float | None:
-        """Returns the delay of the prediction.
-
-        Returns:
-            - `int`: the delay of the prediction
-        """
-        delay = 0
-        if not self.stop_time:
-            return delay
-        if self.departure_time and self.stop_time.departure_timestamp:
-            delay = self.departure_time - self.stop_time.departure_timestamp
-        elif self.arrival_time and self.stop_time.arrival_timestamp:
-            delay = self.arrival_time - self.stop_time.arrival_timestamp
-        if delay <= -60_000:
-            delay += 86_400
-        return delay
-
-    def get_headsign(self) -> str:
-        """Returns the headsign of the prediction.
-
-        Returns:
-            - `str`: the headsign of the prediction
-        """
-        if self.stop_time:
-            return self.stop_time.destination_label
-        if self.vehicle and self.vehicle.predictions:
-            return max(self.vehicle.predictions).stop.stop_name
-        return ""
-
-    @t.override
-    def as_json(self, *include: str, **kwargs) -> dict[str, t.Any]:
-        """returns `Prediction` as a dictionary.\
-            overrides `as_json` in `Base`.
-        
-        args:
-            - `*include`: A list of properties to include in the dictionary.
-            - `**kwargs`: unused\n
-        Returns:
-            - `dict[str, Any]`: `Prediction` as a dictionary.
-        """
-        return super().as_json(*include, **kwargs) | {"headsign": self.get_headsign()}
+"""File to hold the Prediction class and its associated methods."""
+
+# pylint: disable=line-too-long
+
+import functools
+import typing as t
+
+from sqlalchemy import ColumnElement, Index, and_, case, func, literal, select
+from sqlalchemy.orm import Mapped, mapped_column, reconstructor, relationship
+
+from helper_functions import get_date
+
+from .base import Base
+
+if t.TYPE_CHECKING:
+    from .route import Route
+    from .stop import Stop
+    from .stop_time import StopTime
+    from .trip import Trip
+    from .vehicle import Vehicle
+
+
+class Prediction(Base):
+    """Prediction
+
+    mutated from the original GTFS spec
+
+    this table is realtime and thus violatile. all relationships are viewonly
+
+    this is better known as a TripUpdate,\
+        but i called it prediction way back then and never changed it :P
+        
+    `source`: https://cdn.mbta.com/realtime/TripUpdates.pb
+    
+    https://github.com/google/transit/blob/master/gtfs-realtime/spec/en/reference.md#message-tripupdate
+
+    """
+
+    __tablename__ = "predictions"
+    __realtime_name__ = "trip_updates"
+    __filter_aliases__ = {
+        "stop_name": "stop.stop_name",
+        "platform_code": "stop.platform_code",
+        "platform_name": "stop.platform_name",
+    }
+    __json_attrs__ = ("stop_name", "platform_code", "platform_name", "delay")
+    __table_args__ = (Index("ix_predictions_trip_id_stop_id", "trip_id", "stop_id"),)
+
+    prediction_id: Mapped[str]
+    arrival_time: Mapped[t.Optional[int]]
+    departure_time: Mapped[t.Optional[int]]
+    direction_id: Mapped[t.Optional[int]]
+    stop_sequence: Mapped[t.Optional[int]]
+    route_id: Mapped[t.Optional[str]]
+    stop_id: Mapped[t.Optional[str]]
+    trip_id: Mapped[t.Optional[str]]
+    vehicle_id: Mapped[t.Optional[str]]
+    index: Mapped[int] = mapped_column(primary_key=True)
+
+    route: Mapped["Route"] = relationship(
+        back_populates="predictions",
+        primaryjoin="foreign(Prediction.route_id)==Route.route_id",
+        viewonly=True,
+    )
+    stop: Mapped["Stop"] = relationship(
+        back_populates="predictions",
+        primaryjoin="foreign(Prediction.stop_id)==Stop.stop_id",
+        viewonly=True,
+    )
+    trip: Mapped["Trip"] = relationship(
+        back_populates="predictions",
+        primaryjoin="foreign(Prediction.trip_id)==Trip.trip_id",
+        viewonly=True,
+    )
+    vehicle: Mapped["Vehicle"] = relationship(
+        back_populates="predictions",
+        primaryjoin="foreign(Prediction.vehicle_id)==Vehicle.vehicle_id",
+        viewonly=True,
+    )
+
+    stop_time: Mapped["StopTime"] = relationship(
+        primaryjoin="""and_(foreign(Prediction.trip_id)==StopTime.trip_id,
+        foreign(Prediction.stop_id)==StopTime.stop_id,)""",
+        viewonly=True,
+        uselist=False,
+    )
+
+    @property
+    def destination(self) -> "Stop | None":
+        """the destination of the trip as a `stop`"""
+        if self.trip:
+            return self.trip.destination
+        return max(
+            (s for s in self.vehicle.predictions if s.trip_id == self.trip_id),
+            default=None,
+        )
+
+    @reconstructor
+    def _init_on_load_(self) -> None:
+        """Defaults stop_sequence; attributes that need the stop \
+            or stop_time are cached properties, loaded on first access."""
+        # pylint: disable=attribute-defined-outside-init
+        self.stop_sequence = self.stop_sequence or 0
+
+    @functools.cached_property
+    def stop_name(self) -> str | None:
+        """name of the stop"""
+        return self.stop.stop_name if self.stop else None
+
+    @functools.cached_property
+    def platform_code(self) -> str | None:
+        """platform code of the stop"""
+        return self.stop.platform_code if self.stop else None
+
+    @functools.cached_property
+    def platform_name(self) -> str | None:
+        """platform name of the stop"""
+        return self.stop.platform_name if self.stop else None
+
+    @functools.cached_property
+    def delay(self) -> int | float | None:
+        """delay vs the schedule in seconds, see `_get_delay`"""
+        return self._get_delay()
+
+    def __repr__(self) -> str:
+        """override for `Base.__repr__`"""
+
+        return (
+            f"<{self.__class__}({self.trip_id}, {self.stop_id}, {self.stop_sequence})>"
+        )
+
+    def __lt__(self, other: "Prediction") -> bool:
+        """Implements less than operator.
+
+        Returns:
+            - `bool`: whether the object is less than the other
+        """
+        if not isinstance(other, self.__class__):
+            raise NotImplementedError(
+                f"Cannot compare {self.__class__} to {other.__class__}"
+            )
+        if self.trip_id == other.trip_id:
+            return self.stop_sequence < other.stop_sequence
+        return super().__lt__(other)
+
+    def __eq__(self, other: "Prediction") -> bool:
+        """Implements equality operator.
+
+        Returns:
+            - `bool`: whether the objects are equal
+        """
+        if not isinstance(other, self.__class__):
+            raise NotImplementedError(
+                f"Cannot compare {self.__class__} to {other.__class__}"
+            )
+
+        if self.trip_id == other.trip_id:
+            return self.stop_sequence == other.stop_sequence
+        return super().__eq__(other)
+
+    def _get_delay(self) -> int | float | None:
+        """Returns the delay of the prediction.
+
+        Returns:
+            - `int`: the delay of the prediction
+        """
+        delay = 0
+        if not self.stop_time:
+            return delay
+        if self.departure_time and self.stop_time.departure_timestamp:
+            delay = self.departure_time - self.stop_time.departure_timestamp
+        elif self.arrival_time and self.stop_time.arrival_timestamp:
+            delay = self.arrival_time - self.stop_time.arrival_timestamp
+        if delay <= -60_000:
+            delay += 86_400
+        return delay
+
+    @classmethod
+    def json_expressions(cls) -> dict[str, ColumnElement]:
+        """`delay` (`_get_delay`) in sql, against the indexed integer \
+            `StopTime.departure_seconds`/`arrival_seconds`, so `/api` filters on it run in sql. \
+            `Prediction` isn't `row_json`, so this is only used by filters."""
+        stop_times = cls.metadata.tables["stop_times"]
+        _unix_time = literal(get_date().timestamp())
+
+        def _scheduled(column: ColumnElement[int]) -> ColumnElement[float]:
+            return (
+                select(column + _unix_time)
+                .where(
+                    stop_times.c.trip_id == cls.trip_id,
+                    stop_times.c.stop_id == cls.stop_id,
+                )
+                .limit(1)
+                .scalar_subquery()
+            )
+
+        departure = _scheduled(stop_times.c.departure_seconds)
+        arrival = _scheduled(stop_times.c.arrival_seconds)
+        delay = case(
+            (
+                and_(func.coalesce(cls.departure_time, 0) != 0, departure.is_not(None)),
+                cls.departure_time - departure,
+            ),
+            (
+                and_(func.coalesce(cls.arrival_time, 0) != 0, arrival.is_not(None)),
+                cls.arrival_time - arrival,
+            ),
+            else_=0,
+        )
+        return {"delay": case((delay <= -60_000, delay + 86_400), else_=delay)}
+
+    def get_headsign(self) -> str:
+        """Returns the headsign of the prediction.
+
+        Returns:
+            - `str`: the headsign of the prediction
+        """
+        if self.stop_time:
+            return self.stop_time.destination_label
+        if self.vehicle and self.vehicle.predictions:
+            return max(self.vehicle.predictions).stop.stop_name
+        return ""
+
+    @t.override
+    def as_json(self, *include: str, **kwargs) -> dict[str, t.Any]:
+        """returns `Prediction` as a dictionary.\
+            overrides `as_json` in `Base`.
+        
+        args:
+            - `*include`: A list of properties to include in the dictionary.
+            - `**kwargs`: unused\n
+        Returns:
+            - `dict[str, Any]`: `Prediction` as a dictionary.
+        """
+        return super().as_json(*include, **kwargs) | {"headsign": self.get_headsign()}
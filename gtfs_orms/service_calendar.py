@@ -0,0 +1,155 @@
+"""File to hold the ServiceCalendar class and its associated methods."""
+
+import datetime as dt
+import typing as t
+
+from sqlalchemy import String, cast, select
+from sqlalchemy.orm import Session
+
+from .base import Base
+
+WEEKDAYS = (
+    "monday",
+    "tuesday",
+    "wednesday",
+    "thursday",
+    "friday",
+    "saturday",
+    "sunday",
+)
+
+
+def _to_date(value: t.Any) -> dt.date:
+    """`calendars`/`calendar_dates` dates are stored as `YYYYMMDD`"""
+    if isinstance(value, dt.datetime):
+        return value.date()
+    return dt.datetime.strptime(str(value), "%Y%m%d").date()
+
+
+class ServiceCalendar:
+    """ServiceCalendar
+
+    not a table; the active service_ids of every day in the feed window, \
+        precomputed from `calendars` and `calendar_dates` after the import.
+
+    each service_id gets a bit, each day an `int` of the bits running that day, \
+        so `is_active` is a dict lookup and a shift rather than \
+        a scan of `Calendar.calendar_dates` per call.
+
+    `ServiceCalendar.latest` is the one last built by `Feed.build_service_calendar`.
+
+    Args:
+        - `calendars (Iterable[tuple[str, Sequence[bool], date, date]])`: \
+            service_id, monday..sunday, start_date, end_date
+        - `calendar_dates (Iterable[tuple[str, date, str]])`: \
+            service_id, date, exception_type
+        - `exclude (Iterable[str], optional)`: service_ids to leave out, \
+            e.g. atypical (`service_schedule_typicality = 6`) ones
+    """
+
+    latest: t.ClassVar["ServiceCalendar | None"] = None
+
+    def __init__(
+        self,
+        calendars: t.Iterable[tuple[str, t.Sequence[bool], dt.date, dt.date]],
+        calendar_dates: t.Iterable[tuple[str, dt.date, str]] = (),
+        exclude: t.Iterable[str] = (),
+    ) -> None:
+        exclude = set(exclude)
+        self.bits: dict[str, int] = {}
+        self.days: dict[dt.date, int] = {}
+        for service_id, weekdays, start_date, end_date in calendars:
+            if service_id in exclude:
+                continue
+            bit = 1 << self.bits.setdefault(service_id, len(self.bits))
+            for offset in range((end_date - start_date).days + 1):
+                day = start_date + dt.timedelta(days=offset)
+                if weekdays[day.weekday()]:
+                    self.days[day] = self.days.get(day, 0) | bit
+        for service_id, day, exception_type in calendar_dates:
+            if service_id in exclude:
+                continue
+            bit = 1 << self.bits.setdefault(service_id, len(self.bits))
+            if str(exception_type) == "1":
+                self.days[day] = self.days.get(day, 0) | bit
+            elif str(exception_type) == "2":
+                self.days[day] = self.days.get(day, 0) & ~bit
+        self._service_ids = sorted(self.bits, key=self.bits.__getitem__)
+
+    def __repr__(self) -> str:
+        window = f"{min(self.days)}..{max(self.days)}" if self.days else ""
+        return f"<{self.__class__.__name__}({len(self.bits)} services, {window})>"
+
+    def __contains__(self, service_id: str) -> bool:
+        return service_id in self.bits
+
+    @classmethod
+    def from_session(cls, session: Session) -> t.Self:
+        """builds a `ServiceCalendar` from `calendars`, `calendar_dates` \
+            and `calendar_attributes`.
+
+        args:
+            - `session (Session)`: session to read with\n
+        returns:
+            - `ServiceCalendar`: the service calendar
+        """
+        tables = Base.metadata.tables
+        calendars, dates = tables["calendars"], tables["calendar_dates"]
+        attributes = tables["calendar_attributes"]
+        return cls(
+            (
+                (row[0], row[1:8], _to_date(row[8]), _to_date(row[9]))
+                for row in session.execute(
+                    select(
+                        calendars.c.service_id,
+                        *(calendars.c[day] for day in WEEKDAYS),
+                        cast(calendars.c.start_date, String),
+                        cast(calendars.c.end_date, String),
+                    )
+                )
+            ),
+            (
+                (service_id, _to_date(date), exception_type)
+                for service_id, date, exception_type in session.execute(
+                    select(
+                        dates.c.service_id,
+                        cast(dates.c.date, String),
+                        dates.c.exception_type,
+                    )
+                )
+            ),
+            session.execute(
+                select(attributes.c.service_id).where(
+                    attributes.c.service_schedule_typicality == "6"
+                )
+            ).scalars(),
+        )
+
+    def is_active(self, service_id: str, date: dt.datetime | dt.date) -> bool:
+        """Returns true if the service operates on the date
+
+        args:
+            - `service_id (str)`: the service
+            - `date (datetime|date)`: the date to check\n
+        returns:
+            - `bool`: whether the service operates on the date
+        """
+        if isinstance(date, dt.datetime):
+            date = date.date()
+        bit = self.bits.get(service_id)
+        return bit is not None and bool(self.days.get(date, 0) >> bit & 1)
+
+    def service_ids(self, *dates: dt.datetime | dt.date) -> set[str]:
+        """Returns the service_ids operating on any of the dates
+
+        args:
+            - `*dates (datetime|date)`: the dates to check\n
+        returns:
+            - `set[str]`: service_ids
+        """
+        active = 0
+        for date in dates:
+            active |= self.days.get(
+                date.date() if isinstance(date, dt.datetime) else date, 0
+            )
+        return {s for i, s in enumerate(self._service_ids) if active >> i & 1}
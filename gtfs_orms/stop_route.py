@@ -0,0 +1,38 @@
+"""File to hold the StopRoute class and its associated methods."""
+
+import typing as t
+
+from sqlalchemy import ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from .base import Base
+
+if t.TYPE_CHECKING:
+    from .route import Route
+    from .stop import Stop
+
+
+class StopRoute(Base):  # pylint: disable=too-few-public-methods
+    """StopRoute
+
+    this table isn't in the gtfs spec; it's materialized from \
+        `stop_times` and `trips` after the nightly import \
+        (see `Query.insert_stop_routes_query`), so the routes serving \
+        a stop (or a parent station) are an indexed lookup
+
+    """
+
+    __tablename__ = "stop_routes"
+
+    stop_id: Mapped[str] = mapped_column(
+        ForeignKey("stops.stop_id", onupdate="CASCADE", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    route_id: Mapped[str] = mapped_column(
+        ForeignKey("routes.route_id", onupdate="CASCADE", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    parent_station: Mapped[t.Optional[str]] = mapped_column(index=True)
+
+    stop: Mapped["Stop"] = relationship(viewonly=True)
+    route: Mapped["Route"] = relationship(viewonly=True)
@@ -1,163 +1,221 @@
-"""File to hold the StopTime class and its associated methods."""
-
-# pylint: disable=wildcard-import
-# pylint: disable=unused-wildcard-import
-import datetime as dt
-import time
-import typing as t
-
-from sqlalchemy import ForeignKey
-from sqlalchemy.orm import Mapped, mapped_column, reconstructor, relationship
-
-from helper_functions import get_date, to_seconds
-
-from .base import Base
-
-if t.TYPE_CHECKING:
-    from .prediction import Prediction
-    from .stop import Stop
-    from .transfer import Transfer
-    from .trip import Trip
-
-
-class StopTime(Base):
-    """Stop Times
-
-    this can also be called a tripstop in keolis terms
-
-    represents one trip @ one stop
-
-    https://github.com/mbta/gtfs-documentation/blob/master/reference/gtfs.md#stop_timestxt
-
-    """
-
-    __tablename__ = "stop_times"
-    __filename__ = "stop_times.txt"
-
-    trip_id: Mapped[str] = mapped_column(
-        ForeignKey("trips.trip_id", onupdate="CASCADE", ondelete="CASCADE"),
-        primary_key=True,
-    )
-    arrival_time: Mapped[str]
-    departure_time: Mapped[str]
-    stop_id: Mapped[str] = mapped_column(
-        ForeignKey("stops.stop_id", onupdate="CASCADE", ondelete="CASCADE")
-    )
-    stop_sequence: Mapped[int] = mapped_column(primary_key=True)
-    stop_headsign: Mapped[t.Optional[str]]
-    pickup_type: Mapped[str]  # consider as int?
-    drop_off_type: Mapped[str]  # consider as int?
-    timepoint: Mapped[t.Optional[str]]  # consider as int?
-    checkpoint_id: Mapped[t.Optional[str]]
-    continuous_pickup: Mapped[t.Optional[str]]
-    continuous_drop_off: Mapped[t.Optional[str]]
-
-    stop: Mapped["Stop"] = relationship(back_populates="stop_times")
-    trip: Mapped["Trip"] = relationship(back_populates="stop_times")
-    prediction: Mapped["Prediction"] = relationship(
-        primaryjoin="""and_(
-            foreign(StopTime.trip_id)==Prediction.trip_id, 
-            foreign(StopTime.stop_sequence)==Prediction.stop_sequence
-        )""",
-        uselist=False,
-        viewonly=True,
-    )
-    to_transfer: Mapped["Transfer"] = relationship(
-        "Transfer",
-        primaryjoin="""and_(
-            StopTime.trip_id==foreign(Transfer.to_trip_id),
-            StopTime.stop_id==foreign(Transfer.to_stop_id) 
-            )""",
-        viewonly=True,
-    )
-
-    from_transfer: Mapped["Transfer"] = relationship(
-        "Transfer",
-        primaryjoin="""and_(
-            StopTime.trip_id==foreign(Transfer.from_trip_id),
-            StopTime.stop_id==foreign(Transfer.from_stop_id)
-            )""",
-        viewonly=True,
-    )
-
-    @reconstructor
-    def _init_on_load_(self):
-        """Reconstructs the object on load from the database.
-        executes after the object is loaded from the database and in init"""
-        # pylint: disable=attribute-defined-outside-init
-        _unix_time = get_date().timestamp()
-        self.destination_label = self.stop_headsign or self.trip.trip_headsign
-        self.departure_timestamp = to_seconds(self.departure_time) + _unix_time
-        self.arrival_timestamp = to_seconds(self.arrival_time) + _unix_time
-
-    def __lt__(self, other: "StopTime") -> bool:
-        """Implements less than operator.
-
-        Returns:
-            - `bool`: whether the object is less than the other
-        """
-        if not isinstance(other, self.__class__):
-            raise NotImplementedError(
-                f"Cannot compare {self.__class__} to {other.__class__}"
-            )
-
-        if not self.trip_id == other.trip_id:
-            return super().__lt__(other)
-        return self.stop_sequence < other.stop_sequence
-
-    def is_flag_stop(self) -> bool:
-        """Returns true if this StopTime is a flag stop
-
-        returns:
-            - `bool`: whether the stop is a flag stop
-        """
-        return self.trip.route.route_type == "2" and (
-            self.pickup_type == "3" or self.drop_off_type == "3"
-        )
-
-    def is_early_departure(self) -> bool:
-        """Returns true if this StopTime is an early departure stop
-
-        returns:
-            - `bool`: whether the stop is an early departure stop
-        """
-        return (
-            self.trip.route.route_type == "2"
-            and self.timepoint == "0"
-            and not self.is_destination()
-        )
-
-    def is_active(self, _date: dt.datetime | None = None, **kwargs) -> bool:
-        """Returns true if this StopTime is active on the given date and time
-
-        args:
-            - `date (datetime = None)`: the date to check <- defaults to the current date
-            - `kwargs`: additional arguments passed to `get_date` \n
-        returns:
-            - `bool`: whether the stop is active on the given date and time
-        """
-        return (
-            self.trip.calendar.operates_on(_date or get_date(**kwargs))
-            and self.departure_timestamp > time.time()
-        )
-
-    def is_destination(self) -> bool:
-        """Returns true if this StopTime is the last stop in the trip
-
-        returns:
-            - `bool`: whether the stop is the last stop in the trip
-        """
-        return self.stop == self.trip.destination
-
-    @t.override
-    def _as_json_dict(self) -> dict[str, t.Any]:
-        """Returns a dict representation of the object
-
-        returns:
-            - `dict`: the object as a dictionary
-        """
-        return super()._as_json_dict() | {
-            "flag_stop": self.is_flag_stop(),
-            "early_departure": self.is_early_departure(),
-            "stop_name": self.stop.stop_name,
-        }
+"""File to hold the StopTime class and its associated methods."""
+
+# pylint: disable=wildcard-import
+# pylint: disable=unused-wildcard-import
+import datetime as dt
+import functools
+import time
+import typing as t
+
+from sqlalchemy import ColumnElement, ForeignKey, Index, func, literal, select
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+
+from helper_functions import get_date, to_seconds, to_sql_seconds
+
+from .base import Base
+from .service_calendar import ServiceCalendar
+
+if t.TYPE_CHECKING:
+    from .prediction import Prediction
+    from .stop import Stop
+    from .transfer import Transfer
+    from .trip import Trip
+
+
+class StopTime(Base):
+    """Stop Times
+
+    this can also be called a tripstop in keolis terms
+
+    represents one trip @ one stop
+
+    `arrival_seconds`/`departure_seconds` aren't in stop_times.txt; they're the times \
+        as seconds past the start of the service day, added on import, \
+        so time range queries (indexed by stop) don't parse strings
+
+    https://github.com/mbta/gtfs-documentation/blob/master/reference/gtfs.md#stop_timestxt
+
+    """
+
+    __tablename__ = "stop_times"
+    __filename__ = "stop_times.txt"
+    __json_attrs__ = ("destination_label", "departure_timestamp", "arrival_timestamp")
+    __table_args__ = (
+        Index(
+            "ix_stop_times_stop_id_departure_seconds", "stop_id", "departure_seconds"
+        ),
+    )
+
+    trip_id: Mapped[str] = mapped_column(
+        ForeignKey("trips.trip_id", onupdate="CASCADE", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    arrival_time: Mapped[str]
+    departure_time: Mapped[str]
+    arrival_seconds: Mapped[t.Optional[int]]
+    departure_seconds: Mapped[t.Optional[int]]
+    stop_id: Mapped[str] = mapped_column(
+        ForeignKey("stops.stop_id", onupdate="CASCADE", ondelete="CASCADE")
+    )
+    stop_sequence: Mapped[int] = mapped_column(primary_key=True)
+    stop_headsign: Mapped[t.Optional[str]]
+    pickup_type: Mapped[str]  # consider as int?
+    drop_off_type: Mapped[str]  # consider as int?
+    timepoint: Mapped[t.Optional[str]]  # consider as int?
+    checkpoint_id: Mapped[t.Optional[str]]
+    continuous_pickup: Mapped[t.Optional[str]]
+    continuous_drop_off: Mapped[t.Optional[str]]
+
+    stop: Mapped["Stop"] = relationship(back_populates="stop_times")
+    trip: Mapped["Trip"] = relationship(back_populates="stop_times")
+    prediction: Mapped["Prediction"] = relationship(
+        primaryjoin="""and_(
+            foreign(StopTime.trip_id)==Prediction.trip_id, 
+            foreign(StopTime.stop_sequence)==Prediction.stop_sequence
+        )""",
+        uselist=False,
+        viewonly=True,
+    )
+    to_transfer: Mapped["Transfer"] = relationship(
+        "Transfer",
+        primaryjoin="""and_(
+            StopTime.trip_id==foreign(Transfer.to_trip_id),
+            StopTime.stop_id==foreign(Transfer.to_stop_id) 
+            )""",
+        viewonly=True,
+    )
+
+    from_transfer: Mapped["Transfer"] = relationship(
+        "Transfer",
+        primaryjoin="""and_(
+            StopTime.trip_id==foreign(Transfer.from_trip_id),
+            StopTime.stop_id==foreign(Transfer.from_stop_id)
+            )""",
+        viewonly=True,
+    )
+
+    # derived on first access, so loading a row doesn't lazy load its trip
+
+    @functools.cached_property
+    def _unix_time(self) -> float:
+        """start of the service day as a unix timestamp"""
+        return get_date().timestamp()
+
+    @functools.cached_property
+    def destination_label(self) -> str:
+        """stop headsign, or the trip headsign"""
+        return self.stop_headsign or self.trip.trip_headsign
+
+    @functools.cached_property
+    def departure_timestamp(self) -> float:
+        """departure time as a unix timestamp"""
+        if self.departure_seconds is None:
+            return to_seconds(self.departure_time) + self._unix_time
+        return self.departure_seconds + self._unix_time
+
+    @functools.cached_property
+    def arrival_timestamp(self) -> float:
+        """arrival time as a unix timestamp"""
+        if self.arrival_seconds is None:
+            return to_seconds(self.arrival_time) + self._unix_time
+        return self.arrival_seconds + self._unix_time
+
+    @classmethod
+    def json_expressions(cls) -> dict[str, ColumnElement]:
+        """the cached properties above in sql, see `Base.json_expressions`"""
+        trips = cls.metadata.tables["trips"]
+        _unix_time = literal(get_date().timestamp())
+        return {
+            "destination_label": func.coalesce(
+                func.nullif(cls.stop_headsign, ""),
+                select(trips.c.trip_headsign)
+                .where(trips.c.trip_id == cls.trip_id)
+                .scalar_subquery(),
+            ),
+            "departure_timestamp": func.coalesce(
+                cls.departure_seconds, to_sql_seconds(cls.departure_time)
+            )
+            + _unix_time,
+            "arrival_timestamp": func.coalesce(
+                cls.arrival_seconds, to_sql_seconds(cls.arrival_time)
+            )
+            + _unix_time,
+        }
+
+    def __lt__(self, other: "StopTime") -> bool:
+        """Implements less than operator.
+
+        Returns:
+            - `bool`: whether the object is less than the other
+        """
+        if not isinstance(other, self.__class__):
+            raise NotImplementedError(
+                f"Cannot compare {self.__class__} to {other.__class__}"
+            )
+
+        if not self.trip_id == other.trip_id:
+            return super().__lt__(other)
+        return self.stop_sequence < other.stop_sequence
+
+    def is_flag_stop(self) -> bool:
+        """Returns true if this StopTime is a flag stop
+
+        returns:
+            - `bool`: whether the stop is a flag stop
+        """
+        return self.trip.route.route_type == "2" and (
+            self.pickup_type == "3" or self.drop_off_type == "3"
+        )
+
+    def is_early_departure(self) -> bool:
+        """Returns true if this StopTime is an early departure stop
+
+        returns:
+            - `bool`: whether the stop is an early departure stop
+        """
+        return (
+            self.trip.route.route_type == "2"
+            and self.timepoint == "0"
+            and not self.is_destination()
+        )
+
+    def is_active(self, _date: dt.datetime | None = None, **kwargs) -> bool:
+        """Returns true if this StopTime is active on the given date and time
+
+        args:
+            - `date (datetime = None)`: the date to check <- defaults to the current date
+            - `kwargs`: additional arguments passed to `get_date` \n
+        returns:
+            - `bool`: whether the stop is active on the given date and time
+        """
+        _date = _date or get_date(**kwargs)
+        service_calendar = ServiceCalendar.latest
+        # pylint: disable-next=unsupported-membership-test
+        if service_calendar and self.trip.service_id in service_calendar:
+            operates = service_calendar.is_active(self.trip.service_id, _date)
+        else:
+            operates = self.trip.calendar.operates_on(_date)
+        return operates and self.departure_timestamp > time.time()
+
+    def is_destination(self) -> bool:
+        """Returns true if this StopTime is the last stop in the trip
+
+        returns:
+            - `bool`: whether the stop is the last stop in the trip
+        """
+        if self.trip.stop_count is None:  # not summarized yet
+            return self.stop == self.trip.destination
+        return self.stop_id == self.trip.last_stop_id
+
+    @t.override
+    def _as_json_dict(self) -> dict[str, t.Any]:
+        """Returns a dict representation of the object
+
+        returns:
+            - `dict`: the object as a dictionary
+        """
+        return super()._as_json_dict() | {
+            "flag_stop": self.is_flag_stop(),
+            "early_departure": self.is_early_departure(),
+            "stop_name": self.stop.stop_name,
+        }
@@ -0,0 +1,246 @@
+"""File to hold the VehicleRecord class and its associated methods."""
+
+import typing as t
+from collections import defaultdict
+
+from geojson import Feature
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+
+from .base import Base
+from .prediction import Prediction
+from .route import Route
+from .stop import Stop
+from .stop_time import StopTime
+from .trip import Trip
+from .vehicle import Vehicle
+
+# columns are set from `Vehicle.cols`
+# pylint: disable=no-member,protected-access
+
+
+def _json(obj: Base, cache: dict[int, dict[str, t.Any]]) -> dict[str, t.Any]:
+    """`obj._as_json_dict()`, once per object"""
+    if (json_dict := cache.get(id(obj))) is None:
+        json_dict = cache[id(obj)] = obj._as_json_dict()
+    return json_dict
+
+
+def _load_trips(
+    session: Session, trip_ids: set[str], trip_properties: bool
+) -> dict[str, Trip]:
+    """trips by trip_id, with their `trip_properties` if they'll be serialized"""
+    query = select(Trip).where(Trip.trip_id.in_(trip_ids))
+    if trip_properties:
+        query = query.options(selectinload(Trip.trip_properties))
+    return {trip.trip_id: trip for trip in session.execute(query).scalars()}
+
+
+def _load_predictions(
+    session: Session, trip_ids: set[str]
+) -> tuple[dict[str, list[Prediction]], dict[tuple[str, str, str], Prediction]]:
+    """the predictions of trips, by trip_id, \
+        and by (vehicle_id, stop_id, trip_id) for `Vehicle.next_stop`"""
+    predictions: defaultdict[str, list[Prediction]] = defaultdict(list)
+    next_stops: dict[tuple[str, str, str], Prediction] = {}
+    for prediction in session.execute(
+        select(Prediction).where(Prediction.trip_id.in_(trip_ids))
+    ).scalars():
+        predictions[prediction.trip_id].append(prediction)
+        next_stops.setdefault(
+            (prediction.vehicle_id, prediction.stop_id, prediction.trip_id),
+            prediction,
+        )
+    return predictions, next_stops
+
+
+def _load_stop_times(
+    session: Session, trip_ids: set[str] | None, keys: set[tuple[str, str]]
+) -> dict[tuple[str, str], StopTime]:
+    """the stop times of (trip_id, stop_id) `keys`, selected by `trip_ids` \
+        if given (fewer parameters than every key), else by key"""
+    stop_times: dict[tuple[str, str], StopTime] = {}
+    for stop_time in session.execute(
+        select(StopTime).where(
+            StopTime.trip_id.in_(trip_ids)
+            if trip_ids is not None
+            else tuple_(StopTime.trip_id, StopTime.stop_id).in_(keys)
+        )
+    ).scalars():
+        if (stop_time.trip_id, stop_time.stop_id) in keys:
+            stop_times.setdefault((stop_time.trip_id, stop_time.stop_id), stop_time)
+    return stop_times
+
+
+def _set_related(
+    session: Session,
+    stop_times: dict[tuple[str, str], StopTime],
+    predictions: list[Prediction],
+    trips: dict[str, Trip],
+) -> None:
+    """loads the stops of stop times and predictions in one query, \
+        and sets them, their trips and stop times as if they'd been loaded"""
+    stops: dict[str, Stop] = {
+        stop.stop_id: stop
+        for stop in session.execute(
+            select(Stop).where(
+                Stop.stop_id.in_(
+                    {s.stop_id for s in stop_times.values()}
+                    | {p.stop_id for p in predictions}
+                )
+            )
+        ).scalars()
+    }
+    for stop_time in stop_times.values():
+        set_committed_value(stop_time, "stop", stops.get(stop_time.stop_id))
+        set_committed_value(stop_time, "trip", trips.get(stop_time.trip_id))
+    for prediction in predictions:
+        set_committed_value(prediction, "stop", stops.get(prediction.stop_id))
+        stop_time = stop_times.get((prediction.trip_id, prediction.stop_id))
+        if stop_time is not None:
+            set_committed_value(prediction, "stop_time", stop_time)
+
+
+class VehicleRecord:
+    """VehicleRecord
+
+    not a table; a `Vehicle` without the orm, for the realtime hot path \
+        (see `Feed.get_vehicle_features`): a slotted record of the vehicle's columns \
+        with its route, trip, stop time and predictions joined in bulk \
+        by `from_session`, a query each, instead of lazily per vehicle.
+
+    `as_json` matches `Vehicle.as_json` for the relationships a record holds \
+        (`RELATIONSHIPS`); others can't be included.
+
+    Args:
+        - `**columns`: `Vehicle` columns
+    """
+
+    COLUMNS: t.ClassVar[tuple[str, ...]] = tuple(Vehicle.cols)
+    RELATIONSHIPS: t.ClassVar[tuple[str, ...]] = (
+        "route",
+        "trip",
+        "stop_time",
+        "predictions",
+        "next_stop",
+    )
+    __slots__ = COLUMNS + RELATIONSHIPS
+
+    # the same logic as the orm, reading the same attributes
+    _speed_mph = Vehicle._speed_mph
+    _display_name = Vehicle._display_name
+    _headsign = Vehicle._headsign
+    _trip_short_name = Vehicle._trip_short_name
+    _derived_json = Vehicle._derived_json
+    trip_includes = Vehicle.trip_includes
+    as_point = Vehicle.as_point
+
+    def __init__(self, **columns: t.Any) -> None:
+        for column in self.COLUMNS:
+            setattr(self, column, columns.get(column))
+        # see `Vehicle._init_on_load_`
+        self.bearing = self.bearing or 0
+        self.current_stop_sequence = self.current_stop_sequence or 0
+        self.route: Route | None = None
+        self.trip: Trip | None = None
+        self.stop_time: StopTime | None = None
+        self.predictions: list[Prediction] = []
+        self.next_stop: Prediction | None = None
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__}(vehicle_id={self.vehicle_id})>"
+
+    @classmethod
+    def from_session(
+        cls, session: Session, *vehicle_ids: str, include: t.Iterable[str] = ()
+    ) -> list[t.Self]:
+        """Loads vehicles as records, with their relationships.
+
+        args:
+            - `session (Session)`: session to query
+            - `*vehicle_ids (str)`: vehicles to load. Defaults to all.
+            - `include (Iterable[str], optional)`: what the records will be serialized \
+                with, to load what that serializes through along with them. Defaults to ().\n
+        returns:
+            - `list[VehicleRecord]`: the vehicles
+        """
+        query = select(*Vehicle.__table__.columns)
+        if vehicle_ids:
+            query = query.where(Vehicle.vehicle_id.in_(vehicle_ids))
+        records = [cls(**row._mapping) for row in session.execute(query)]
+        trip_ids = {r.trip_id for r in records if r.trip_id}
+        routes: dict[str, Route] = {
+            route.route_id: route
+            for route in session.execute(
+                select(Route).where(
+                    Route.route_id.in_({r.route_id for r in records if r.route_id})
+                )
+            ).scalars()
+        }
+        trips = _load_trips(session, trip_ids, "trip_properties" in include)
+        predictions, next_stops = _load_predictions(session, trip_ids)
+        # predictions (`delay`, `stop_name`) and stop times (`stop_name`, \
+        #   `destination_label`) serialize through these; set them rather than lazy load them
+        serialized = (
+            [p for trip_predictions in predictions.values() for p in trip_predictions]
+            if "predictions" in include
+            else list(next_stops.values())
+        )
+        keys = {(r.trip_id, r.stop_id) for r in records if r.trip_id and r.stop_id}
+        keys.update((p.trip_id, p.stop_id) for p in serialized)
+        stop_times = _load_stop_times(
+            session, trip_ids if "predictions" in include else None, keys
+        )
+        _set_related(session, stop_times, serialized, trips)
+        for record in records:
+            record.route = routes.get(record.route_id)
+            record.trip = trips.get(record.trip_id)
+            record.stop_time = stop_times.get((record.trip_id, record.stop_id))
+            record.predictions = predictions.get(record.trip_id, [])
+            record.next_stop = next_stops.get(
+                (record.vehicle_id, record.stop_id, record.trip_id)
+            )
+        return records
+
+    def as_json(
+        self, *include: str, cache: dict[int, dict[str, t.Any]] | None = None
+    ) -> dict[str, t.Any]:
+        """Returns vehicle as json, see `Vehicle.as_json`.
+
+        args:
+            - `*include`: list of strings to include in the json
+            - `cache (dict[int, dict[str, Any]], optional)`: json of related objects, \
+                shared between records so each is serialized once. Defaults to None.\n
+        returns:
+            - `dict`: vehicle as a json
+        """
+        cache = {} if cache is None else cache
+        _dict = {column: getattr(self, column) for column in self.COLUMNS}
+        _dict["trip_short_name"] = self._trip_short_name()
+        for attr in include:
+            if attr not in self.RELATIONSHIPS:
+                continue
+            value = getattr(self, attr)
+            if isinstance(value, Base):
+                _dict[attr] = _json(value, cache)
+            if isinstance(value, list):
+                _dict[attr] = [_json(v, cache) for v in value]
+        return _dict | self._derived_json(*include)
+
+    def as_feature(
+        self, *include: str, cache: dict[int, dict[str, t.Any]] | None = None
+    ) -> Feature:
+        """Returns vehicle as feature, see `Vehicle.as_feature`.
+
+        args:
+            - `*include`: list of strings to include in the feature
+            - `cache (dict[int, dict[str, Any]], optional)`: see `as_json`\n
+        returns:
+            - `Feature`: vehicle as a geojson feature
+        """
+        return Feature(
+            id=self.vehicle_id,
+            geometry=self.as_point(),
+            properties=self.as_json(*include, cache=cache),
+        )
@@ -1,7 +1,15 @@
-"""Init file for the helper function module.
-
-This module contains functions that are used in multiple places in the
-GTFS package. They are kept here to avoid code duplication."""
-
-from .decorators import classproperty, removes_session, timeit
-from .gtfs_helper_time_functions import get_current_time, get_date, to_seconds
+"""Init file for the helper function module.
+
+This module contains functions that are used in multiple places in the
+GTFS package. They are kept here to avoid code duplication."""
+
+from .decorators import classproperty, removes_session, timeit
+from .fast_json import FastJSONProvider, json_dumps
+from .gtfs_helper_time_functions import (
+    get_current_time,
+    get_date,
+    to_seconds,
+    to_seconds_series,
+    to_sql_seconds,
+)
+from .polyline import decode_polyline, encode_polyline
@@ -0,0 +1,110 @@
+"""Module to hold the fast json encoder; uses `orjson` when it's installed."""
+
+import json
+import typing as t
+
+from flask.json.provider import DefaultJSONProvider
+
+# pylint: disable=no-member
+
+try:
+    import orjson
+except ImportError:  # falls back to the stdlib encoder
+    orjson = None
+
+if orjson:
+    _OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+def json_dumps(
+    obj: t.Any,
+    default: t.Callable[[t.Any], t.Any] | None = None,
+    indent: bool = False,
+    sort_keys: bool = False,
+) -> bytes:
+    """encodes an object as compact json.
+
+    args:
+        - `obj (Any)`: object to encode
+        - `default (Callable, optional)`: called for objects that can't be encoded natively.
+        - `indent (bool, optional)`: indent with 2 spaces. Defaults to False.
+        - `sort_keys (bool, optional)`: sort dict keys. Defaults to False.\n
+    returns:
+        - `bytes`: utf-8 encoded json
+    """
+    if orjson:
+        option = _OPTIONS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=default, option=option)
+    return json.dumps(
+        obj,
+        default=default,
+        indent=2 if indent else None,
+        separators=None if indent else (",", ":"),
+        sort_keys=sort_keys,
+    ).encode()
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """`flask` json provider that encodes with `orjson`, \
+        and falls back to the default provider without it.
+
+    install with `app.json = FastJSONProvider(app)`.
+
+    keys are no longer sorted by default; \
+        `datetime`s are still encoded by the default provider's `default`.
+    """
+
+    sort_keys = False
+
+    def dumps(self, obj: t.Any, **kwargs: t.Any) -> str:
+        """Serialize data as JSON to a string.
+
+        args:
+            - `obj (Any)`: object to encode
+            - `**kwargs`: `default`, `indent` and `sort_keys` are honored; \
+                anything else falls back to the default provider\n
+        returns:
+            - `str`: json
+        """
+        if not orjson or set(kwargs) - {"default", "indent", "sort_keys", "separators"}:
+            return super().dumps(obj, **kwargs)
+        return json_dumps(
+            obj,
+            default=kwargs.get("default", self.default),
+            indent=bool(kwargs.get("indent")),
+            sort_keys=kwargs.get("sort_keys", self.sort_keys),
+        ).decode()
+
+    def loads(self, s: str | bytes, **kwargs: t.Any) -> t.Any:
+        """Deserialize data as JSON.
+
+        args:
+            - `s (str | bytes)`: json
+            - `**kwargs`: falls back to the default provider if given\n
+        returns:
+            - `Any`: decoded object
+        """
+        if not orjson or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: t.Any, **kwargs: t.Any) -> t.Any:
+        """Serialize the given arguments as a JSON `Response`, \
+            encoding straight to bytes.
+
+        args:
+            - `*args`: a single value, or multiple values to serialize as a list
+            - `**kwargs`: treat as a dict to serialize\n
+        returns:
+            - `Response`: json response
+        """
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(
+            json_dumps(obj, self.default, indent, self.sort_keys) + b"\n",
+            mimetype=self.mimetype,
+        )
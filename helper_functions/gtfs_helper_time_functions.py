@@ -1,46 +1,81 @@
-"""Helper functions for time conversions for gtfs loader"""
-
-import datetime as dt
-
-import pytz
-
-
-def to_seconds(time: str) -> int:
-    """Converts a string in HH:MM:SS format to seconds past midnight
-
-    Args:
-        - `time (str)`: A string in HH:MM:SS format
-    Returns:
-        - `int`: The number of seconds past midnight
-    """
-
-    hours, minutes, seconds = time.split(":")
-    return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
-
-
-def get_date(offset: int = 0, zone: str = "America/New_York") -> dt.datetime:
-    """Returns the current date in the given timezone
-
-    Args:
-        - `offset (int, optional)`: The number of days to offset. Defaults to 0.
-        - `zone (str, optional)`: The timezone. Defaults to "America/New_York".\n
-    Returns:
-        - `datetime`: The current date in the given timezone
-    """
-
-    return dt.datetime.now(pytz.timezone(zone)).replace(
-        hour=0, minute=0, second=0, microsecond=0
-    ) + dt.timedelta(days=offset)
-
-
-def get_current_time(offset: int = 0, zone: str = "America/New_York") -> dt.datetime:
-    """Returns the current time in the given timezone
-
-    Args:
-        - `offset (int, optional)`: The number of hours to offset the time. Defaults to 0.
-        - `zone (str, optional)`: The timezone. Defaults to "America/New_York".\n
-    Returns:
-        - `datetime`: The current time in the given timezone
-    """
-
-    return dt.datetime.now(pytz.timezone(zone)) + dt.timedelta(hours=offset)
+"""Helper functions for time conversions for gtfs loader"""
+
+import datetime as dt
+
+import pandas as pd
+import pytz
+from sqlalchemy import ColumnElement, Integer, cast, func
+
+
+def to_seconds(time: str) -> int:
+    """Converts a string in HH:MM:SS format to seconds past midnight
+
+    Args:
+        - `time (str)`: A string in HH:MM:SS format
+    Returns:
+        - `int`: The number of seconds past midnight
+    """
+
+    hours, minutes, seconds = time.split(":")
+    return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+
+
+def to_seconds_series(times: pd.Series) -> pd.Series:
+    """`to_seconds` for a whole column of HH:MM:SS strings, vectorized
+
+    Args:
+        - `times (pd.Series)`: HH:MM:SS strings, may contain nulls
+    Returns:
+        - `pd.Series`: seconds past midnight (`Int64`, null where the time is)
+    """
+
+    parts = times.str.split(":", n=2, expand=True).reindex(columns=range(3))
+    hours, minutes, seconds = (
+        pd.to_numeric(parts[i], errors="coerce") for i in range(3)
+    )
+    return (hours * 3600 + minutes * 60 + seconds).astype("Int64")
+
+
+def to_sql_seconds(column: ColumnElement[str]) -> ColumnElement[int]:
+    """`to_seconds` in sql: HH:MM:SS -> seconds past midnight (hours can be > 23)
+
+    Args:
+        - `column (ColumnElement[str])`: HH:MM:SS column
+    Returns:
+        - `ColumnElement[int]`: seconds past midnight
+    """
+
+    hours_end = func.instr(column, ":")
+    return (
+        cast(func.substr(column, 1, hours_end - 1), Integer) * 3600
+        + cast(func.substr(column, hours_end + 1, 2), Integer) * 60
+        + cast(func.substr(column, -2), Integer)
+    )
+
+
+def get_date(offset: int = 0, zone: str = "America/New_York") -> dt.datetime:
+    """Returns the current date in the given timezone
+
+    Args:
+        - `offset (int, optional)`: The number of days to offset. Defaults to 0.
+        - `zone (str, optional)`: The timezone. Defaults to "America/New_York".\n
+    Returns:
+        - `datetime`: The current date in the given timezone
+    """
+
+    return dt.datetime.now(pytz.timezone(zone)).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    ) + dt.timedelta(days=offset)
+
+
+def get_current_time(offset: int = 0, zone: str = "America/New_York") -> dt.datetime:
+    """Returns the current time in the given timezone
+
+    Args:
+        - `offset (int, optional)`: The number of hours to offset the time. Defaults to 0.
+        - `zone (str, optional)`: The timezone. Defaults to "America/New_York".\n
+    Returns:
+        - `datetime`: The current time in the given timezone
+    """
+
+    return dt.datetime.now(pytz.timezone(zone)) + dt.timedelta(hours=offset)
@@ -0,0 +1,61 @@
+"""Helper functions for encoded polylines, see \
+    https://developers.google.com/maps/documentation/utilities/polylinealgorithm"""
+
+import itertools
+import typing as t
+
+
+def encode_polyline(
+    coordinates: t.Iterable[tuple[float, float]], precision: int = 6
+) -> str:
+    """Encodes lat/lon pairs as an encoded polyline
+
+    Args:
+        - `coordinates (Iterable[tuple[float, float]])`: lat, lon pairs
+        - `precision (int, optional)`: decimal places kept. Defaults to 6.\n
+    Returns:
+        - `str`: the encoded polyline
+    """
+
+    factor = 10**precision
+    chars: list[str] = []
+    previous = (0, 0)
+    for lat, lon in coordinates:
+        current = (round(lat * factor), round(lon * factor))
+        for value, last in zip(current, previous):
+            delta = value - last
+            delta = ~(delta << 1) if delta < 0 else delta << 1
+            while delta >= 0x20:
+                chars.append(chr((0x20 | (delta & 0x1F)) + 63))
+                delta >>= 5
+            chars.append(chr(delta + 63))
+        previous = current
+    return "".join(chars)
+
+
+def decode_polyline(polyline: str, precision: int = 6) -> list[tuple[float, float]]:
+    """Decodes an encoded polyline to lat/lon pairs
+
+    Args:
+        - `polyline (str)`: the encoded polyline
+        - `precision (int, optional)`: decimal places it was encoded with. Defaults to 6.\n
+    Returns:
+        - `list[tuple[float, float]]`: lat, lon pairs
+    """
+
+    factor = 10**precision
+    deltas: list[int] = []
+    value = shift = 0
+    for char in polyline:
+        byte = ord(char) - 63
+        value |= (byte & 0x1F) << shift
+        shift += 5
+        if byte < 0x20:
+            deltas.append(~(value >> 1) if value & 1 else value >> 1)
+            value = shift = 0
+    return [
+        (lat / factor, lon / factor)
+        for lat, lon in zip(
+            itertools.accumulate(deltas[0::2]), itertools.accumulate(deltas[1::2])
+        )
+    ]
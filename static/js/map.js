@@ -106,6 +106,10 @@ function createMap(id, routeType) {
 
   const vehicleLayer = new VehicleLayer({
     url: "vehicles?include=route,next_stop,stop_time,trip_properties",
+    // server-sent events hold a server thread each, so they're opt-in (`?stream=1`)
+    streamUrl: new URLSearchParams(window.location.search).has("stream")
+      ? "vehicles/stream?include=route,next_stop,stop_time,trip_properties"
+      : undefined,
     layer: L.markerClusterGroup({
       disableClusteringAtZoom: routeType == "commuter_rail" ? 10 : 12,
       name: "vehicles",
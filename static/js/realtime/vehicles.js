@@ -74,6 +74,10 @@ class VehicleLayer extends _RealtimeLayer {
 
     return L.divIcon({ html: iconHtml, iconSize: [10, 10] });
   }
+
+  /** zoom level at which only vehicles in view are requested */
+  static #bboxZoom = 13;
+
   /**
    *
    * @param {LayerApiRealtimeOptions?} options
@@ -83,19 +87,74 @@ class VehicleLayer extends _RealtimeLayer {
     this.iter = 0;
   }
 
+  /**
+   * url for the vehicles request; adds a `bbox` of the (padded) viewport
+   * once the map is zoomed in far enough, and `since` once we have data
+   * @param {LayerApiRealtimeOptions} options
+   * @param {number?} since - generation of the last response
+   * @returns {string}
+   */
+  #getUrl(options, since = null) {
+    const params = [];
+    if (options.map && options.map.getZoom() >= VehicleLayer.#bboxZoom) {
+      params.push(`bbox=${options.map.getBounds().pad(0.25).toBBoxString()}`);
+    }
+    if (since !== null) params.push(`since=${since}`);
+    if (!params.length) return options.url;
+    return `${options.url}${options.url.includes("?") ? "&" : "?"}${params.join(
+      "&"
+    )}`;
+  }
+
+  /**
+   * removes vehicles that are gone according to a response:
+   * a delta lists them under `removed`, a full response is everything
+   * that isn't in it
+   * @param {L.Realtime} realtime
+   * @param {LayerApiRealtimeOptions} options
+   * @param {GeoJSON.FeatureCollection & {removed?: string[]}} data
+   */
+  #removeStale(realtime, options, data) {
+    let stale;
+    if (data.removed) {
+      stale = data.removed.map((id) => realtime.getFeature(id)).filter(Boolean);
+    } else {
+      const ids = new Set(data.features.map((f) => f.id));
+      stale = options.layer
+        .getLayers()
+        .map((layer) => layer.feature)
+        .filter((feature) => feature && !ids.has(feature.id));
+    }
+    if (stale.length) realtime.remove(stale);
+  }
+
   /**
    * @param {LayerApiRealtimeOptions?} options
    */
   plot(options) {
     const _this = this;
     options = { ..._this.options, ...options };
-    const realtime = L.realtime(options.url, {
+    /** @type {number?} generation of the last response, for deltas */
+    let generation = null;
+    /** @type {(success: Function, error: Function) => Promise<void>} */
+    const source = (success, error) =>
+      fetch(_this.#getUrl(options, generation))
+        .then((response) => response.json())
+        .then((data) => {
+          _this.#removeStale(realtime, options, data);
+          generation = data.generation ?? null;
+          success(data);
+        })
+        .catch(error);
+    let stream = Boolean(options.streamUrl && window.EventSource);
+    const realtime = L.realtime(source, {
+      start: !stream,
       interval: 15000,
       // interval: 500,
       type: "FeatureCollection",
       container: options.layer,
       cache: false,
-      removeMissing: true,
+      removeMissing: false,
       getFeatureId: (f) => f.id,
       onEachFeature(f, l) {
         l.id = f.id;
@@ -108,6 +167,23 @@ class VehicleLayer extends _RealtimeLayer {
       },
     });
 
+    let lastZoom = options.map?.getZoom();
+    options.map?.on("moveend", () => {
+      const zoom = options.map.getZoom();
+      // refetch while zoomed in, or when zooming back out of the bbox range
+      if (!stream && Math.max(zoom, lastZoom) >= VehicleLayer.#bboxZoom) {
+        generation = null; // the bbox changed, so a delta isn't enough
+        realtime.update();
+      }
+      lastZoom = zoom;
+    });
+    if (stream) {
+      _this.#stream(realtime, options, () => {
+        stream = false; // refused (e.g. too many streams); poll instead
+        realtime.start();
+      });
+    }
+
     // realtime.on("update", () => _this.iter++);
     realtime.on("update", function (event) {
       this.iter++;
@@ -146,6 +222,37 @@ class VehicleLayer extends _RealtimeLayer {
     return realtime;
   }
 
+  /**
+   * keeps `realtime` in sync with the server-sent vehicle stream;
+   * `snapshot` replaces every vehicle, `delta` only touches what changed
+   * @param {L.Realtime} realtime
+   * @param {LayerApiRealtimeOptions} options
+   * @param {() => void} onClose - called if the stream is closed for good
+   * @returns {EventSource}
+   */
+  #stream(realtime, options, onClose) {
+    const eventSource = new EventSource(options.streamUrl);
+    eventSource.addEventListener("error", () => {
+      // a dropped connection reconnects by itself; a refused one is closed
+      if (eventSource.readyState === EventSource.CLOSED) onClose();
+    });
+    let generation = -1;
+    eventSource.addEventListener("snapshot", (event) => {
+      const data = JSON.parse(event.data);
+      this.#removeStale(realtime, options, data);
+      generation = data.generation;
+      realtime.update(data);
+    });
+    eventSource.addEventListener("delta", (event) => {
+      const data = JSON.parse(event.data);
+      if (data.generation <= generation) return;
+      this.#removeStale(realtime, options, data);
+      generation = data.generation;
+      realtime.update(data);
+    });
+    return eventSource;
+  }
+
   /**
    * gets vehicle text
    * @param {string} properties
@@ -3,6 +3,7 @@ import "leaflet-sidebar";
 
 export interface LayerApiRealtimeOptions {
   url: string;
+  streamUrl?: string;
   layer: L.LayerGroup;
   textboxSize: string;
   isMobile: boolean;
@@ -301,21 +302,33 @@ export interface PredictionProperty {
   trip_id: string;
   vehicle_id: string;
 }
+export interface AlertInformedEntity {
+  agency_id: string | null;
+  alert_id: string;
+  direction_id: number | null;
+  index: number;
+  route_id: string | null;
+  route_type: string | null;
+  stop_id: string | null;
+  trip_id: string | null;
+}
+export interface AlertActivePeriod {
+  alert_id: string;
+  end: number | null;
+  index: number;
+  start: number | null;
+}
 export interface AlertProperty {
-  active_period_end: number;
-  active_period_start: number;
-  agency_id: string;
+  active_period_end: number | null;
+  active_period_start: number | null;
+  active_periods?: AlertActivePeriod[];
   alert_id: string;
   cause: string;
   description: string;
-  direction_id: null;
   effect: string;
   header: string;
-  route_id: string;
-  route_type: string;
+  informed_entities?: AlertInformedEntity[];
   severity: string;
-  stop_id: null;
   timestamp: number;
-  trip_id: string;
   url: string;
 }